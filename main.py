@@ -4,8 +4,24 @@ Main application for Talk-To-Anyone. Starter of ALL!
 import streamlit as st
 import json
 import base64
-from src.api import initialize_api
-from src.utils import initialize_session_state, reset_chat_state, export_chat_state, import_chat_state
+from src.api import initialize_api, get_scheduler, single_flight_stats, get_model_registry
+from src.models import grounding_stats
+from src.utils import (
+    initialize_session_state, 
+    reset_chat_state, 
+    export_chat_state, 
+    import_chat_state, 
+    resume_conversation,
+    delete_conversation,
+    restore_conversation_from_query_params,
+    remember_conversation,
+    set_memory_enabled,
+    get_conversation_store,
+    get_memory_store,
+    get_owner_key,
+    get_signed_in_account,
+    SEARCH_PAGE_SIZE
+)
 from src.ui import (
     render_chat_messages, 
     render_source_popover,
@@ -27,13 +43,25 @@ if error_message:
     st.error(error_message)
     st.stop()
 
+# pick up the conversation in the URL (refresh, restart, or another worker)
+restore_conversation_from_query_params(client)
+
 # show personas if dev
 st.session_state.developer_mode = st.sidebar.toggle(
     "Developer Mode", value=st.session_state.developer_mode
 )
+if st.session_state.developer_mode:
+    with st.sidebar.expander("API Scheduler & Models", expanded=False):
+        st.json({
+            "routes": get_scheduler().metrics(),
+            "models": get_model_registry().stats(),
+            "coalescing": single_flight_stats(),
+            "grounding": grounding_stats(),
+        })
 
 # Voice settings
-render_voice_settings()
+with st.sidebar:
+    render_voice_settings(client)
 
 current_chat_mode_selection = st.sidebar.radio(
     "Select Chat Mode:",
@@ -44,36 +72,191 @@ current_chat_mode_selection = st.sidebar.radio(
 
 # reset on chat mode
 if current_chat_mode_selection != st.session_state.chat_mode:
+    remember_conversation(client)
     st.session_state.chat_mode = current_chat_mode_selection
     reset_chat_state()
     st.rerun()
 
 # import/export 
-with st.sidebar.expander("Import/Export Chat", expanded=False):
-    if st.session_state.start_chat and st.session_state.messages_display:
-        export_data = export_chat_state()
-        export_json = json.dumps(export_data)
-        b64_export = base64.b64encode(export_json.encode()).decode()
-        export_filename = f"talk_to_anyone_chat_{st.session_state.chat_mode.replace(' ', '_').lower()}.json"
-        
-        download_button_str = f'<a href="data:file/json;base64,{b64_export}" download="{export_filename}" style="display:inline-block;padding:0.25em 0.5em;text-decoration:none;background-color:#4CAF50;color:white;border-radius:4px;cursor:pointer;text-align:center;width:100%;"> Download Chat</a>'
-        st.markdown(download_button_str, unsafe_allow_html=True)
+@st.fragment
+def render_import_export_panel(client):
+    """
+    Render the import/export panel as a fragment so it only reruns on its own widgets.
     
-    st.write("Import a saved chat:")
-    uploaded_file = st.file_uploader("Choose a JSON file", type="json", key="chat_import_uploader")
-    
-    if uploaded_file is not None:
+    The export is serialized on request instead of on every rerun.
+    """
+    with st.expander("Import/Export Chat", expanded=False):
+        if st.session_state.start_chat and st.session_state.messages_display:
+            if st.button("📦 Prepare Download", key="prepare_export_btn", use_container_width=True):
+                export_data = export_chat_state()
+                export_json = json.dumps(export_data)
+                b64_export = base64.b64encode(export_json.encode()).decode()
+                export_filename = f"talk_to_anyone_chat_{st.session_state.chat_mode.replace(' ', '_').lower()}.json"
+                
+                download_button_str = f'<a href="data:file/json;base64,{b64_export}" download="{export_filename}" style="display:inline-block;padding:0.25em 0.5em;text-decoration:none;background-color:#4CAF50;color:white;border-radius:4px;cursor:pointer;text-align:center;width:100%;"> Download Chat</a>'
+                st.markdown(download_button_str, unsafe_allow_html=True)
+        
+        st.write("Import a saved chat:")
+        uploaded_file = st.file_uploader("Choose a JSON file", type="json", key="chat_import_uploader")
+        
+        if uploaded_file is not None:
+            try:
+                import_data = json.load(uploaded_file)
+                if st.button("Import Selected Chat", key="import_chat_btn"):
+                    with st.spinner("Importing chat and initializing personas..."):
+                        if import_chat_state(import_data, client):
+                            st.success("Chat imported successfully!")
+                            st.rerun()
+                        else:
+                            st.error("Failed to import chat. Please try again.")
+            except Exception as e:
+                st.error(f"Error reading the uploaded file: {e}")
+
+with st.sidebar:
+    render_import_export_panel(client)
+
+
+@st.fragment
+def render_saved_conversations_panel(client):
+    """
+    Render the list of the visitor's stored conversations that can be resumed.
+    """
+    with st.expander("Saved Conversations", expanded=False):
+        if st.session_state.conversation_id:
+            st.caption(f"Current conversation ID: `{st.session_state.conversation_id}`")
+        if not get_signed_in_account():
+            st.caption("Your conversations are saved under this page's link. Bookmark it to come back to them.")
+        
         try:
-            import_data = json.load(uploaded_file)
-            if st.button("Import Selected Chat", key="import_chat_btn"):
-                with st.spinner("Importing chat and initializing personas..."):
-                    if import_chat_state(import_data, client):
-                        st.success("Chat imported successfully!")
+            conversations = get_conversation_store().list_conversations(get_owner_key())
+        except Exception as e:
+            st.error(f"Conversation store unavailable: {e}")
+            return
+        
+        options = {c["id"]: f"{c['title'] or 'Untitled'} ({c['chat_mode']})" for c in conversations}
+        selected_id = st.selectbox(
+            "Recent conversations",
+            list(options),
+            format_func=options.get,
+            index=None,
+            key="resume_conversation_select",
+        )
+        typed_id = st.text_input("...or conversation ID", key="resume_conversation_id_input").strip()
+        conversation_id = typed_id or selected_id
+        
+        if st.button("Resume Conversation", key="resume_conversation_btn", disabled=not conversation_id):
+            with st.spinner("Loading conversation and initializing personas..."):
+                if resume_conversation(conversation_id, client):
+                    st.rerun()
+        if st.button("🗑️ Delete Conversation", key="delete_conversation_btn", disabled=not conversation_id):
+            if delete_conversation(conversation_id):
+                st.rerun()
+            st.error(f"No saved conversation with ID {conversation_id}.")
+
+with st.sidebar:
+    render_saved_conversations_panel(client)
+
+
+@st.fragment
+def render_search_panel(client):
+    """
+    Render full-text search over saved conversations, one page of hits at a time.
+    """
+    with st.expander("Search Conversations", expanded=False):
+        query = st.text_input("Search messages, personas and sources", key="conversation_search_input")
+        if query != st.session_state.get("conversation_search_query"):
+            st.session_state.conversation_search_query = query
+            st.session_state.conversation_search_page = 0
+        if not query.strip():
+            return
+        
+        page = st.session_state.conversation_search_page
+        try:
+            # One extra hit tells whether there is a next page
+            hits = get_conversation_store().search_messages(
+                query, get_owner_key(), limit=SEARCH_PAGE_SIZE + 1, offset=page * SEARCH_PAGE_SIZE
+            )
+        except Exception as e:
+            st.error(f"Search failed: {e}")
+            return
+        
+        if not hits:
+            st.caption("No matching messages.")
+            return
+        
+        for i, hit in enumerate(hits[:SEARCH_PAGE_SIZE]):
+            st.markdown(f"**{hit['title'] or 'Untitled'}** · {hit['role']}  \n{hit['snippet']}")
+            if st.button("Open", key=f"search_hit_{page}_{i}"):
+                with st.spinner("Loading conversation and initializing personas..."):
+                    if resume_conversation(hit["conversation_id"], client, seq=hit["seq"]):
                         st.rerun()
-                    else:
-                        st.error("Failed to import chat. Please try again.")
+        
+        col_prev, col_next = st.columns(2)
+        with col_prev:
+            if page > 0 and st.button("⬅️ Previous", key="search_prev_btn"):
+                st.session_state.conversation_search_page -= 1
+                st.rerun(scope="fragment")
+        with col_next:
+            if len(hits) > SEARCH_PAGE_SIZE and st.button("Next ➡️", key="search_next_btn"):
+                st.session_state.conversation_search_page += 1
+                st.rerun(scope="fragment")
+
+with st.sidebar:
+    render_search_panel(client)
+
+
+@st.fragment
+def render_memory_panel():
+    """
+    Render the long-term memory switch and a way to make the personas forget the visitor.
+    """
+    with st.expander("🧠 Memory", expanded=False):
+        enabled = st.checkbox(
+            "Let personas remember me",
+            value=st.session_state.memory_enabled,
+            key="memory_enabled_checkbox",
+            help="Personas remember what you told them in earlier conversations.",
+        )
+        if enabled != st.session_state.memory_enabled:
+            set_memory_enabled(enabled)
+        account = get_signed_in_account()
+        if account:
+            st.caption(f"Memories are kept for your account ({account}).")
+        else:
+            st.caption("Memories are kept for this page's link. Bookmark it to come back to them.")
+        
+        owner = get_owner_key()
+        try:
+            store = get_memory_store()
+            count = store.count_memories(owner)
         except Exception as e:
-            st.error(f"Error reading the uploaded file: {e}")
+            st.error(f"Memory store unavailable: {e}")
+            return
+        caption = st.empty()
+        if st.button("🗑️ Forget Me", key="forget_memories_btn", disabled=not count):
+            store.delete_memories(owner)
+            count = 0
+        caption.caption(f"{count} memories kept about you. New ones are added when you leave a chat.")
+
+with st.sidebar:
+    render_memory_panel()
+
+
+@st.fragment
+def render_chat_area(client):
+    """
+    Render the transcript and chat controls as a fragment.
+    
+    New turns rerun only this fragment, so the sidebar panels are not
+    re-executed for every message.
+    """
+    render_source_popover()
+    render_chat_messages()
+    
+    if st.session_state.chat_mode == "Single Persona Chat":
+        handle_chat_interaction(client)
+    elif st.session_state.chat_mode == "Persona Room":
+        handle_persona_room_interaction(client)
 
 if not st.session_state.start_chat:
     if st.session_state.chat_mode == "Single Persona Chat":
@@ -83,14 +266,9 @@ if not st.session_state.start_chat:
         if render_persona_room_setup(client):
             st.rerun()
 else:
-    render_source_popover()
-    render_chat_messages()
-    
-    if st.session_state.chat_mode == "Single Persona Chat":
-        handle_chat_interaction(client)
-    elif st.session_state.chat_mode == "Persona Room":
-        handle_persona_room_interaction(client)
+    render_chat_area(client)
         
     if st.sidebar.button("⬅️ New Chat / Exit Room", key="exit_chat_btn"):
+        remember_conversation(client)
         reset_chat_state()
         st.rerun()
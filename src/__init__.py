@@ -5,3 +5,4 @@ from . import api
 from . import models
 from . import ui
 from . import utils
+from . import batch
@@ -2,3 +2,6 @@
 API package for Talk-To-Anyone application.
 """
 from .config import initialize_api
+from .scheduler import Priority, ApiScheduler, get_scheduler, scheduled_call
+from .singleflight import SingleFlight, get_single_flight, single_flight_stats
+from .model_registry import ModelRegistry, get_model_registry, routed_call
@@ -0,0 +1,290 @@
+"""
+Model registry for Gemini API calls in the Talk-To-Anyone application.
+
+Each stage of the app (persona research, persona synthesis, chat, memory
+extraction, TTS) is routed to its own ordered list of models: the first is
+preferred, the rest are fallbacks. A model that keeps failing with server-side errors is cooled
+down and skipped for a while, and a model that has become much slower than
+another healthy one is tried after it. Per-model stats are kept for the
+developer panel.
+
+Models are configured with GEMINI_MODELS, e.g.
+"research=gemini-2.0-flash-lite,chat=gemini-2.0-flash|gemini-2.0-flash-lite"
+(alternatives separated by "|"), or with a JSON file named by
+GEMINI_MODELS_FILE mapping each stage to a model or a list of models.
+GEMINI_MODELS takes precedence over the file.
+"""
+import os
+import json
+import time
+import threading
+
+import httpx
+
+from .scheduler import is_rate_limit_error, scheduled_call
+
+DEFAULT_STAGE_MODELS = {
+    "research": ["gemini-2.0-flash"],
+    "persona": ["gemini-2.0-flash"],
+    "chat": ["gemini-2.0-flash"],
+    "memory": ["gemini-2.0-flash"],
+    "tts": ["gemini-2.5-flash-preview-tts"],
+}
+FAILURES_BEFORE_COOLDOWN = 2
+COOLDOWN_SECONDS = 60.0
+# A model this many times slower than the fastest healthy one is tried after it
+SLOW_FACTOR = 2.0
+MIN_LATENCY_SAMPLES = 3
+LATENCY_SMOOTHING = 0.2
+
+# HTTP status codes of API errors worth retrying on another model
+FALLBACK_STATUS_CODES = frozenset({404, 429, 500, 502, 503, 504})
+
+
+def is_fallback_error(error):
+    """
+    Check whether an API error is worth retrying on another model.
+
+    Server errors, rate limits, unknown models and timeouts or connection
+    failures are; errors caused by the request itself would fail on every
+    model. API errors are judged by their status code, never by the text of
+    the message.
+
+    Args:
+        error (Exception): The error raised by the Gemini API
+
+    Returns:
+        bool: True if the next model should be tried
+    """
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in FALLBACK_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError)) or is_rate_limit_error(error)
+
+
+def parse_stage_models(spec):
+    """
+    Parse a GEMINI_MODELS value.
+
+    Args:
+        spec (str): Comma-separated "stage=model|fallback" entries
+
+    Returns:
+        dict: stage -> list of models
+    """
+    stage_models = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        stage, _, models = entry.partition("=")
+        stage_models[stage.strip()] = [model.strip() for model in models.split("|") if model.strip()]
+    return stage_models
+
+
+def load_stage_models(path):
+    """
+    Read a GEMINI_MODELS_FILE.
+
+    Args:
+        path (str): JSON file mapping stage -> model or list of models
+
+    Returns:
+        dict: stage -> list of models
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {stage: [models] if isinstance(models, str) else list(models) for stage, models in data.items()}
+
+
+class _ModelStats:
+    __slots__ = ("calls", "errors", "fallbacks", "consecutive_failures", "cooling_until", "latency", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0
+        self.consecutive_failures = 0
+        self.cooling_until = 0.0
+        self.latency = 0.0
+        self.samples = 0
+
+
+class ModelRegistry:
+    """
+    Routes each stage to its models, with error- and latency-aware fallback.
+    """
+
+    def __init__(self, stage_models=None):
+        self._stage_models = {stage: list(models) for stage, models in DEFAULT_STAGE_MODELS.items()}
+        for stage, models in (stage_models or {}).items():
+            if models:
+                self._stage_models[stage] = list(models)
+        self._lock = threading.Lock()
+        self._stats = {
+            (stage, model): _ModelStats()
+            for stage, models in self._stage_models.items() for model in models
+        }
+
+    def primary(self, stage):
+        """
+        Get the configured first-choice model of a stage.
+
+        Args:
+            stage (str): One of the configured stages
+
+        Returns:
+            str: Model name
+        """
+        return self._stage_models[stage][0]
+
+    def candidates(self, stage, now=None):
+        """
+        Get the models to try for a stage, best first.
+
+        Cooling models go last; among the rest, a model much slower than the
+        fastest measured one goes after the others. Otherwise the configured
+        order is kept.
+
+        Args:
+            stage (str): One of the configured stages
+            now (float): time.monotonic(), for tests
+
+        Returns:
+            list: Model names
+        """
+        now = time.monotonic() if now is None else now
+        models = self._stage_models[stage]
+        with self._lock:
+            stats = {model: self._stats[(stage, model)] for model in models}
+            measured = [
+                stats[model].latency for model in models
+                if stats[model].samples >= MIN_LATENCY_SAMPLES and stats[model].cooling_until <= now
+            ]
+            fastest = min(measured) if measured else None
+
+            def rank(item):
+                index, model = item
+                model_stats = stats[model]
+                cooling = model_stats.cooling_until > now
+                slow = (
+                    fastest is not None
+                    and model_stats.samples >= MIN_LATENCY_SAMPLES
+                    and model_stats.latency > SLOW_FACTOR * fastest
+                )
+                return cooling, slow, index
+
+            return [model for _, model in sorted(enumerate(models), key=rank)]
+
+    def record(self, stage, model, latency=None, error=None):
+        """
+        Record the outcome of a call.
+
+        Args:
+            stage (str): Stage of the call
+            model (str): Model that was called
+            latency (float): Seconds taken by a successful call
+            error (Exception): The fallback error of a failed call
+        """
+        with self._lock:
+            stats = self._stats.setdefault((stage, model), _ModelStats())
+            stats.calls += 1
+            if error is None:
+                stats.consecutive_failures = 0
+                stats.latency = latency if not stats.samples else (
+                    LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * stats.latency
+                )
+                stats.samples += 1
+                return
+            stats.errors += 1
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= FAILURES_BEFORE_COOLDOWN:
+                stats.cooling_until = time.monotonic() + COOLDOWN_SECONDS
+
+    def call(self, stage, fn):
+        """
+        Call fn with the best model of a stage, falling back to the next on model errors.
+
+        Args:
+            stage (str): One of the configured stages
+            fn (callable): Called as fn(model) to make the API call
+
+        Returns:
+            The result of fn
+
+        Raises:
+            Exception: An error that is not a fallback error, or the last model's error
+        """
+        models = self.candidates(stage)
+        for attempt, model in enumerate(models):
+            started = time.monotonic()
+            try:
+                result = fn(model)
+            except Exception as e:
+                if not is_fallback_error(e):
+                    raise
+                self.record(stage, model, error=e)
+                if attempt == len(models) - 1:
+                    raise
+                with self._lock:
+                    self._stats[(stage, model)].fallbacks += 1
+                continue
+            self.record(stage, model, latency=time.monotonic() - started)
+            return result
+
+    def stats(self):
+        """
+        Get per-model stats for every stage.
+
+        Returns:
+            dict: stage -> model -> {"calls", "errors", "fallbacks", "avg_latency_ms", "cooling"}
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                stage: {
+                    model: {
+                        "calls": stats.calls,
+                        "errors": stats.errors,
+                        "fallbacks": stats.fallbacks,
+                        "avg_latency_ms": round(1000 * stats.latency, 1),
+                        "cooling": stats.cooling_until > now,
+                    }
+                    for model in models
+                    for stats in (self._stats[(stage, model)],)
+                }
+                for stage, models in self._stage_models.items()
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """
+    Get the process-wide model registry, configured from GEMINI_MODELS_FILE
+    and GEMINI_MODELS on first use.
+
+    Returns:
+        ModelRegistry: The registry
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            stage_models = {}
+            models_file = os.getenv("GEMINI_MODELS_FILE")
+            if models_file:
+                stage_models.update(load_stage_models(models_file))
+            stage_models.update(parse_stage_models(os.getenv("GEMINI_MODELS", "")))
+            _registry = ModelRegistry(stage_models)
+        return _registry
+
+
+def routed_call(stage, route, priority, fn, *args, **kwargs):
+    """
+    Make a models.generate_content-style call with the stage's model, through the scheduler.
+
+    fn is called with model=<model name>; every attempt, including fallbacks,
+    is scheduled on the route like any other call (see scheduled_call).
+    """
+    return get_model_registry().call(
+        stage, lambda model: scheduled_call(route, priority, fn, *args, model=model, **kwargs)
+    )
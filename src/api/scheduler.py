@@ -0,0 +1,329 @@
+"""
+Process-wide scheduler for Gemini API calls in the Talk-To-Anyone application.
+
+Every session of the app shares one API key, so every upstream call goes
+through this scheduler. Each route (chat, research, tts) has a token bucket
+that caps its request rate; waiting calls are served by priority class first
+and round-robin across sessions within a class, so a burst of voice previews
+from one user cannot starve live chat turns of the others. A rate-limit
+error pauses the whole route before the call is retried.
+
+Limits can be overridden with GEMINI_RATE_LIMITS, e.g. "chat=2:6,tts=0.5:2"
+(requests per second : burst size).
+"""
+import os
+import time
+import random
+import threading
+import contextvars
+from enum import IntEnum
+from collections import OrderedDict, deque
+
+# route -> (requests per second, burst size)
+DEFAULT_ROUTE_LIMITS = {
+    "chat": (2.0, 6),
+    "research": (1.0, 4),
+    "tts": (1.0, 4),
+}
+RATE_LIMIT_BASE_DELAY = 2.0
+BACKGROUND_SESSION = "background"
+
+_current_session = contextvars.ContextVar("api_scheduler_session", default=None)
+
+
+class Priority(IntEnum):
+    """Priority classes, lower values are served first."""
+    LIVE_CHAT = 0
+    CURRENT_TTS = 1
+    PERSONA = 2
+    PREVIEW = 3
+
+
+def is_rate_limit_error(error):
+    """
+    Check whether an API error is a rate-limit / quota rejection.
+
+    Args:
+        error (Exception): The error raised by the Gemini API
+
+    Returns:
+        bool: True if the call should be retried after backing off
+    """
+    error_msg = str(error)
+    return (
+        "429" in error_msg
+        or "RESOURCE_EXHAUSTED" in error_msg
+        or "rate limit" in error_msg.lower()
+    )
+
+
+def current_session_key():
+    """
+    Identify the session a call is made for, used for fair queuing.
+
+    Returns:
+        str: The session bound with run_in_session, the Streamlit session ID,
+            or "background" outside of a Streamlit script
+    """
+    session_key = _current_session.get()
+    if session_key:
+        return session_key
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        ctx = None
+    return ctx.session_id if ctx else BACKGROUND_SESSION
+
+
+def run_in_session(session_key, fn, *args, **kwargs):
+    """
+    Call fn with session_key as the current session, e.g. in a worker thread.
+
+    Args:
+        session_key (str): Key from current_session_key in the submitting thread
+        fn (callable): Function to call
+        *args, **kwargs: Arguments for fn
+
+    Returns:
+        The result of fn
+    """
+    token = _current_session.set(session_key)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current_session.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter; not thread-safe, guarded by the scheduler lock.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def try_acquire(self, now):
+        """
+        Take a token if one is available.
+
+        Args:
+            now (float): time.monotonic()
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one will be available
+        """
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds, now):
+        """Stop handing out tokens for the next `seconds`."""
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+
+
+class _Ticket:
+    __slots__ = ("priority", "session_key", "enqueued_at", "granted")
+
+    def __init__(self, priority, session_key, enqueued_at):
+        self.priority = priority
+        self.session_key = session_key
+        self.enqueued_at = enqueued_at
+        self.granted = False
+
+
+class _RouteState:
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst)
+        # priority -> session key -> waiting tickets; sessions rotate after each grant
+        self.queues = {priority: OrderedDict() for priority in Priority}
+        self.depth = 0
+        self.granted = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def push(self, ticket):
+        self.queues[ticket.priority].setdefault(ticket.session_key, deque()).append(ticket)
+        self.depth += 1
+
+    def pop(self):
+        for priority in Priority:
+            sessions = self.queues[priority]
+            if not sessions:
+                continue
+            session_key, tickets = next(iter(sessions.items()))
+            ticket = tickets.popleft()
+            if tickets:
+                sessions.move_to_end(session_key)
+            else:
+                del sessions[session_key]
+            self.depth -= 1
+            return ticket
+        return None
+
+
+def parse_route_limits(spec):
+    """
+    Parse a GEMINI_RATE_LIMITS value.
+
+    Args:
+        spec (str): Comma-separated "route=rate:burst" entries
+
+    Returns:
+        dict: route -> (rate, burst)
+    """
+    limits = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, value = entry.partition("=")
+        rate, _, burst = value.partition(":")
+        limits[route.strip()] = (float(rate), int(burst) if burst else max(1, int(float(rate))))
+    return limits
+
+
+class ApiScheduler:
+    """
+    Rate-limits, prioritizes and fairly orders API calls per route.
+
+    Calls run on the caller's thread once they are granted a token.
+    """
+
+    def __init__(self, route_limits=None):
+        limits = dict(DEFAULT_ROUTE_LIMITS)
+        limits.update(route_limits or {})
+        self._cond = threading.Condition()
+        self._routes = {route: _RouteState(rate, burst) for route, (rate, burst) in limits.items()}
+
+    def _dispatch(self, state, now):
+        """Grant waiting tickets while tokens last; return seconds until the next token."""
+        granted_any = False
+        wait = None
+        while state.depth:
+            wait = state.bucket.try_acquire(now)
+            if wait > 0:
+                break
+            wait = None
+            ticket = state.pop()
+            ticket.granted = True
+            granted_any = True
+            waited = now - ticket.enqueued_at
+            state.granted += 1
+            state.total_wait += waited
+            state.max_wait = max(state.max_wait, waited)
+        if granted_any:
+            self._cond.notify_all()
+        return wait
+
+    def acquire(self, route, priority=Priority.PERSONA, session_key=None):
+        """
+        Block until a call on a route may be made.
+
+        Args:
+            route (str): One of the configured routes
+            priority (Priority): Priority class of the call
+            session_key (str): Session for fair queuing, defaults to current_session_key()
+        """
+        state = self._routes[route]
+        with self._cond:
+            ticket = _Ticket(Priority(priority), session_key or current_session_key(), time.monotonic())
+            state.push(ticket)
+            while not ticket.granted:
+                wait = self._dispatch(state, time.monotonic())
+                if ticket.granted:
+                    break
+                self._cond.wait(timeout=wait)
+
+    def call(self, route, priority, fn, *args, max_attempts=3, **kwargs):
+        """
+        Make an API call through the scheduler.
+
+        Rate-limit errors pause the route for every caller and the call is
+        queued again, up to max_attempts times.
+
+        Args:
+            route (str): One of the configured routes
+            priority (Priority): Priority class of the call
+            fn (callable): The API call
+            *args, **kwargs: Arguments for fn
+            max_attempts (int): Total attempts on rate-limit errors
+
+        Returns:
+            The result of fn
+
+        Raises:
+            Exception: Whatever fn raises, once retries are exhausted
+        """
+        session_key = current_session_key()
+        for attempt in range(max_attempts):
+            self.acquire(route, priority, session_key)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                with self._cond:
+                    state = self._routes[route]
+                    state.rate_limited += 1
+                    state.bucket.pause(
+                        RATE_LIMIT_BASE_DELAY * (2 ** attempt) + random.uniform(0, 1), time.monotonic()
+                    )
+                if attempt == max_attempts - 1:
+                    raise
+
+    def metrics(self):
+        """
+        Get queue depth and wait statistics per route.
+
+        Returns:
+            dict: route -> {"queued": {priority: depth}, "granted", "rate_limited",
+                "avg_wait_ms", "max_wait_ms"}
+        """
+        with self._cond:
+            return {
+                route: {
+                    "queued": {
+                        priority.name.lower(): sum(len(tickets) for tickets in state.queues[priority].values())
+                        for priority in Priority
+                    },
+                    "granted": state.granted,
+                    "rate_limited": state.rate_limited,
+                    "avg_wait_ms": round(1000 * state.total_wait / state.granted, 1) if state.granted else 0.0,
+                    "max_wait_ms": round(1000 * state.max_wait, 1),
+                }
+                for route, state in self._routes.items()
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    Get the process-wide scheduler, configured from GEMINI_RATE_LIMITS on first use.
+
+    Returns:
+        ApiScheduler: The scheduler
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ApiScheduler(parse_route_limits(os.getenv("GEMINI_RATE_LIMITS", "")))
+        return _scheduler
+
+
+def scheduled_call(route, priority, fn, *args, **kwargs):
+    """
+    Make an API call through the process-wide scheduler (see ApiScheduler.call).
+    """
+    return get_scheduler().call(route, priority, fn, *args, **kwargs)
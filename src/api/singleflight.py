@@ -0,0 +1,116 @@
+"""
+Request coalescing for Gemini API calls in the Talk-To-Anyone application.
+
+When several sessions ask for the same thing at once (a class of students
+all creating "Abraham Lincoln", identical voice previews), only the first
+caller makes the upstream call; every concurrent duplicate waits for it and
+gets the same result or the same error. Nothing is kept once the call ends,
+so this never serves stale results.
+"""
+import threading
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one call.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call fn unless a call with the same key is in flight, then wait for that one.
+
+        Args:
+            key: Hashable identity of the request
+            fn (callable): The call to make
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            The result of fn (shared by every coalesced caller)
+
+        Raises:
+            Exception: Whatever fn raised, in every coalesced caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._calls += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        """
+        Get call counts.
+
+        Returns:
+            dict: "calls" made upstream, "coalesced" duplicates, "in_flight" now
+        """
+        with self._lock:
+            return {"calls": self._calls, "coalesced": self._coalesced, "in_flight": len(self._flights)}
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_single_flight(name):
+    """
+    Get the process-wide SingleFlight for a kind of request, creating it on first use.
+
+    Args:
+        name (str): Kind of request, e.g. "persona" or "tts"
+
+    Returns:
+        SingleFlight: The coalescer
+    """
+    with _registry_lock:
+        flight = _registry.get(name)
+        if flight is None:
+            flight = _registry[name] = SingleFlight(name)
+        return flight
+
+
+def single_flight_stats():
+    """
+    Get the stats of every SingleFlight in the process.
+
+    Returns:
+        dict: name -> stats()
+    """
+    with _registry_lock:
+        flights = list(_registry.values())
+    return {flight.name: flight.stats() for flight in flights}
@@ -0,0 +1,5 @@
+"""
+Batch tools for Talk-To-Anyone application.
+
+These run outside the Streamlit app, e.g. `python -m src.batch.pregenerate_personas names.txt`.
+"""
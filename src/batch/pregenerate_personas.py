@@ -0,0 +1,183 @@
+"""
+Bulk persona pre-generation for Talk-To-Anyone application.
+
+Warms the persona pack before traffic peaks (e.g. a classroom event with a
+known character list) by running the research and synthesis steps for every
+name in a list, a few at a time. Each persona is written to the pack as soon
+as it finishes, so an interrupted run picks up where it stopped, and entries
+that are still fresh are skipped.
+
+Usage:
+    python -m src.batch.pregenerate_personas names.txt --workers 4 --max-age-days 30
+"""
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ..api import initialize_api
+from ..models.persona import research_persona, synthesize_persona_description
+from ..models.persona_pack import (
+    PersonaPack, get_persona_pack_path, normalize_persona_name, read_pack_entries, upsert_pack_entry
+)
+from ..models.voice import get_voice_style_suggestions
+
+
+def read_persona_names(path):
+    """
+    Read persona names from a text file, one per line.
+
+    Blank lines and lines starting with '#' are ignored, and names that
+    normalize to the same key are only kept once.
+
+    Args:
+        path (str): Path to the names file, or '-' for stdin
+
+    Returns:
+        list: Persona names in file order
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    names = []
+    seen_keys = set()
+    for line in lines:
+        name = line.strip()
+        if not name or name.startswith("#"):
+            continue
+        key = normalize_persona_name(name)
+        if key and key not in seen_keys:
+            seen_keys.add(key)
+            names.append(name)
+    return names
+
+
+def find_stale_names(names, pack_path, max_age_days):
+    """
+    Filter out personas that already have a fresh entry in the pack, under their name or an alias.
+
+    Args:
+        names (list): Persona names to generate
+        pack_path (Path): Pack file to check
+        max_age_days (float): Entries generated more recently than this are fresh
+
+    Returns:
+        list: The names that still need generating
+
+    Raises:
+        ValueError: If the pack exists but cannot be updated (see upsert_pack_entry)
+    """
+    entries, _ = read_pack_entries(pack_path, strict=True)
+    cutoff = time.time() - max_age_days * 86400
+    fresh = PersonaPack(
+        entry for entry in entries
+        if entry.get("system_prompt") and entry.get("generated_at", 0) >= cutoff
+    )
+    return [name for name in names if fresh.lookup(name, fuzzy=False) is None]
+
+
+def pregenerate_persona(client, persona_name):
+    """
+    Research and synthesize a single persona into a pack entry.
+
+    Rate limits are handled by the API scheduler, which pauses the route for
+    every worker and retries.
+
+    Args:
+        client: The Gemini API client
+        persona_name (str): The persona to generate
+
+    Returns:
+        dict: The pack entry for the persona
+    """
+    research_info = research_persona(client, persona_name)
+    description = synthesize_persona_description(client, persona_name, research_info)
+    if not description:
+        raise ValueError("model returned an empty persona description")
+
+    suggestion = get_voice_style_suggestions(description)
+    return {
+        "name": persona_name,
+        "system_prompt": description,
+        "research_summary": research_info,
+        "voice": suggestion["voice"],
+        "voice_style": suggestion["style"],
+        "generated_at": time.time(),
+    }
+
+
+def run_pregeneration(client, names, pack_path, workers=4, pack_version=None):
+    """
+    Generate personas concurrently and store each one in the pack as it completes.
+
+    Args:
+        client: The Gemini API client
+        names (list): Persona names to generate
+        pack_path (Path): Pack file to write to
+        workers (int): Maximum number of personas generated at once
+        pack_version (str): Optional content version to stamp on the pack
+
+    Returns:
+        tuple: (generated, failed) - lists of persona names
+    """
+    write_lock = threading.Lock()
+    generated, failed = [], []
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(pregenerate_persona, client, name): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                failed.append(name)
+                print(f"[failed] {name}: {e}", file=sys.stderr)
+                continue
+            with write_lock:
+                upsert_pack_entry(entry, pack_version, pack_path)
+            generated.append(name)
+            print(f"[done] {name} ({len(generated) + len(failed)}/{len(names)})")
+
+    return generated, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-generate personas into the persona pack.")
+    parser.add_argument("names_file", help="Text file with one persona name per line ('-' for stdin)")
+    parser.add_argument("--pack", default=None, help="Persona pack to write (defaults to PERSONA_PACK_PATH or the bundled pack)")
+    parser.add_argument("--workers", type=int, default=4, help="Personas generated concurrently")
+    parser.add_argument("--max-age-days", type=float, default=30, help="Skip entries generated more recently than this")
+    parser.add_argument("--pack-version", default=None, help="Content version to stamp on the pack")
+    args = parser.parse_args(argv)
+
+    pack_path = args.pack or get_persona_pack_path()
+    names = read_persona_names(args.names_file)
+    try:
+        pending = find_stale_names(names, pack_path, args.max_age_days)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{len(names)} personas listed, {len(names) - len(pending)} fresh, {len(pending)} to generate")
+    if not pending:
+        return 0
+
+    client, error_message = initialize_api()
+    if error_message:
+        print(error_message, file=sys.stderr)
+        return 1
+
+    _, failed = run_pregeneration(
+        client, pending, pack_path, args.workers, args.pack_version
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
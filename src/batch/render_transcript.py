@@ -0,0 +1,181 @@
+"""
+Offline voicing of exported chats for Talk-To-Anyone application.
+
+Takes a chat export (see export_chat_state) that was recorded with voice
+disabled, synthesizes every persona message that has no audio_data using the
+persona's saved voice and style, and writes an updated export. Optionally the
+whole conversation is also written as one WAV file.
+
+Usage:
+    python -m src.batch.render_transcript chat.json -o chat.voiced.json --wav chat.wav
+"""
+import sys
+import json
+import base64
+import wave
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ..api import initialize_api
+from ..models.voice import synthesize_speech_pcm, create_wave_file_data, read_wave_pcm
+from ..models.audio_processing import postprocess_pcm_chunks
+
+# Pause inserted between turns in the concatenated WAV
+TURN_GAP_SECONDS = 0.4
+SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+
+
+def build_voice_map(chat_data):
+    """
+    Map message roles to the voice settings of the persona that spoke them.
+
+    Args:
+        chat_data (dict): A chat export
+
+    Returns:
+        dict: role -> (voice_name, voice_style)
+    """
+    voice_map = {}
+    for persona in chat_data.get("persona_data", {}).values():
+        if persona and persona.get("name"):
+            voice_map[persona["name"]] = (persona.get("voice") or "Zephyr", persona.get("voice_style") or "")
+    return voice_map
+
+
+def find_unvoiced_messages(chat_data, voice_map):
+    """
+    Find persona messages that still need audio.
+
+    Args:
+        chat_data (dict): A chat export
+        voice_map (dict): Output of build_voice_map
+
+    Returns:
+        list: Indexes into chat_data["messages"]
+    """
+    return [
+        i for i, msg in enumerate(chat_data.get("messages", []))
+        if msg.get("role") in voice_map and msg.get("text") and not msg.get("audio_data")
+    ]
+
+
+def voice_transcript(client, chat_data, workers=4, language_hint=""):
+    """
+    Fill in audio_data for every unvoiced persona message of a chat export.
+
+    The export is updated in place; audio is stored base64-encoded exactly as
+    export_chat_state writes it.
+
+    Args:
+        client: The Gemini API client
+        chat_data (dict): A chat export
+        workers (int): Maximum number of concurrent TTS calls
+        language_hint (str): Optional language hint for every message
+
+    Returns:
+        tuple: (voiced, failed) - counts of messages
+    """
+    voice_map = build_voice_map(chat_data)
+    messages = chat_data.get("messages", [])
+    pending = find_unvoiced_messages(chat_data, voice_map)
+    voiced, failed = 0, 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {}
+        for index in pending:
+            msg = messages[index]
+            voice_name, voice_style = voice_map[msg["role"]]
+            future = executor.submit(
+                synthesize_speech_pcm, client, msg["text"], voice_name, voice_style, language_hint, cache=True
+            )
+            futures[future] = index
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                pcm_data = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[failed] message {index}: {e}", file=sys.stderr)
+                continue
+            if not pcm_data:
+                failed += 1
+                print(f"[failed] message {index}: no audio in response", file=sys.stderr)
+                continue
+            wave_data = create_wave_file_data(postprocess_pcm_chunks([pcm_data]))
+            messages[index]["audio_data"] = base64.b64encode(wave_data).decode("utf-8")
+            voiced += 1
+            print(f"[done] message {index} ({voiced + failed}/{len(pending)})")
+
+    return voiced, failed
+
+
+def write_concatenated_wav(chat_data, output_path, gap_seconds=TURN_GAP_SECONDS):
+    """
+    Write every voiced message of a chat export into a single WAV file.
+
+    Frames are streamed into the file turn by turn, so the full conversation
+    is never held in memory as one buffer.
+
+    Args:
+        chat_data (dict): A chat export with base64 audio_data
+        output_path (str): Where to write the WAV file
+
+    Returns:
+        int: Number of turns written
+    """
+    gap = b"\0" * (int(SAMPLE_RATE * gap_seconds) * SAMPLE_WIDTH)
+    turns = 0
+    with wave.open(output_path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(SAMPLE_RATE)
+        for msg in chat_data.get("messages", []):
+            audio_b64 = msg.get("audio_data")
+            if not audio_b64:
+                continue
+            if turns:
+                wf.writeframes(gap)
+            wf.writeframes(read_wave_pcm(base64.b64decode(audio_b64)))
+            turns += 1
+    return turns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Voice every unvoiced persona message of a chat export.")
+    parser.add_argument("export_file", help="Chat export JSON downloaded from the app")
+    parser.add_argument("-o", "--output", default=None, help="Updated export to write (defaults to <export>.voiced.json)")
+    parser.add_argument("--wav", default=None, help="Also write the whole conversation as one WAV file")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent TTS calls")
+    parser.add_argument("--language", default="", help="Language hint, e.g. 'French (France)'")
+    args = parser.parse_args(argv)
+
+    with open(args.export_file, "r", encoding="utf-8") as f:
+        chat_data = json.load(f)
+
+    failed = 0
+    if find_unvoiced_messages(chat_data, build_voice_map(chat_data)):
+        client, error_message = initialize_api()
+        if error_message:
+            print(error_message, file=sys.stderr)
+            return 1
+        _, failed = voice_transcript(client, chat_data, args.workers, args.language)
+
+    output_path = args.output
+    if not output_path:
+        base = args.export_file[:-5] if args.export_file.endswith(".json") else args.export_file
+        output_path = f"{base}.voiced.json"
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(chat_data, f)
+    print(f"Wrote {output_path}")
+
+    if args.wav:
+        turns = write_concatenated_wav(chat_data, args.wav)
+        print(f"Wrote {args.wav} ({turns} turns)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
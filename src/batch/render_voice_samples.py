@@ -0,0 +1,85 @@
+"""
+Voice sample bank renderer for Talk-To-Anyone application.
+
+Renders the default preview sentence for every voice in VOICE_OPTIONS and
+every language in SUPPORTED_LANGUAGES into the sample bank, so voice previews
+in the app are served from disk. Samples already in the bank are skipped, so
+the job can be re-run after an interruption.
+
+Usage:
+    python -m src.batch.render_voice_samples --workers 4 --language "English (US)"
+"""
+import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ..api import initialize_api
+from ..models.voice import SUPPORTED_LANGUAGES
+from ..models.voice_samples import (
+    get_sample_bank_dir, missing_voice_samples, render_voice_sample, store_voice_sample
+)
+
+
+def render_sample_bank(client, pending, bank_dir, workers=4):
+    """
+    Render missing samples concurrently, storing each one as it completes.
+
+    Args:
+        client: The Gemini API client
+        pending (list): (voice_name, language_name) tuples to render
+        bank_dir (Path): Sample bank directory
+        workers (int): Maximum number of concurrent TTS calls
+
+    Returns:
+        int: Number of samples that could not be rendered
+    """
+    failed = 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(render_voice_sample, client, voice_name, language_name): (voice_name, language_name)
+            for voice_name, language_name in pending
+        }
+        for future in as_completed(futures):
+            voice_name, language_name = futures[future]
+            try:
+                samples = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[failed] {voice_name} / {language_name}: {e}", file=sys.stderr)
+                continue
+            if samples is None:
+                failed += 1
+                print(f"[failed] {voice_name} / {language_name}: no audio in response", file=sys.stderr)
+                continue
+            store_voice_sample(voice_name, language_name, samples, bank_dir)
+            done += 1
+            print(f"[done] {voice_name} / {language_name} ({done + failed}/{len(pending)})")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the voice preview sample bank.")
+    parser.add_argument("--language", action="append", choices=list(SUPPORTED_LANGUAGES),
+                        help="Only render this language (repeatable); defaults to all languages")
+    parser.add_argument("--bank-dir", default=None, help="Sample bank directory (defaults to VOICE_SAMPLE_DIR or .cache/voice_samples)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent TTS calls")
+    args = parser.parse_args(argv)
+
+    bank_dir = args.bank_dir or get_sample_bank_dir()
+    pending = missing_voice_samples(args.language, bank_dir)
+    print(f"{len(pending)} samples to render into {bank_dir}")
+    if not pending:
+        return 0
+
+    client, error_message = initialize_api()
+    if error_message:
+        print(error_message, file=sys.stderr)
+        return 1
+
+    failed = render_sample_bank(client, pending, bank_dir, args.workers)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,32 @@
 """
 Models package for Talk-To-Anyone application.
 """
-from .persona import generate_persona_description_from_name
-from .chat import initialize_chat_session, extract_sources_from_response
+from .persona import (
+    generate_persona_description_from_name,
+    resolve_persona_description,
+    resolve_persona,
+    generate_persona_description,
+    research_persona,
+    synthesize_persona_description
+)
+from .persona_pack import lookup_persona, normalize_persona_name
+from .chat import (
+    initialize_chat_session,
+    fork_chat_session,
+    send_chat_message,
+    serialize_chat_history,
+    extract_sources_from_response
+)
+from .grounding import needs_grounding, grounding_stats
+from .memory import extract_memories, format_memory_transcript
 from .voice import (
     VOICE_OPTIONS, 
+    VOICE_CATALOG,
     generate_single_voice_audio, 
+    synthesize_speech_audio,
+    synthesize_speech_pcm,
     generate_multi_voice_audio, 
     get_voice_style_suggestions,
-    create_speaker_config
+    create_speaker_config,
+    render_room_podcast
 )
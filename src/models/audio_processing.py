@@ -0,0 +1,140 @@
+"""
+Post-processing of TTS audio for Talk-To-Anyone application.
+
+Gemini TTS returns 16-bit mono PCM that often carries leading and trailing
+silence, and loudness differs noticeably between voices. These helpers trim
+the silence and bring every clip to the same loudness using NumPy array
+operations over the int16 samples.
+"""
+import numpy as np
+
+SAMPLE_RATE = 24000
+SILENCE_THRESHOLD_DBFS = -45.0
+SILENCE_FRAME_MS = 10
+# Silence kept around speech so words are not clipped and chunks do not run together
+SILENCE_PADDING_MS = 80
+TARGET_RMS_DBFS = -20.0
+PEAK_CEILING_DBFS = -1.0
+
+_FULL_SCALE = 32768.0
+
+
+def _dbfs_to_amplitude(dbfs):
+    return _FULL_SCALE * (10.0 ** (dbfs / 20.0))
+
+
+def pcm_to_samples(pcm_data):
+    """
+    View raw 16-bit little-endian PCM as an int16 sample array without copying.
+
+    Args:
+        pcm_data: Bytes-like PCM data
+
+    Returns:
+        numpy.ndarray: The samples
+    """
+    usable = len(pcm_data) - len(pcm_data) % 2
+    return np.frombuffer(pcm_data, dtype="<i2", count=usable // 2)
+
+
+def trim_silence(samples, rate=SAMPLE_RATE, threshold_dbfs=SILENCE_THRESHOLD_DBFS,
+                 frame_ms=SILENCE_FRAME_MS, padding_ms=SILENCE_PADDING_MS):
+    """
+    Drop leading and trailing silence from a clip.
+
+    The clip is cut into short frames and the per-frame RMS is computed in
+    one vectorized pass; everything before the first and after the last
+    frame above the threshold is removed, keeping a little padding.
+
+    Args:
+        samples (numpy.ndarray): int16 samples
+        rate (int): Sample rate
+        threshold_dbfs (float): Frames quieter than this count as silence
+        frame_ms (int): Analysis frame length
+        padding_ms (int): Silence kept on each side of the speech
+
+    Returns:
+        numpy.ndarray: A view of the trimmed samples (unchanged if the clip is all silence)
+    """
+    frame_len = max(1, rate * frame_ms // 1000)
+    frame_count = len(samples) // frame_len
+    if frame_count == 0:
+        return samples
+
+    frames = samples[:frame_count * frame_len].reshape(frame_count, frame_len).astype(np.float32)
+    frame_rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    voiced = np.flatnonzero(frame_rms > _dbfs_to_amplitude(threshold_dbfs))
+    if voiced.size == 0:
+        return samples
+
+    padding = rate * padding_ms // 1000
+    start = max(0, voiced[0] * frame_len - padding)
+    stop = min(len(samples), (voiced[-1] + 1) * frame_len + padding)
+    return samples[start:stop]
+
+
+def loudness_gain(sample_arrays, target_rms_dbfs=TARGET_RMS_DBFS, peak_ceiling_dbfs=PEAK_CEILING_DBFS):
+    """
+    Compute one gain that brings a set of clips to the target RMS loudness.
+
+    The gain is capped so that the loudest sample stays below the peak ceiling.
+
+    Args:
+        sample_arrays (list): int16 sample arrays that are played together
+        target_rms_dbfs (float): Desired RMS level
+        peak_ceiling_dbfs (float): Maximum peak level after gain
+
+    Returns:
+        float: The linear gain (1.0 for silent input)
+    """
+    total_energy = 0.0
+    total_count = 0
+    peak = 0
+    for samples in sample_arrays:
+        if samples.size == 0:
+            continue
+        as_float = samples.astype(np.float32)
+        total_energy += float(np.dot(as_float, as_float))
+        total_count += samples.size
+        peak = max(peak, int(np.max(np.abs(samples.astype(np.int32)))))
+
+    if total_count == 0 or peak == 0:
+        return 1.0
+
+    rms = (total_energy / total_count) ** 0.5
+    gain = _dbfs_to_amplitude(target_rms_dbfs) / rms
+    return min(gain, _dbfs_to_amplitude(peak_ceiling_dbfs) / peak)
+
+
+def apply_gain(samples, gain):
+    """
+    Scale int16 samples, rounding and clipping back to the int16 range.
+
+    Args:
+        samples (numpy.ndarray): int16 samples
+        gain (float): Linear gain
+
+    Returns:
+        numpy.ndarray: New int16 samples
+    """
+    scaled = np.rint(samples.astype(np.float32) * gain)
+    return np.clip(scaled, -32768, 32767).astype("<i2")
+
+
+def postprocess_pcm_chunks(pcm_chunks, rate=SAMPLE_RATE):
+    """
+    Trim silence from each chunk and normalize the chunks to a common loudness.
+
+    Chunks that are played back to back (parts of one long reply, podcast
+    segments) share a single gain so their relative levels are preserved.
+
+    Args:
+        pcm_chunks (list): Raw PCM chunks from the TTS model
+        rate (int): Sample rate
+
+    Returns:
+        list: int16 sample arrays, ready for create_wave_file_data
+    """
+    trimmed = [trim_silence(pcm_to_samples(chunk), rate) for chunk in pcm_chunks]
+    gain = loudness_gain(trimmed)
+    return [apply_gain(samples, gain) for samples in trimmed]
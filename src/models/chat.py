@@ -1,29 +1,109 @@
 """
 Chat session management for Talk-To-Anyone application.
 """
+import weakref
 import streamlit as st
 from google.genai import types
+from ..api.scheduler import Priority, scheduled_call
+from ..api.model_registry import get_model_registry, routed_call
+from .grounding import (
+    needs_grounding,
+    record_turn,
+    grounding_cache_key,
+    get_cached_grounding,
+    store_cached_grounding,
+    format_grounding_facts,
+    MAX_FACTS_CHARS
+)
+from .research_index import BM25Index, format_research_facts
 
-def initialize_chat_session(client, persona_description):
+# Chat session -> (chat config, the same with the search tool, persona description, memory, research index)
+_turn_configs = weakref.WeakKeyDictionary()
+
+
+class RoutedChat:
+    """
+    A chat session on the model registry's "chat" models.
+    
+    The SDK binds a chat to one model, so a turn sent to another model (a
+    fallback, or the preferred model again once it recovers) moves the
+    conversation to a new SDK chat on that model with the same history.
+    """
+
+    def __init__(self, client, config, history, model):
+        self.client = client
+        self._config = config
+        self.model = model
+        self._chat = client.chats.create(model=model, config=config, history=history)
+
+    def chat_for(self, model):
+        """
+        Get the SDK chat on a model, moving the conversation there if needed.
+        
+        Args:
+            model (str): Model name
+            
+        Returns:
+            The SDK chat session
+        """
+        if model != self.model:
+            self._chat = self.client.chats.create(
+                model=model, config=self._config, history=self._chat.get_history()
+            )
+            self.model = model
+        return self._chat
+
+    def send_message(self, message, config=None):
+        return self._chat.send_message(message, config=config)
+
+    def get_history(self):
+        return self._chat.get_history()
+
+
+def _send(chat_session, priority, message, config=None):
+    """Send a turn through the scheduler, on the best chat model for a RoutedChat."""
+    if not isinstance(chat_session, RoutedChat):
+        return scheduled_call("chat", priority, chat_session.send_message, message, config=config)
+    return get_model_registry().call(
+        "chat",
+        lambda model: scheduled_call(
+            "chat", priority, chat_session.chat_for(model).send_message, message, config=config
+        ),
+    )
+
+def initialize_chat_session(client, persona_description, history=None, memory=None, research=None):
     """
     Initialize a chat session with the given persona description.
     
+    The session has no tools; send_chat_message adds Google Search, relevant
+    research passages and what the persona remembers about the user per turn.
+    
     Args:
         client: The Gemini API client
         persona_description (str): The system prompt for the persona
+        history (list): Optional serialized history (see serialize_chat_history) to continue from
+        memory (PersonaMemory): Optional long-term memory of the user (see utils.memory_store)
+        research (list): Optional research passages saved with the conversation, used
+            instead of the persona's stored research
         
     Returns:
-        object: The chat session object, or None if an error occurred
+        RoutedChat: The chat session, or None if an error occurred
     """
     try:
+        config = types.GenerateContentConfig(
+            system_instruction=persona_description,
+            response_modalities=["TEXT"],
+        )
+        chat_session = RoutedChat(
+            client,
+            config,
+            [types.Content.model_validate(content) for content in history or []],
+            get_model_registry().candidates("chat")[0],
+        )
         google_search_tool = types.Tool(google_search=types.GoogleSearch())
-        chat_session = client.chats.create(
-            model="gemini-2.0-flash",
-            config=types.GenerateContentConfig(
-                system_instruction=persona_description,
-                tools=[google_search_tool],
-                response_modalities=["TEXT"],
-            ),
+        _turn_configs[chat_session] = (
+            config, config.model_copy(update={"tools": [google_search_tool]}), persona_description, memory,
+            BM25Index(research) if research else None,
         )
         return chat_session
     except Exception as e:
@@ -35,6 +115,165 @@ def initialize_chat_session(client, persona_description):
         return None
 
 
+def fork_chat_session(chat_session):
+    """
+    Copy a chat session, so a turn can be sent speculatively without touching the original.
+    
+    Args:
+        chat_session: A chat session from initialize_chat_session
+        
+    Returns:
+        RoutedChat: A new session with the same persona, history and memory, or None if an error occurred
+    """
+    turn_configs = _turn_configs.get(chat_session)
+    if turn_configs is None:
+        return None
+    _, _, persona_description, memory, research = turn_configs
+    return initialize_chat_session(
+        chat_session.client, persona_description, serialize_chat_history(chat_session), memory=memory,
+        research=research.passages if research else None,
+    )
+
+
+def _turn_instruction(persona_description, memory, research, message, grounding_facts=None):
+    """Build the system instruction of a turn, or None if it adds nothing to the persona's own."""
+    blocks = [format_research_facts(persona_description, message, index=research)]
+    if memory is not None:
+        blocks.append(memory.recall(message))
+    if grounding_facts:
+        blocks.append(format_grounding_facts(grounding_facts))
+    blocks = [block for block in blocks if block]
+    if not blocks:
+        return None
+    return "\n\n".join([persona_description] + blocks)
+
+
+def _retrieve_facts(client, persona_description, message, priority):
+    """
+    Look up the facts a turn needs with a search-grounded call of their own.
+
+    Returns:
+        dict: "facts" and "sources" (see get_cached_grounding), or None if the search found nothing or failed
+    """
+    try:
+        response = routed_call(
+            "chat", "chat", priority, client.models.generate_content,
+            contents=[f"""
+            The message below is addressed to this persona:
+            {persona_description}
+
+            Search the web for the facts needed to answer it. List them as short plain sentences
+            with names, dates and numbers. Do not answer the message and do not play the persona.
+
+            MESSAGE:
+            {message}
+            """],
+            config=types.GenerateContentConfig(
+                tools=[types.Tool(google_search=types.GoogleSearch())],
+                response_modalities=["TEXT"],
+            ),
+        )
+    except Exception:
+        # The turn can still search for itself
+        return None
+    facts = (getattr(response, "text", None) or "").strip()
+    if not facts:
+        return None
+    return {"facts": facts[:MAX_FACTS_CHARS], "sources": extract_sources_from_response(response)}
+
+
+def _sources_metadata(sources):
+    """Build grounding metadata that lists the sources of retrieved facts."""
+    return types.GroundingMetadata(grounding_chunks=[
+        types.GroundingChunk(web=types.GroundingChunkWeb(uri=source["uri"], title=source.get("title")))
+        for source in sources if source.get("uri")
+    ])
+
+
+def _with_instruction(config, system_instruction):
+    if system_instruction is None:
+        return config
+    return config.model_copy(update={"system_instruction": system_instruction})
+
+
+def send_chat_message(chat_session, message, priority=Priority.LIVE_CHAT, grounding=None):
+    """
+    Send a chat turn through the API scheduler, by default at the highest priority.
+    
+    The persona's research passages relevant to the message, and what it
+    remembers about the user, are added to the system instruction of this turn
+    only, so they never pile up in the history.
+    
+    The turn is grounded with Google Search only if the grounding policy asks
+    for it. A grounded turn gets its facts from a separate search-grounded
+    call, or from the cache when the same persona was asked the same thing
+    recently, and they go into the system instruction like the research facts;
+    the message itself is sent unchanged. The sources of the facts are put on
+    the response, so extract_sources_from_response works either way. If the
+    search finds nothing, the turn is sent with the search tool instead.
+    
+    Args:
+        chat_session: A chat session from initialize_chat_session
+        message (str): The message to send
+        priority (Priority): Scheduler priority, lower for speculative turns
+        grounding (bool): Force grounding on or off, None to let needs_grounding decide
+        
+    Returns:
+        The Gemini API response
+        
+    Raises:
+        Exception: Any error raised by the Gemini API
+    """
+    turn_configs = _turn_configs.get(chat_session)
+    if turn_configs is None:
+        record_turn(False)
+        return _send(chat_session, priority, message)
+
+    config, grounded_config, persona_description, memory, research = turn_configs
+    if grounding is None:
+        grounding = needs_grounding(message)
+    if not grounding:
+        record_turn(False)
+        system_instruction = _turn_instruction(persona_description, memory, research, message)
+        return _send(chat_session, priority, message, config=_with_instruction(config, system_instruction))
+
+    cache_key = grounding_cache_key(persona_description, message)
+    retrieved = get_cached_grounding(cache_key)
+    cache_hit = retrieved is not None
+    if not cache_hit:
+        retrieved = _retrieve_facts(chat_session.client, persona_description, message, priority)
+        if retrieved:
+            store_cached_grounding(cache_key, retrieved["facts"], retrieved["sources"])
+    record_turn(True, cache_hit=cache_hit)
+    if retrieved is None:
+        system_instruction = _turn_instruction(persona_description, memory, research, message)
+        return _send(
+            chat_session, priority, message, config=_with_instruction(grounded_config, system_instruction)
+        )
+
+    system_instruction = _turn_instruction(persona_description, memory, research, message, retrieved["facts"])
+    response = _send(chat_session, priority, message, config=_with_instruction(config, system_instruction))
+    if response and response.candidates:
+        response.candidates[0].grounding_metadata = _sources_metadata(retrieved["sources"])
+    return response
+
+
+def serialize_chat_history(chat_session):
+    """
+    Convert the history of a chat session to JSON-serializable dicts.
+    
+    Args:
+        chat_session: A chat session from initialize_chat_session
+        
+    Returns:
+        list: One dict per Content, accepted by initialize_chat_session(history=...)
+    """
+    return [
+        content.model_dump(mode="json", exclude_none=True)
+        for content in chat_session.get_history()
+    ]
+
+
 def extract_sources_from_response(response):
     """
     Extract source references from a Gemini API response.
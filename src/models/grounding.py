@@ -0,0 +1,205 @@
+"""
+Per-turn search grounding policy for Talk-To-Anyone application.
+
+Chats are created without the Google Search tool; each turn is grounded only
+when a cheap local heuristic says it asks for facts (names, dates, numbers,
+recent events), so small talk runs at ungrounded latency. A grounded turn
+first retrieves the facts it needs with a separate search-grounded call (see
+models.chat); the facts and their source links are cached on disk by persona
+and query, and go into the turn's system instruction. When a session asks
+the same persona the same thing again, the cached facts are used without
+searching.
+
+GROUNDING_MODE selects "auto" (default), "always" or "never".
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "grounding"
+DEFAULT_CACHE_TTL_HOURS = 24
+MAX_FACTS_CHARS = 4000
+
+_SMALL_TALK = re.compile(
+    r"^\W*(?:thanks?|thank you|thx|ok(?:ay)?|cool|great|nice|wow|lol|haha|yes|yeah|yep|no|nope|sure|"
+    r"hi|hello|hey|bye|goodbye|good (?:morning|afternoon|evening|night)|see you)\b",
+    re.IGNORECASE,
+)
+_FACT_CUES = re.compile(
+    r"\b(?:who|when|where|which|how (?:many|much|old|long|far|big)|latest|recent(?:ly)?|current(?:ly)?|"
+    r"today|news|nowadays|this year|last year|statistics?|population|price|cost|according to|"
+    r"sources?|evidence|stud(?:y|ies)|happened|died|born|founded|invent(?:ed|ion)?|discover(?:ed|y)?)\b",
+    re.IGNORECASE,
+)
+_NUMBER = re.compile(r"\b\d[\d,.]*\b")
+_WORD = re.compile(r"[\w'-]+")
+_SENTENCE_START = re.compile(r"(?:^|[.!?]\s+)([\w'-]+)")
+
+_stats_lock = threading.Lock()
+_stats = {"grounded": 0, "ungrounded": 0, "cache_hits": 0}
+
+
+def get_grounding_mode():
+    """
+    Get the grounding mode.
+
+    Returns:
+        str: GROUNDING_MODE from the environment ("auto", "always" or "never"), default "auto"
+    """
+    mode = os.getenv("GROUNDING_MODE", "auto").lower()
+    return mode if mode in ("auto", "always", "never") else "auto"
+
+
+def needs_grounding(message):
+    """
+    Decide whether a chat turn should be grounded with Google Search.
+
+    Small talk and short replies are never grounded. Messages with factual
+    cues (question words about facts, recency, numbers) are, as are questions
+    naming something (a capitalized word not starting a sentence).
+
+    Args:
+        message (str): The message sent to the persona
+
+    Returns:
+        bool: True if the turn should search
+    """
+    mode = get_grounding_mode()
+    if mode != "auto":
+        return mode == "always"
+
+    words = _WORD.findall(message)
+    if len(words) <= 3 and "?" not in message:
+        return False
+    if _SMALL_TALK.match(message) and len(words) <= 8:
+        return False
+    if _FACT_CUES.search(message) or _NUMBER.search(message):
+        return True
+    sentence_starts = set(_SENTENCE_START.findall(message))
+    proper_nouns = [
+        word for word in words
+        if word[:1].isupper() and word not in sentence_starts and word != "I"
+    ]
+    return "?" in message and bool(proper_nouns)
+
+
+def record_turn(grounded, cache_hit=False):
+    """
+    Count a chat turn for grounding_stats.
+
+    Args:
+        grounded (bool): Whether the turn used search results (live or cached)
+        cache_hit (bool): Whether the search results came from the cache
+    """
+    with _stats_lock:
+        _stats["grounded" if grounded else "ungrounded"] += 1
+        if cache_hit:
+            _stats["cache_hits"] += 1
+
+
+def grounding_stats():
+    """
+    Get grounding counts for this process.
+
+    Returns:
+        dict: "grounded" turns (live searches and cache hits), "ungrounded" turns, "cache_hits"
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def get_grounding_cache_dir():
+    """
+    Get the grounding cache directory.
+
+    Returns:
+        Path: GROUNDING_CACHE_DIR from the environment, or .cache/grounding in the project root
+    """
+    return Path(os.getenv("GROUNDING_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def grounding_cache_key(persona_description, message):
+    """
+    Build the cache key for a grounded turn.
+
+    Args:
+        persona_description (str): The persona's system prompt, identifying the persona
+        message (str): The message sent to the persona
+
+    Returns:
+        str: Hex digest of the persona and the normalized query
+    """
+    query = " ".join(_WORD.findall(message.lower()))
+    digest = hashlib.sha256()
+    for part in (persona_description or "", query):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_path(key):
+    return get_grounding_cache_dir() / key[:2] / f"{key}.json"
+
+
+def get_cached_grounding(key):
+    """
+    Read the cached facts of a query, if they are fresh.
+
+    GROUNDING_CACHE_TTL_HOURS sets how long retrieved facts are reused.
+
+    Args:
+        key (str): Key from grounding_cache_key
+
+    Returns:
+        dict: "facts" (text) and "sources" (dicts with uri and title), or None on a miss
+    """
+    ttl = float(os.getenv("GROUNDING_CACHE_TTL_HOURS", DEFAULT_CACHE_TTL_HOURS)) * 3600
+    try:
+        with open(_cache_path(key), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("stored_at", 0) > ttl:
+        return None
+    if not entry.get("facts"):
+        return None
+    return {"facts": entry["facts"], "sources": entry.get("sources") or []}
+
+
+def store_cached_grounding(key, facts, sources):
+    """
+    Store the facts retrieved for a query, replacing the file atomically.
+
+    Args:
+        key (str): Key from grounding_cache_key
+        facts (str): The retrieved facts
+        sources (list): Their sources, dicts with uri and title
+    """
+    path = _cache_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"stored_at": time.time(), "facts": facts, "sources": sources}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimisation only; a read-only disk must not break chat
+        pass
+
+
+def format_grounding_facts(facts):
+    """
+    Wrap retrieved facts for the system instruction of a turn sent without the search tool.
+
+    Args:
+        facts (str): Facts from a search-grounded retrieval call or the cache
+
+    Returns:
+        str: The search results block
+    """
+    return f"SEARCH RESULTS YOU MAY DRAW ON:\n{facts[:MAX_FACTS_CHARS]}"
+
@@ -0,0 +1,69 @@
+"""
+Memory extraction for Talk-To-Anyone application.
+
+Turns a finished conversation into a few short facts about the user that
+the persona should remember next time (see utils.memory_store).
+"""
+import json
+from google.genai import types
+from ..api.scheduler import Priority
+from ..api.model_registry import routed_call
+
+MAX_MEMORIES_PER_CONVERSATION = 8
+# Most recent transcript kept for extraction
+MAX_TRANSCRIPT_CHARS = 12000
+
+
+def format_memory_transcript(messages):
+    """
+    Format chat messages as a plain transcript for memory extraction.
+
+    Args:
+        messages (list): Message dicts with 'role' and 'text'
+
+    Returns:
+        str: "Speaker: text" lines, cut to the most recent MAX_TRANSCRIPT_CHARS
+    """
+    transcript = "\n".join(f"{msg['role']}: {msg['text']}" for msg in messages if msg.get("text"))
+    return transcript[-MAX_TRANSCRIPT_CHARS:]
+
+
+def extract_memories(client, persona_name, transcript):
+    """
+    Extract durable facts about the user from a conversation with a persona.
+
+    Args:
+        client: The Gemini API client
+        persona_name (str): The persona who should remember them
+        transcript (str): Output of format_memory_transcript
+
+    Returns:
+        list: Short standalone sentences about the user (may be empty)
+
+    Raises:
+        Exception: Any error raised by the Gemini API
+    """
+    response = routed_call(
+        "memory", "research", Priority.PERSONA, client.models.generate_content,
+        contents=[f"""
+        Below is a conversation between a user ("User") and {persona_name}.
+        List up to {MAX_MEMORIES_PER_CONVERSATION} short facts that {persona_name} should remember about the user
+        for future conversations: their name, background, interests, opinions, goals, questions they cared about,
+        and anything {persona_name} promised them. Write each fact as one standalone sentence about "the user".
+        Leave out small talk and anything only {persona_name} said about themselves.
+        Return a JSON array of strings, or [] if nothing is worth remembering.
+
+        CONVERSATION:
+        {transcript}
+        """],
+        config=types.GenerateContentConfig(response_mime_type="application/json"),
+    )
+    try:
+        memories = json.loads(response.text or "[]")
+    except ValueError:
+        return []
+    if not isinstance(memories, list):
+        return []
+    return [
+        " ".join(memory.split()) for memory in memories if isinstance(memory, str) and memory.strip()
+    ][:MAX_MEMORIES_PER_CONVERSATION]
@@ -0,0 +1,255 @@
+"""
+Prebuilt persona pack for Talk-To-Anyone application.
+
+The pack is a versioned JSON file holding ready-made personas (system prompt,
+research summary and suggested voice) so common personas load without any
+API calls. Lookups go through a normalized-name index that tolerates case,
+punctuation, word order and small typos.
+"""
+import os
+import re
+import json
+import difflib
+import unicodedata
+from pathlib import Path
+
+PACK_FORMAT_VERSION = 1
+DEFAULT_PACK_PATH = Path(__file__).resolve().parents[2] / "data" / "persona_pack.json"
+
+# How close a misspelt name has to be to an indexed one to count as a match
+FUZZY_MATCH_CUTOFF = 0.85
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_pack_cache = {}
+
+
+def normalize_persona_name(name):
+    """
+    Normalize a persona name into an order-independent lookup key.
+    
+    Accents, case and punctuation are dropped and the remaining words are
+    sorted, so "Einstein, Albert" and "albert einstein" share a key.
+    
+    Args:
+        name (str): The persona name as typed by the user
+        
+    Returns:
+        str: The normalized key, or an empty string if nothing is left
+    """
+    if not name:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    tokens = _TOKEN_PATTERN.findall(stripped.lower())
+    return " ".join(sorted(tokens))
+
+
+class PersonaPack:
+    """
+    In-memory view of a persona pack with a normalized-name lookup index.
+    """
+
+    def __init__(self, entries, pack_version=""):
+        self.pack_version = pack_version
+        self.entries = list(entries)
+        self._index = {}
+        for entry in self.entries:
+            for alias in [entry.get("name", "")] + list(entry.get("aliases", [])):
+                key = normalize_persona_name(alias)
+                if key:
+                    self._index.setdefault(key, entry)
+        self._keys = list(self._index)
+        self._tokens = sorted({token for key in self._keys for token in key.split()})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, persona_name, fuzzy=True):
+        """
+        Find the pack entry for a persona name or one of its aliases.
+        
+        Args:
+            persona_name (str): The persona name as typed by the user
+            fuzzy (bool): Also accept a close misspelling
+            
+        Returns:
+            dict: The matching pack entry, or None if the persona is not in the pack
+        """
+        key = normalize_persona_name(persona_name)
+        if not key:
+            return None
+
+        entry = self._index.get(key)
+        if entry is not None or not fuzzy:
+            return entry
+
+        # Correct each word on its own first: keys are sorted, so a typo in a
+        # first letter can move a word and defeat matching the key as a whole
+        corrected_key = " ".join(sorted(self._closest_token(token) for token in key.split()))
+        entry = self._index.get(corrected_key)
+        if entry is not None:
+            return entry
+
+        close_keys = difflib.get_close_matches(key, self._keys, n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        if close_keys:
+            return self._index[close_keys[0]]
+        return None
+
+    def _closest_token(self, token):
+        close_tokens = difflib.get_close_matches(token, self._tokens, n=1, cutoff=FUZZY_MATCH_CUTOFF)
+        return close_tokens[0] if close_tokens else token
+
+
+def get_persona_pack_path():
+    """
+    Get the location of the persona pack file.
+    
+    Returns:
+        Path: PERSONA_PACK_PATH from the environment, or the bundled pack
+    """
+    return Path(os.getenv("PERSONA_PACK_PATH") or DEFAULT_PACK_PATH)
+
+
+def load_persona_pack(path=None):
+    """
+    Load the persona pack from disk, reusing the parsed index until the file changes.
+    
+    Args:
+        path (str or Path): Optional pack location, defaults to get_persona_pack_path()
+        
+    Returns:
+        PersonaPack: The loaded pack (empty if the file is missing or unreadable)
+    """
+    pack_path = Path(path) if path else get_persona_pack_path()
+    try:
+        mtime = pack_path.stat().st_mtime_ns
+    except OSError:
+        return PersonaPack([])
+
+    cached = _pack_cache.get(pack_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(pack_path, "r", encoding="utf-8") as f:
+            raw_pack = json.load(f)
+    except (OSError, ValueError):
+        return PersonaPack([])
+
+    if not isinstance(raw_pack, dict) or raw_pack.get("format_version") != PACK_FORMAT_VERSION:
+        pack = PersonaPack([])
+    else:
+        entries = [entry for entry in raw_pack.get("personas", []) if entry.get("system_prompt")]
+        pack = PersonaPack(entries, raw_pack.get("pack_version", ""))
+
+    _pack_cache[pack_path] = (mtime, pack)
+    return pack
+
+
+def lookup_persona(persona_name, path=None):
+    """
+    Look a persona up in the persona pack.
+    
+    Args:
+        persona_name (str): The persona name as typed by the user
+        path (str or Path): Optional pack location
+        
+    Returns:
+        dict: The pack entry with 'system_prompt', 'research_summary', 'voice'
+              and 'voice_style', or None if the persona is not in the pack
+    """
+    return load_persona_pack(path).lookup(persona_name)
+
+
+def read_pack_entries(path=None, strict=False):
+    """
+    Read the raw persona entries from a pack file for editing.
+    
+    Args:
+        path (str or Path): Optional pack location
+        strict (bool): Raise instead of returning no entries for an unreadable or incompatible pack
+        
+    Returns:
+        tuple: (entries, pack_version) - entries is empty for a missing or incompatible pack
+        
+    Raises:
+        ValueError: With strict, if the pack exists but cannot be read or has another format version
+    """
+    pack_path = Path(path) if path else get_persona_pack_path()
+    try:
+        with open(pack_path, "r", encoding="utf-8") as f:
+            raw_pack = json.load(f)
+    except FileNotFoundError:
+        return [], ""
+    except (OSError, ValueError) as e:
+        if strict:
+            raise ValueError(f"Cannot read persona pack {pack_path}: {e}") from e
+        return [], ""
+    if not isinstance(raw_pack, dict):
+        if strict:
+            raise ValueError(f"Persona pack {pack_path} is not a JSON object")
+        return [], ""
+    format_version = raw_pack.get("format_version")
+    if format_version != PACK_FORMAT_VERSION:
+        if strict:
+            raise ValueError(
+                f"Persona pack {pack_path} has format version {format_version!r}, "
+                f"expected {PACK_FORMAT_VERSION}"
+            )
+        return [], ""
+    return list(raw_pack.get("personas", [])), raw_pack.get("pack_version", "")
+
+
+def write_pack_entries(entries, pack_version, path=None):
+    """
+    Atomically write persona entries to a pack file.
+    
+    The pack is written to a temporary file and moved into place, so an
+    interrupted write never leaves a truncated pack behind.
+    
+    Args:
+        entries (list): Persona entries to store
+        pack_version (str): Content version recorded in the pack
+        path (str or Path): Optional pack location
+    """
+    pack_path = Path(path) if path else get_persona_pack_path()
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+    raw_pack = {
+        "format_version": PACK_FORMAT_VERSION,
+        "pack_version": pack_version,
+        "personas": entries,
+    }
+    tmp_path = pack_path.with_name(pack_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(raw_pack, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp_path, pack_path)
+
+
+def upsert_pack_entry(entry, pack_version=None, path=None):
+    """
+    Insert or replace a persona entry in the pack.
+    
+    The entry replaces the one whose name or alias it matches (see
+    PersonaPack.lookup, without fuzzy matching), keeping that entry's name
+    and aliases, so regenerating "Einstein" updates "Albert Einstein". A pack
+    that cannot be read or has another format version is left alone rather
+    than replaced.
+    
+    Args:
+        entry (dict): The persona entry (must contain 'name')
+        pack_version (str): Optional new content version for the pack
+        path (str or Path): Optional pack location
+        
+    Raises:
+        ValueError: If the existing pack is unreadable or has another format version
+    """
+    entries, current_version = read_pack_entries(path, strict=True)
+    existing = PersonaPack(entries).lookup(entry["name"], fuzzy=False)
+    if existing is not None:
+        entry = dict(entry, name=existing.get("name") or entry["name"])
+        if existing.get("aliases") and not entry.get("aliases"):
+            entry["aliases"] = existing["aliases"]
+    entries = [e for e in entries if e is not existing] + [entry]
+    entries.sort(key=lambda e: normalize_persona_name(e.get("name", "")))
+    write_pack_entries(entries, pack_version or current_version, path)
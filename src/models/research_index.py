@@ -0,0 +1,311 @@
+"""
+Local retrieval over persona research for Talk-To-Anyone application.
+
+The research behind a generated persona is split into short passages and
+kept on disk next to the other caches, keyed by the persona's system prompt.
+The system prompt itself stays compact (character, voice, knowledge
+boundaries); on every chat turn an in-process BM25 index picks the few
+passages relevant to the message, and only those are sent with the turn.
+Nothing here makes network calls.
+"""
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+DEFAULT_RESEARCH_DIR = Path(__file__).resolve().parents[2] / ".cache" / "research"
+PASSAGE_MAX_WORDS = 80
+DEFAULT_TOP_K = 3
+# Research passages given to persona synthesis, picked for personality and background
+SYNTHESIS_PASSAGES = 6
+SYNTHESIS_QUERY = (
+    "personality traits character temperament speaking style tone voice quotes phrases mannerisms "
+    "background born childhood life era time period known famous"
+)
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from had has have he her him his how i if "
+    "in into is it its me my no not of on or our she so that the their them then there these they this to "
+    "was we were what when where which who why will with would you your".split()
+)
+
+_INDEX_CACHE_SIZE = 64
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def tokenize(text):
+    """
+    Split text into lowercase index terms, without stopwords and plural "s".
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list: Terms in text order
+    """
+    return [
+        token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+def chunk_research(research_text, max_words=PASSAGE_MAX_WORDS):
+    """
+    Split research text into passages of at most max_words words.
+
+    Paragraphs are kept together when they fit; longer ones are split at
+    sentence boundaries. Repeated passages are only kept once.
+
+    Args:
+        research_text (str): Output of research_persona
+        max_words (int): Passage size limit
+
+    Returns:
+        list: Passages in text order
+    """
+    passages = []
+    seen = set()
+
+    def add(passage):
+        if passage not in seen:
+            seen.add(passage)
+            passages.append(passage)
+
+    for paragraph in _PARAGRAPH_BREAK.split(_LIST_MARKER.sub("", research_text or "")):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        current = []
+        current_words = 0
+        for sentence in _SENTENCE_BOUNDARY.split(paragraph):
+            words = len(sentence.split())
+            if current and current_words + words > max_words:
+                add(" ".join(current))
+                current, current_words = [], 0
+            current.append(sentence)
+            current_words += words
+        if current:
+            add(" ".join(current))
+    return passages
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a list of passages, built in memory.
+    """
+
+    def __init__(self, passages):
+        self.passages = list(passages)
+        self._term_counts = [Counter(tokenize(passage)) for passage in self.passages]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        count = len(self.passages)
+        self._idf = {
+            term: math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query, top_k=DEFAULT_TOP_K):
+        """
+        Find the passages most relevant to a query.
+
+        Args:
+            query (str): Free text, e.g. the user's message
+            top_k (int): Maximum number of passages
+
+        Returns:
+            list: (index, passage) pairs, best first; passages sharing no term with the query are left out
+        """
+        terms = set(tokenize(query)) & self._idf.keys()
+        if not terms:
+            return []
+        scores = []
+        for index, counts in enumerate(self._term_counts):
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[index] / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                frequency = counts.get(term)
+                if frequency:
+                    score += self._idf[term] * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+            if score > 0:
+                scores.append((score, index))
+        scores.sort(key=lambda item: (-item[0], item[1]))
+        return [(index, self.passages[index]) for _, index in scores[:top_k]]
+
+
+def select_synthesis_research(research_text, passages=SYNTHESIS_PASSAGES):
+    """
+    Pick the research passages about who the persona is, for persona synthesis.
+
+    Args:
+        research_text (str): Output of research_persona
+        passages (int): Number of passages to keep
+
+    Returns:
+        str: The chosen passages in their original order, one per paragraph
+    """
+    chunks = chunk_research(research_text)
+    if len(chunks) <= passages:
+        return "\n\n".join(chunks)
+    chosen = {index for index, _ in BM25Index(chunks).search(SYNTHESIS_QUERY, passages)}
+    # Fill up with the opening passages, which usually introduce the persona
+    for index in range(len(chunks)):
+        if len(chosen) >= passages:
+            break
+        chosen.add(index)
+    return "\n\n".join(chunks[index] for index in sorted(chosen))
+
+
+def get_research_dir():
+    """
+    Get the research store directory.
+
+    Returns:
+        Path: RESEARCH_CACHE_DIR from the environment, or .cache/research in the project root
+    """
+    return Path(os.getenv("RESEARCH_CACHE_DIR") or DEFAULT_RESEARCH_DIR)
+
+
+def research_key(persona_description):
+    """
+    Build the store key of a persona's research.
+
+    Args:
+        persona_description (str): The persona's system prompt
+
+    Returns:
+        str: Hex digest of the system prompt
+    """
+    return hashlib.sha256(persona_description.encode("utf-8")).hexdigest()
+
+
+def _research_path(key):
+    return get_research_dir() / key[:2] / f"{key}.json"
+
+
+def _remember_index(key, index):
+    with _index_cache_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        if len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+
+
+def store_research(persona_description, research_text):
+    """
+    Store the research behind a persona, split into passages.
+
+    The store is shared by every session on the host, so only research the
+    app produced itself goes in; passages saved with a conversation stay
+    with that conversation (see format_research_facts).
+
+    Args:
+        persona_description (str): The persona's system prompt
+        research_text (str): Output of research_persona
+    """
+    passages = chunk_research(research_text)
+    if not persona_description or not passages:
+        return
+    key = research_key(persona_description)
+    _remember_index(key, BM25Index(passages))
+    path = _research_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"passages": passages}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The store is an optimisation only; the persona still works from its system prompt
+        pass
+
+
+def get_research_index(persona_description):
+    """
+    Get the BM25 index over a persona's research, memoized per process.
+
+    A miss is not memoized: the research may be stored later, e.g. by
+    another worker on the same host.
+
+    Args:
+        persona_description (str): The persona's system prompt
+
+    Returns:
+        BM25Index: The index, or None if no research was stored for the persona
+    """
+    if not persona_description:
+        return None
+    key = research_key(persona_description)
+    with _index_cache_lock:
+        if key in _index_cache:
+            _index_cache.move_to_end(key)
+            return _index_cache[key]
+    try:
+        with open(_research_path(key), "r", encoding="utf-8") as f:
+            passages = json.load(f).get("passages", [])
+    except (OSError, ValueError):
+        return None
+    if not passages:
+        return None
+    index = BM25Index(passages)
+    _remember_index(key, index)
+    return index
+
+
+def get_research_passages(persona_description):
+    """
+    Get the stored research passages of a persona, to save with a conversation.
+
+    Args:
+        persona_description (str): The persona's system prompt
+
+    Returns:
+        list: The passages, empty if no research was stored for the persona
+    """
+    index = get_research_index(persona_description)
+    return list(index.passages) if index else []
+
+
+def format_research_facts(persona_description, message, top_k=None, index=None):
+    """
+    List the research passages relevant to a message, for the system instruction of a turn.
+
+    RESEARCH_TOP_K sets how many passages are added.
+
+    Args:
+        persona_description (str): The persona's system prompt
+        message (str): The message sent to the persona
+        top_k (int): Maximum number of passages, defaults to RESEARCH_TOP_K
+        index (BM25Index): Optional index over passages saved with the
+            conversation, searched instead of the persona's stored research
+
+    Returns:
+        str: The facts block, or None if there is nothing to add
+    """
+    if index is None:
+        index = get_research_index(persona_description)
+    if not index:
+        return None
+    if top_k is None:
+        top_k = int(os.getenv("RESEARCH_TOP_K", DEFAULT_TOP_K))
+    hits = index.search(message, top_k)
+    if not hits:
+        return None
+    facts = "\n".join(f"- {passage}" for _, passage in hits)
+    return f"FACTS ABOUT YOU RELEVANT TO THIS MESSAGE:\n{facts}"
@@ -0,0 +1,88 @@
+"""
+On-disk TTS cache for Talk-To-Anyone application.
+
+Synthesized speech is stored as raw PCM, keyed by a hash of everything that
+affects the audio (model, voice, style, language and text), so re-voicing the
+same line never pays for a second TTS call.
+"""
+import os
+import hashlib
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "tts"
+
+
+def get_tts_cache_dir():
+    """
+    Get the TTS cache directory.
+
+    Returns:
+        Path: TTS_CACHE_DIR from the environment, or .cache/tts in the project root
+    """
+    return Path(os.getenv("TTS_CACHE_DIR") or DEFAULT_CACHE_DIR)
+
+
+def tts_cache_key(model, text, voice_name, style_prompt="", language_hint=""):
+    """
+    Build the cache key for a single-speaker TTS request.
+
+    Args:
+        model (str): The TTS model that produces (or produced) the audio
+        text (str): Text to convert to speech
+        voice_name (str): Name of the voice
+        style_prompt (str): Optional style instructions
+        language_hint (str): Optional language hint
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    digest = hashlib.sha256()
+    for part in (model, voice_name, style_prompt or "", language_hint or "", text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_path(key, cache_dir=None):
+    base_dir = Path(cache_dir) if cache_dir else get_tts_cache_dir()
+    return base_dir / key[:2] / f"{key}.pcm"
+
+
+def get_cached_pcm(key, cache_dir=None):
+    """
+    Read cached PCM for a request key.
+
+    Args:
+        key (str): Key from tts_cache_key
+        cache_dir (str or Path): Optional cache directory
+
+    Returns:
+        bytes: The cached PCM data, or None on a cache miss
+    """
+    try:
+        with open(_cache_path(key, cache_dir), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def store_cached_pcm(key, pcm_data, cache_dir=None):
+    """
+    Store PCM for a request key, replacing the file atomically.
+
+    Args:
+        key (str): Key from tts_cache_key
+        pcm_data (bytes): PCM data to cache
+        cache_dir (str or Path): Optional cache directory
+    """
+    path = _cache_path(key, cache_dir)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(pcm_data)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is an optimisation only; a read-only disk must not break TTS
+        pass
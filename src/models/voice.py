@@ -2,45 +2,35 @@
 Voice generation functionality for Talk-To-Anyone application using Gemini TTS.
 """
 import streamlit as st
+import re
 import wave
 import io
+import struct
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from google.genai import types
+from .audio_processing import postprocess_pcm_chunks
+from .voice_catalog import VOICE_OPTIONS, VOICE_CATALOG
+from ..api.scheduler import Priority, current_session_key, run_in_session, scheduled_call
+from ..api.model_registry import routed_call, get_model_registry
+from ..api.singleflight import get_single_flight
+from .tts_cache import tts_cache_key, get_cached_pcm, store_cached_pcm
 
-VOICE_OPTIONS = {
-    # Female voices
-    "Zephyr": {"gender": "female", "style": "Bright", "personality": "cheerful, optimistic"},
-    "Kore": {"gender": "female", "style": "Firm", "personality": "strong, commanding"},
-    "Leda": {"gender": "female", "style": "Youthful", "personality": "young, vibrant"},
-    "Aoede": {"gender": "female", "style": "Breezy", "personality": "light, carefree"},
-    "Callirrhoe": {"gender": "female", "style": "Easy-going", "personality": "relaxed, natural"},
-    "Autonoe": {"gender": "female", "style": "Bright", "personality": "lively, spirited"},
-    "Umbriel": {"gender": "female", "style": "Easy-going", "personality": "relaxed, versatile"},
-    "Algieba": {"gender": "female", "style": "Smooth", "personality": "elegant, refined"},
-    "Despina": {"gender": "female", "style": "Smooth", "personality": "graceful, polished"},
-    "Erinome": {"gender": "female", "style": "Clear", "personality": "articulate, precise"},
-    "Laomedeia": {"gender": "female", "style": "Upbeat", "personality": "enthusiastic, positive"},
-    "Schedar": {"gender": "female", "style": "Even", "personality": "balanced, steady"},
-    "Pulcherrima": {"gender": "female", "style": "Forward", "personality": "confident, assertive"},
-    "Achird": {"gender": "female", "style": "Friendly", "personality": "warm, approachable"},
-    "Vindemiatrix": {"gender": "female", "style": "Gentle", "personality": "soft, nurturing"},
-    "Sadachbia": {"gender": "female", "style": "Lively", "personality": "energetic, spirited"},
-    "Sulafat": {"gender": "female", "style": "Warm", "personality": "caring, compassionate"},
-    "Achernar": {"gender": "female", "style": "Soft", "personality": "gentle, calm"},
-    
-    # Male voices
-    "Puck": {"gender": "male", "style": "Upbeat", "personality": "energetic, youthful"},
-    "Charon": {"gender": "male", "style": "Informative", "personality": "knowledgeable, authoritative"},
-    "Fenrir": {"gender": "male", "style": "Excitable", "personality": "enthusiastic, dynamic"},
-    "Orus": {"gender": "male", "style": "Firm", "personality": "strong, decisive"},
-    "Enceladus": {"gender": "male", "style": "Breathy", "personality": "mysterious, soft-spoken"},
-    "Iapetus": {"gender": "male", "style": "Clear", "personality": "articulate, professional"},
-    "Algenib": {"gender": "male", "style": "Gravelly", "personality": "rough, experienced"},
-    "Rasalgethi": {"gender": "male", "style": "Informative", "personality": "scholarly, wise"},
-    "Alnilam": {"gender": "male", "style": "Firm", "personality": "confident, solid"},
-    "Gacrux": {"gender": "male", "style": "Mature", "personality": "wise, experienced"},
-    "Zubenelgenubi": {"gender": "male", "style": "Casual", "personality": "relaxed, friendly"},
-    "Sadaltager": {"gender": "male", "style": "Knowledgeable", "personality": "intelligent, scholarly"}
-}
+WAV_HEADER_SIZE = 44
+
+# Longest transcript packed into a single multi-speaker TTS request
+MULTI_SPEAKER_MAX_CHARS = 3000
+# Speakers Gemini multi-speaker TTS accepts per request
+MULTI_SPEAKER_LIMIT = 2
+
+# Replies longer than this are split and voiced chunk by chunk in parallel
+SINGLE_VOICE_CHUNK_CHARS = 600
+TTS_MAX_WORKERS = 4
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+_tts_executor = ThreadPoolExecutor(max_workers=TTS_MAX_WORKERS, thread_name_prefix="tts")
 
 SUPPORTED_LANGUAGES = {
     "Arabic (Egyptian)": "ar-EG",
@@ -77,111 +67,402 @@ def get_voices_by_gender(gender=None):
         gender (str): 'male', 'female', or None for all voices
         
     Returns:
-        dict: Filtered voice options
+        Mapping: Read-only view of the filtered voice options, cached by the catalog
     """
-    if gender is None:
-        return VOICE_OPTIONS
+    return VOICE_CATALOG.options_view(gender)
+
+def build_wav_header(data_size, channels=1, rate=24000, sample_width=2):
+    """
+    Build the 44-byte RIFF/WAVE header for uncompressed PCM data.
     
-    return {name: info for name, info in VOICE_OPTIONS.items() 
-            if info["gender"] == gender}
+    Args:
+        data_size (int): Size of the PCM payload in bytes
+        channels: Number of audio channels
+        rate: Sample rate
+        sample_width: Sample width in bytes
+        
+    Returns:
+        bytes: The WAV header
+    """
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, rate * block_align, block_align, sample_width * 8,
+        b"data", data_size,
+    )
+
+class AudioBuffer(bytearray):
+    """
+    A complete WAV file (header followed by PCM frames) in one preallocated buffer.
+    
+    The buffer is a bytearray, so it can be stored in messages_display and
+    passed to base64 or Streamlit like the plain bytes it replaces, while the
+    PCM and arbitrary byte ranges are exposed as memoryviews without copying.
+    """
+
+    channels = 1
+    rate = 24000
+    sample_width = 2
+
+    @classmethod
+    def from_pcm(cls, pcm_data, channels=1, rate=24000, sample_width=2):
+        """
+        Assemble a WAV buffer from PCM data with a single copy of the frames.
+        
+        Args:
+            pcm_data: Bytes-like PCM data, or a list of chunks to play in order
+            channels: Number of audio channels
+            rate: Sample rate
+            sample_width: Sample width in bytes
+            
+        Returns:
+            AudioBuffer: The WAV file
+        """
+        pcm_chunks = pcm_data if isinstance(pcm_data, (list, tuple)) else [pcm_data]
+        views = [memoryview(chunk).cast("B") for chunk in pcm_chunks]
+        data_size = sum(view.nbytes for view in views)
+
+        audio = cls(WAV_HEADER_SIZE + data_size)
+        with memoryview(audio) as target:
+            target[:WAV_HEADER_SIZE] = build_wav_header(data_size, channels, rate, sample_width)
+            offset = WAV_HEADER_SIZE
+            for view in views:
+                target[offset:offset + view.nbytes] = view
+                offset += view.nbytes
+        audio.channels = channels
+        audio.rate = rate
+        audio.sample_width = sample_width
+        return audio
+
+    @property
+    def pcm(self):
+        """memoryview: The PCM frames, without the WAV header."""
+        return memoryview(self)[WAV_HEADER_SIZE:]
+
+    @property
+    def duration_seconds(self):
+        """float: Playback length of the audio."""
+        return max(0, len(self) - WAV_HEADER_SIZE) / (self.rate * self.channels * self.sample_width)
+
+    def byte_range(self, start, stop=None):
+        """
+        Get a zero-copy view of part of the WAV file, e.g. for an HTTP range request.
+        
+        Args:
+            start (int): First byte offset
+            stop (int): End offset (exclusive), defaults to the end of the file
+            
+        Returns:
+            memoryview: The requested bytes
+        """
+        return memoryview(self)[start:stop]
+
+    def iter_chunks(self, chunk_size=64 * 1024):
+        """
+        Iterate over the WAV file in zero-copy slices for streaming responses.
+        
+        Args:
+            chunk_size (int): Slice size in bytes
+            
+        Yields:
+            memoryview: Consecutive slices of the file
+        """
+        view = memoryview(self)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset:offset + chunk_size]
 
 def create_wave_file_data(pcm_data, channels=1, rate=24000, sample_width=2):
     """
     Create wave file data in memory from PCM data.
     
     Args:
-        pcm_data: Raw PCM audio data
+        pcm_data: Raw PCM audio data, or a list of PCM chunks to play in order
         channels: Number of audio channels
         rate: Sample rate
         sample_width: Sample width in bytes
         
     Returns:
-        bytes: Wave file data
+        AudioBuffer: Wave file data
     """
-    buffer = io.BytesIO()
-    with wave.open(buffer, "wb") as wf:
-        wf.setnchannels(channels)
-        wf.setsampwidth(sample_width)
-        wf.setframerate(rate)
-        wf.writeframes(pcm_data)
-    return buffer.getvalue()
+    return AudioBuffer.from_pcm(pcm_data, channels, rate, sample_width)
 
-def generate_single_voice_audio(client, text, voice_name, style_prompt="", language_hint=""):
+def build_tts_prompt(text, style_prompt="", language_hint=""):
     """
-    Generate single-speaker audio from text using Gemini TTS.
+    Combine text, style and language hint into a single-speaker TTS prompt.
     
     Args:
-        client: The Gemini API client
         text (str): Text to convert to speech
-        voice_name (str): Name of the voice to use
         style_prompt (str): Optional style instructions
         language_hint (str): Optional language hint for better pronunciation
         
     Returns:
-        bytes: Wave file data, or None if an error occurred
+        str: The prompt sent to the TTS model
     """
-    try:
-        full_prompt = text
-        if style_prompt:
-            full_prompt = f"{style_prompt}: {text}"
+    full_prompt = text
+    if style_prompt:
+        full_prompt = f"{style_prompt}: {text}"
+    
+    if language_hint:
+        full_prompt = f"Speak in {language_hint}. {full_prompt}"
+    return full_prompt
+
+def synthesize_speech_pcm(client, text, voice_name, style_prompt="", language_hint="",
+                          priority=Priority.CURRENT_TTS, cache=False):
+    """
+    Synthesize single-speaker speech and return the raw PCM frames.
+    
+    Unlike generate_single_voice_audio this does not touch the Streamlit UI,
+    so it can run in worker threads and batch jobs. Identical requests that
+    are in flight at the same time share one TTS call.
+    
+    Requests and cached audio are keyed by the model that produces the audio,
+    so a fallback model's audio is never taken for the preferred model's.
+    
+    Args:
+        client: The Gemini API client
+        text (str): Text to convert to speech
+        voice_name (str): Name of the voice to use
+        style_prompt (str): Optional style instructions
+        language_hint (str): Optional language hint for better pronunciation
+        priority (Priority): Scheduler priority, lower for previews
+        cache (bool): Reuse audio from the TTS cache and store new audio there
         
-        if language_hint:
-            full_prompt = f"Speak in {language_hint}. {full_prompt}"
+    Returns:
+        bytes: 16-bit mono 24kHz PCM data, or None if the response had no audio
         
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=full_prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name=voice_name,
-                        )
+    Raises:
+        Exception: Any error raised by the Gemini API
+    """
+    registry = get_model_registry()
+    if cache:
+        for model in registry.candidates("tts"):
+            pcm_data = get_cached_pcm(tts_cache_key(model, text, voice_name, style_prompt, language_hint))
+            if pcm_data is not None:
+                return pcm_data
+
+    def synthesize_on(model):
+        key = tts_cache_key(model, text, voice_name, style_prompt, language_hint)
+        pcm_data = get_single_flight("tts").do(
+            key, _request_speech_pcm, client, model, text, voice_name, style_prompt, language_hint, priority
+        )
+        if cache and pcm_data:
+            store_cached_pcm(key, pcm_data)
+        return pcm_data
+
+    return registry.call("tts", synthesize_on)
+
+def _request_speech_pcm(client, model, text, voice_name, style_prompt, language_hint, priority):
+    response = scheduled_call(
+        "tts", priority, client.models.generate_content,
+        model=model,
+        contents=build_tts_prompt(text, style_prompt, language_hint),
+        config=types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                        voice_name=voice_name,
                     )
-                ),
-            )
+                )
+            ),
         )
+    )
+    
+    if response.candidates and response.candidates[0].content.parts:
+        return response.candidates[0].content.parts[0].inline_data.data
+    return None
+
+def read_wave_pcm(wave_data):
+    """
+    Extract the raw PCM frames from in-memory wave file data.
+    
+    Args:
+        wave_data (bytes): Wave file data
         
-        if response.candidates and response.candidates[0].content.parts:
-            pcm_data = response.candidates[0].content.parts[0].inline_data.data
-            return create_wave_file_data(pcm_data)
+    Returns:
+        bytes: The PCM frames (a zero-copy view for an AudioBuffer)
+    """
+    if isinstance(wave_data, AudioBuffer):
+        return wave_data.pcm
+    with wave.open(io.BytesIO(wave_data), "rb") as wf:
+        return wf.readframes(wf.getnframes())
+
+def chunk_text_for_tts(text, max_chars=SINGLE_VOICE_CHUNK_CHARS):
+    """
+    Split long text into TTS-sized chunks at sentence or paragraph boundaries.
+    
+    Args:
+        text (str): Text to split
+        max_chars (int): Target maximum chunk length
         
-        return None
+    Returns:
+        list: Text chunks in reading order (a single chunk for short text)
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = ""
+    for sentence in split_text_into_sentences(text):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+def synthesize_pcm_chunks(synthesize, chunk_args, priority=Priority.CURRENT_TTS):
+    """
+    Run TTS requests for several chunks concurrently on the shared TTS pool.
+    
+    Each chunk fails on its own, so one failed request does not lose the
+    other chunks; transient errors are already retried by the API scheduler
+    and the model registry. Total latency approaches the slowest chunk.
+    
+    Args:
+        synthesize (callable): Function returning PCM bytes for one chunk, taking a priority keyword
+        chunk_args (list): Argument tuples for synthesize, one per chunk
+        priority (Priority): Scheduler priority of every request
+        
+    Returns:
+        list: PCM bytes per chunk in input order (None where a chunk failed)
+        
+    Raises:
+        Exception: The first chunk error, if no chunk could be voiced at all
+    """
+    if len(chunk_args) == 1:
+        return [synthesize(*chunk_args[0], priority=priority)]
+
+    # Keep the caller's session for fair queuing in the API scheduler
+    session_key = current_session_key()
+    futures = [
+        _tts_executor.submit(run_in_session, session_key, synthesize, *args, priority=priority)
+        for args in chunk_args
+    ]
+    pcm_chunks = []
+    first_error = None
+    for future in futures:
+        try:
+            pcm_chunks.append(future.result())
+        except Exception as e:
+            first_error = first_error or e
+            pcm_chunks.append(None)
+    if first_error and not any(pcm_chunks):
+        raise first_error
+    return pcm_chunks
+
+def synthesize_speech_audio(client, text, voice_name, style_prompt="", language_hint="",
+                            priority=Priority.CURRENT_TTS):
+    """
+    Voice text as one post-processed clip without touching the Streamlit UI.
+    
+    Long text is split at sentence boundaries and the chunks are voiced in
+    parallel, then joined into one clip.
+    
+    Args:
+        client: The Gemini API client
+        text (str): Text to convert to speech
+        voice_name (str): Name of the voice to use
+        style_prompt (str): Optional style instructions
+        language_hint (str): Optional language hint for better pronunciation
+        priority (Priority): Scheduler priority, lower for speculative or batch voicing
+        
+    Returns:
+        tuple: (wave_data, missing) - wave_data is None if nothing could be
+            voiced, missing is the number of chunks that failed
+        
+    Raises:
+        Exception: The first chunk error, if no chunk could be voiced at all
+    """
+    pcm_chunks = synthesize_pcm_chunks(
+        synthesize_speech_pcm,
+        [
+            (client, chunk, voice_name, style_prompt, language_hint)
+            for chunk in chunk_text_for_tts(text)
+        ],
+        priority=priority,
+    )
+    voiced_chunks = [chunk for chunk in pcm_chunks if chunk]
+    if not voiced_chunks:
+        return None, len(pcm_chunks)
+    return create_wave_file_data(postprocess_pcm_chunks(voiced_chunks)), len(pcm_chunks) - len(voiced_chunks)
+
+def generate_single_voice_audio(client, text, voice_name, style_prompt="", language_hint=""):
+    """
+    Generate single-speaker audio from text using Gemini TTS.
+    
+    Args:
+        client: The Gemini API client
+        text (str): Text to convert to speech
+        voice_name (str): Name of the voice to use
+        style_prompt (str): Optional style instructions
+        language_hint (str): Optional language hint for better pronunciation
+        
+    Returns:
+        bytes: Wave file data, or None if an error occurred
+    """
+    try:
+        wave_data, missing = synthesize_speech_audio(client, text, voice_name, style_prompt, language_hint)
+        if wave_data is not None and missing:
+            total = len(chunk_text_for_tts(text))
+            st.warning(f"Only {total - missing} of {total} parts of the reply could be voiced.")
+        return wave_data
         
     except Exception as e:
         st.error(f"Error generating voice audio: {e}")
         return None
 
-def generate_multi_voice_audio(client, conversation_text, speaker_configs):
+def synthesize_multi_speaker_pcm(client, conversation_text, speaker_configs, priority=Priority.CURRENT_TTS):
     """
-    Generate multi-speaker audio from conversation text.
+    Synthesize a multi-speaker conversation and return the raw PCM frames.
     
     Args:
         client: The Gemini API client
         conversation_text (str): Formatted conversation text
         speaker_configs (list): List of speaker configurations
+        priority (Priority): Scheduler priority
         
     Returns:
-        bytes: Wave file data, or None if an error occurred
+        bytes: 16-bit mono 24kHz PCM data, or None if the response had no audio
+        
+    Raises:
+        Exception: Any error raised by the Gemini API
     """
-    try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=conversation_text,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                        speaker_voice_configs=speaker_configs
-                    )
+    response = routed_call(
+        "tts", "tts", priority, client.models.generate_content,
+        contents=conversation_text,
+        config=types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                    speaker_voice_configs=speaker_configs
                 )
             )
         )
+    )
+    
+    if response.candidates and response.candidates[0].content.parts:
+        return response.candidates[0].content.parts[0].inline_data.data
+    return None
+
+def generate_multi_voice_audio(client, conversation_text, speaker_configs):
+    """
+    Generate multi-speaker audio from conversation text.
+    
+    Args:
+        client: The Gemini API client
+        conversation_text (str): Formatted conversation text
+        speaker_configs (list): List of speaker configurations
         
-        if response.candidates and response.candidates[0].content.parts:
-            pcm_data = response.candidates[0].content.parts[0].inline_data.data
-            return create_wave_file_data(pcm_data)
+    Returns:
+        bytes: Wave file data, or None if an error occurred
+    """
+    try:
+        pcm_data = synthesize_multi_speaker_pcm(client, conversation_text, speaker_configs)
+        if pcm_data:
+            return create_wave_file_data(postprocess_pcm_chunks([pcm_data]))
         
         return None
         
@@ -209,35 +490,321 @@ def create_speaker_config(speaker_name, voice_name):
         )
     )
 
-def detect_persona_gender(persona_description):
+def split_text_into_sentences(text):
     """
-    Attempt to detect gender from persona description.
+    Split text into sentences, keeping paragraph breaks as boundaries.
     
     Args:
-        persona_description (str): The persona's description
+        text (str): Text to split
         
     Returns:
-        str: 'male', 'female', or 'neutral'
+        list: Non-empty sentence strings
+    """
+    sentences = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        for sentence in _SENTENCE_BOUNDARY.split(paragraph.strip()):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+def chunk_dialogue_turns(turns, max_chars=MULTI_SPEAKER_MAX_CHARS, max_speakers=MULTI_SPEAKER_LIMIT):
     """
-    description_lower = persona_description.lower()
+    Pack dialogue turns into chunks that each fit one multi-speaker TTS request.
     
-    # Male indicators
-    male_keywords = ['he', 'him', 'his', 'man', 'male', 'father', 'king', 'emperor', 'prince', 
-                     'lord', 'sir', 'gentleman', 'boy', 'son', 'brother', 'uncle', 'grandfather']
+    Turns are kept whole where possible; a single turn longer than the limit
+    is split at sentence boundaries into several turns by the same speaker.
+    A chunk never holds more than max_speakers distinct speakers.
+    
+    Args:
+        turns (list): (speaker_label, text) tuples in conversation order
+        max_chars (int): Maximum transcript length per chunk
+        max_speakers (int): Maximum distinct speakers per chunk
+        
+    Returns:
+        list: Chunks, each a list of (speaker_label, text) tuples
+    """
+    pieces = []
+    for speaker, text in turns:
+        line_overhead = len(speaker) + 3
+        if len(text) + line_overhead <= max_chars:
+            pieces.append((speaker, text))
+            continue
+        current = ""
+        for sentence in split_text_into_sentences(text):
+            if current and len(current) + len(sentence) + 1 + line_overhead > max_chars:
+                pieces.append((speaker, current))
+                current = ""
+            current = f"{current} {sentence}".strip()
+        if current:
+            pieces.append((speaker, current))
+
+    chunks = []
+    current_chunk, current_len, current_speakers = [], 0, set()
+    for speaker, text in pieces:
+        line_len = len(speaker) + len(text) + 3
+        if current_chunk and (
+            current_len + line_len > max_chars
+            or (speaker not in current_speakers and len(current_speakers) >= max_speakers)
+        ):
+            chunks.append(current_chunk)
+            current_chunk, current_len, current_speakers = [], 0, set()
+        current_chunk.append((speaker, text))
+        current_len += line_len
+        current_speakers.add(speaker)
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def format_podcast_transcript(chunk, speaker_styles):
+    """
+    Format a chunk of dialogue as a multi-speaker TTS prompt.
+    
+    Args:
+        chunk (list): (speaker_label, text) tuples
+        speaker_styles (dict): speaker_label -> style prompt (may be empty)
+        
+    Returns:
+        str: The prompt for generate_multi_voice_audio
+    """
+    labels = list(speaker_styles)
+    lines = [f"TTS the following conversation between {' and '.join(labels)}:"]
+    for label, style in speaker_styles.items():
+        if style:
+            lines.append(f"Voice style for {label}: {style}")
+    lines.extend(f"{speaker}: {text}" for speaker, text in chunk)
+    return "\n".join(lines)
+
+def render_room_podcast(client, messages, personas, max_chars=MULTI_SPEAKER_MAX_CHARS):
+    """
+    Voice a span of Persona Room turns with multi-speaker TTS.
     
-    # Female indicators  
-    female_keywords = ['she', 'her', 'woman', 'female', 'mother', 'queen', 'empress', 'princess',
-                       'lady', 'madam', 'girl', 'daughter', 'sister', 'aunt', 'grandmother']
+    The turns are packed into as few multi-speaker requests as the length
+    limit allows and the resulting PCM is stitched into one recording.
+    Gemini multi-speaker TTS takes two speakers per request, so with larger
+    rooms a new request starts whenever a third persona speaks. Only persona
+    messages are voiced; user messages are skipped.
     
-    male_count = sum(1 for keyword in male_keywords if keyword in description_lower)
-    female_count = sum(1 for keyword in female_keywords if keyword in description_lower)
+    Args:
+        client: The Gemini API client
+        messages (list): Message dicts from messages_display
+        personas (list): (persona_name, voice_name, voice_style) tuples, at least two
+        max_chars (int): Maximum transcript length per TTS request
+        
+    Returns:
+        bytes: Wave file data, or None if nothing could be voiced
+    """
+    labels = {name: f"Speaker{i}" for i, (name, _, _) in enumerate(personas, start=1)}
+    if len(labels) < MULTI_SPEAKER_LIMIT or len(labels) != len(personas):
+        st.warning("Podcast rendering needs at least two personas with different names.")
+        return None
+    voices = {labels[name]: voice for name, voice, _ in personas}
+    styles = {labels[name]: style for name, _, style in personas}
+
+    turns = [
+        (labels[msg["role"]], msg["text"])
+        for msg in messages
+        if msg.get("role") in labels and msg.get("text")
+    ]
+    if not turns:
+        return None
+
+    try:
+        requests = []
+        for chunk in chunk_dialogue_turns(turns, max_chars):
+            chunk_labels = list(dict.fromkeys(speaker for speaker, _ in chunk))
+            # A request always configures two speakers, even if only one talks in it
+            for label in voices:
+                if len(chunk_labels) >= MULTI_SPEAKER_LIMIT:
+                    break
+                if label not in chunk_labels:
+                    chunk_labels.append(label)
+            requests.append((
+                client,
+                format_podcast_transcript(chunk, {label: styles[label] for label in chunk_labels}),
+                [create_speaker_config(label, voices[label]) for label in chunk_labels],
+            ))
+        pcm_parts = synthesize_pcm_chunks(synthesize_multi_speaker_pcm, requests)
+        voiced_parts = [part for part in pcm_parts if part]
+        if not voiced_parts:
+            return None
+        if len(voiced_parts) < len(pcm_parts):
+            st.warning(f"Only {len(voiced_parts)} of {len(pcm_parts)} podcast segments could be voiced.")
+        return create_wave_file_data(postprocess_pcm_chunks(voiced_parts))
+    except Exception as e:
+        st.error(f"Error rendering room podcast: {e}")
+        return None
+
+# Gender cues: pronouns count once, unambiguous nouns and titles count double
+_GENDER_KEYWORDS = {
+    "male": {
+        "he": 1, "him": 1, "his": 1, "himself": 1,
+        "man": 2, "male": 2, "father": 2, "king": 2, "emperor": 2, "prince": 2, "lord": 2,
+        "sir": 2, "gentleman": 2, "boy": 2, "son": 2, "brother": 2, "uncle": 2, "grandfather": 2,
+    },
+    "female": {
+        "she": 1, "her": 1, "hers": 1, "herself": 1,
+        "woman": 2, "female": 2, "mother": 2, "queen": 2, "empress": 2, "princess": 2, "lady": 2,
+        "madam": 2, "girl": 2, "daughter": 2, "sister": 2, "aunt": 2, "grandmother": 2,
+    },
+}
+
+# Character traits in priority order; ties between equal scores go to the earlier trait
+_TRAIT_KEYWORDS = {
+    "wise": ["wise", "professor", "scholar", "ancient", "sage", "philosopher", "teacher"],
+    "young": ["young", "energetic", "excited", "enthusiastic", "child", "teenager"],
+    "calm": ["calm", "peaceful", "gentle", "soft", "serene", "tranquil"],
+    "authoritative": ["authoritative", "leader", "commander", "strong", "king", "queen", "ruler", "boss"],
+    "mysterious": ["mysterious", "dark", "gothic", "spooky", "shadow", "enigmatic"],
+    "friendly": ["friendly", "warm", "kind", "cheerful", "caring", "loving"],
+}
+
+_TRAIT_SUGGESTIONS = {
+    "wise": {
+        "male": [
+            {"voice": "Gacrux", "style": "Speak in a wise and measured tone with authority", "reason": "Mature male voice for wise character"},
+            {"voice": "Sadaltager", "style": "Speak with scholarly wisdom", "reason": "Knowledgeable male voice"},
+        ],
+        "female": [
+            {"voice": "Kore", "style": "Speak with firm wisdom and authority", "reason": "Strong female voice for authority"},
+            {"voice": "Erinome", "style": "Speak clearly with scholarly precision", "reason": "Clear female voice for academic tone"},
+        ],
+    },
+    "young": {
+        "male": [
+            {"voice": "Fenrir", "style": "Speak with excitement and youthful energy", "reason": "Excitable male voice"},
+            {"voice": "Puck", "style": "Speak with upbeat enthusiasm", "reason": "Upbeat male voice"},
+        ],
+        "female": [
+            {"voice": "Leda", "style": "Speak with youthful excitement", "reason": "Youthful female voice"},
+            {"voice": "Sadachbia", "style": "Speak with lively energy", "reason": "Lively female voice"},
+        ],
+    },
+    "calm": {
+        "male": [
+            {"voice": "Enceladus", "style": "Speak softly with a breathy, peaceful tone", "reason": "Breathy male voice for peaceful tone"},
+            {"voice": "Zubenelgenubi", "style": "Speak in a calm and casual manner", "reason": "Casual male voice"},
+        ],
+        "female": [
+            {"voice": "Achernar", "style": "Speak in a calm and gentle manner", "reason": "Soft female voice"},
+            {"voice": "Vindemiatrix", "style": "Speak gently with nurturing warmth", "reason": "Gentle female voice"},
+        ],
+    },
+    "authoritative": {
+        "male": [
+            {"voice": "Orus", "style": "Speak with commanding authority", "reason": "Firm male voice for leadership"},
+            {"voice": "Alnilam", "style": "Speak with confident strength", "reason": "Strong male voice"},
+        ],
+        "female": [
+            {"voice": "Kore", "style": "Speak with firm authority and confidence", "reason": "Commanding female voice"},
+            {"voice": "Pulcherrima", "style": "Speak with forward confidence", "reason": "Assertive female voice"},
+        ],
+    },
+    "mysterious": {
+        "male": [
+            {"voice": "Enceladus", "style": "Speak in a mysterious whisper", "reason": "Breathy male voice for mystery"},
+            {"voice": "Algenib", "style": "Speak with a gravelly, mysterious tone", "reason": "Gravelly male voice"},
+        ],
+        "female": [
+            {"voice": "Despina", "style": "Speak smoothly with mysterious elegance", "reason": "Smooth female voice for intrigue"},
+            {"voice": "Algieba", "style": "Speak with refined mystery", "reason": "Elegant female voice"},
+        ],
+    },
+    "friendly": {
+        "male": [
+            {"voice": "Zubenelgenubi", "style": "Speak casually and warmly", "reason": "Casual male voice"},
+            {"voice": "Puck", "style": "Speak with upbeat friendliness", "reason": "Upbeat male voice"},
+        ],
+        "female": [
+            {"voice": "Achird", "style": "Speak with friendly warmth", "reason": "Friendly female voice"},
+            {"voice": "Sulafat", "style": "Speak with caring warmth", "reason": "Warm female voice"},
+        ],
+    },
+}
+
+_DEFAULT_SUGGESTIONS = {
+    "male": {"voice": "Puck", "style": "Speak naturally with an upbeat tone", "reason": "Default male voice"},
+    "female": {"voice": "Zephyr", "style": "Speak naturally with brightness", "reason": "Default female voice"},
+    "neutral": {"voice": "Umbriel", "style": "Speak naturally in an easy-going manner", "reason": "Versatile voice"},
+}
+
+
+def _build_keyword_features():
+    """
+    Precompute word -> [(feature, weight)] so a description is scored in one pass.
+    """
+    features = {}
+    for gender, keywords in _GENDER_KEYWORDS.items():
+        for word, weight in keywords.items():
+            features.setdefault(word, []).append((("gender", gender), weight))
+    for trait, keywords in _TRAIT_KEYWORDS.items():
+        for word in keywords:
+            features.setdefault(word, []).append((("trait", trait), 1))
+    for word in VOICE_CATALOG.traits:
+        features.setdefault(word, []).append((("voice_trait", word), 1))
+    return features
+
+_KEYWORD_FEATURES = _build_keyword_features()
+_WORD_PATTERN = re.compile(r"[a-z]+(?:-[a-z]+)*")
+_TRAIT_ORDER = {trait: i for i, trait in enumerate(_TRAIT_KEYWORDS)}
+_ANALYSIS_CACHE_SIZE = 256
+_analysis_cache = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+def _analyze_description(persona_description):
+    """
+    Score a description once for gender and character trait, memoized by content hash.
     
-    if male_count > female_count and male_count > 0:
-        return "male"
-    elif female_count > male_count and female_count > 0:
-        return "female"
+    Returns:
+        tuple: (gender, trait, voice_traits) - gender is 'male', 'female' or 'neutral';
+               trait may be None; voice_traits are catalog trait words found in the text
+    """
+    digest = hashlib.blake2b(persona_description.encode("utf-8"), digest_size=16).digest()
+    with _analysis_cache_lock:
+        cached = _analysis_cache.get(digest)
+        if cached is not None:
+            _analysis_cache.move_to_end(digest)
+            return cached
+
+    scores = Counter()
+    for word in _WORD_PATTERN.findall(persona_description.lower()):
+        # Hyphenated words that are not keywords themselves count as their parts
+        for part in ([word] if word in _KEYWORD_FEATURES else word.split("-")):
+            for feature, weight in _KEYWORD_FEATURES.get(part, ()):
+                scores[feature] += weight
+
+    male_score = scores[("gender", "male")]
+    female_score = scores[("gender", "female")]
+    if male_score > female_score:
+        gender = "male"
+    elif female_score > male_score:
+        gender = "female"
     else:
-        return "neutral"
+        gender = "neutral"
+
+    trait = max(_TRAIT_KEYWORDS, key=lambda name: (scores[("trait", name)], -_TRAIT_ORDER[name]))
+    if not scores[("trait", trait)]:
+        trait = None
+
+    voice_traits = frozenset(name for kind, name in scores if kind == "voice_trait")
+    result = (gender, trait, voice_traits)
+    with _analysis_cache_lock:
+        _analysis_cache[digest] = result
+        if len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    return result
+
+def detect_persona_gender(persona_description):
+    """
+    Attempt to detect gender from persona description.
+    
+    Args:
+        persona_description (str): The persona's description
+        
+    Returns:
+        str: 'male', 'female', or 'neutral'
+    """
+    return _analyze_description(persona_description)[0]
 
 def get_voice_style_suggestions(persona_description):
     """
@@ -249,86 +816,34 @@ def get_voice_style_suggestions(persona_description):
     Returns:
         dict: Suggested voice name, style prompt, and reasoning
     """
-    description_lower = persona_description.lower()
-    detected_gender = detect_persona_gender(persona_description)
-    
-    gender_voices = get_voices_by_gender(detected_gender)
-    if not gender_voices:
-        gender_voices = VOICE_OPTIONS
+    detected_gender, trait, voice_traits = _analyze_description(persona_description)
     
     suggestions = []
-    
-    # Wise/scholarly characters
-    if any(word in description_lower for word in ['wise', 'professor', 'scholar', 'ancient', 'sage', 'philosopher', 'teacher']):
-        if detected_gender == "male":
-            suggestions.append({"voice": "Gacrux", "style": "Speak in a wise and measured tone with authority", "reason": "Mature male voice for wise character"})
-            suggestions.append({"voice": "Sadaltager", "style": "Speak with scholarly wisdom", "reason": "Knowledgeable male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Kore", "style": "Speak with firm wisdom and authority", "reason": "Strong female voice for authority"})
-            suggestions.append({"voice": "Erinome", "style": "Speak clearly with scholarly precision", "reason": "Clear female voice for academic tone"})
-    
-    # Young/energetic characters
-    elif any(word in description_lower for word in ['young', 'energetic', 'excited', 'enthusiastic', 'child', 'teenager']):
-        if detected_gender == "male":
-            suggestions.append({"voice": "Fenrir", "style": "Speak with excitement and youthful energy", "reason": "Excitable male voice"})
-            suggestions.append({"voice": "Puck", "style": "Speak with upbeat enthusiasm", "reason": "Upbeat male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Leda", "style": "Speak with youthful excitement", "reason": "Youthful female voice"})
-            suggestions.append({"voice": "Sadachbia", "style": "Speak with lively energy", "reason": "Lively female voice"})
-    
-    # Calm/peaceful characters
-    elif any(word in description_lower for word in ['calm', 'peaceful', 'gentle', 'soft', 'serene', 'tranquil']):
-        if detected_gender == "male":
-            suggestions.append({"voice": "Enceladus", "style": "Speak softly with a breathy, peaceful tone", "reason": "Breathy male voice for peaceful tone"})
-            suggestions.append({"voice": "Zubenelgenubi", "style": "Speak in a calm and casual manner", "reason": "Casual male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Achernar", "style": "Speak in a calm and gentle manner", "reason": "Soft female voice"})
-            suggestions.append({"voice": "Vindemiatrix", "style": "Speak gently with nurturing warmth", "reason": "Gentle female voice"})
-    
-    # Authoritative/leader characters
-    elif any(word in description_lower for word in ['authoritative', 'leader', 'commander', 'strong', 'king', 'queen', 'ruler', 'boss']):
-        if detected_gender == "male":
-            suggestions.append({"voice": "Orus", "style": "Speak with commanding authority", "reason": "Firm male voice for leadership"})
-            suggestions.append({"voice": "Alnilam", "style": "Speak with confident strength", "reason": "Strong male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Kore", "style": "Speak with firm authority and confidence", "reason": "Commanding female voice"})
-            suggestions.append({"voice": "Pulcherrima", "style": "Speak with forward confidence", "reason": "Assertive female voice"})
-    
-    # Mysterious/dark characters
-    elif any(word in description_lower for word in ['mysterious', 'dark', 'gothic', 'spooky', 'shadow', 'enigmatic']):
-        if detected_gender == "male":
-            suggestions.append({"voice": "Enceladus", "style": "Speak in a mysterious whisper", "reason": "Breathy male voice for mystery"})
-            suggestions.append({"voice": "Algenib", "style": "Speak with a gravelly, mysterious tone", "reason": "Gravelly male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Despina", "style": "Speak smoothly with mysterious elegance", "reason": "Smooth female voice for intrigue"})
-            suggestions.append({"voice": "Algieba", "style": "Speak with refined mystery", "reason": "Elegant female voice"})
-    
-    # Friendly/warm characters
-    elif any(word in description_lower for word in ['friendly', 'warm', 'kind', 'cheerful', 'caring', 'loving']):
-        if detected_gender == "male":
-            suggestions.append({"voice": "Zubenelgenubi", "style": "Speak casually and warmly", "reason": "Casual male voice"})
-            suggestions.append({"voice": "Puck", "style": "Speak with upbeat friendliness", "reason": "Upbeat male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Achird", "style": "Speak with friendly warmth", "reason": "Friendly female voice"})
-            suggestions.append({"voice": "Sulafat", "style": "Speak with caring warmth", "reason": "Warm female voice"})
-    
-    # Default suggestions based on gender
+    if trait:
+        suggestions = list(_TRAIT_SUGGESTIONS[trait].get(detected_gender, []))
     if not suggestions:
-        if detected_gender == "male":
-            suggestions.append({"voice": "Puck", "style": "Speak naturally with an upbeat tone", "reason": "Default male voice"})
-        elif detected_gender == "female":
-            suggestions.append({"voice": "Zephyr", "style": "Speak naturally with brightness", "reason": "Default female voice"})
-        else:
-            # For neutral, pick a balanced option
-            suggestions.append({"voice": "Umbriel", "style": "Speak naturally in an easy-going manner", "reason": "Versatile voice"})
+        suggestions = [_DEFAULT_SUGGESTIONS[detected_gender]]
     
-    # Return the best suggestion
-    best_suggestion = suggestions[0] if suggestions else {"voice": "Zephyr", "style": "Speak naturally", "reason": "Fallback voice"}
+    # Fill up the alternatives with the catalog voices closest to the persona's traits
+    if len(suggestions) < 3 and voice_traits:
+        ranked = VOICE_CATALOG.rank_by_traits(
+            voice_traits,
+            gender=None if detected_gender == "neutral" else detected_gender,
+            limit=3 - len(suggestions),
+            exclude=[suggestion["voice"] for suggestion in suggestions]
+        )
+        for record, shared_traits in ranked:
+            suggestions.append({
+                "voice": record.name,
+                "style": f"Speak in a {record.personality} manner",
+                "reason": f"{record.style} voice matching: {', '.join(sorted(shared_traits))}"
+            })
     
+    best_suggestion = suggestions[0]
     return {
         "voice": best_suggestion["voice"],
         "style": best_suggestion["style"],
         "gender": detected_gender,
         "reason": best_suggestion["reason"],
-        "alternatives": suggestions[1:3] if len(suggestions) > 1 else []
+        "alternatives": [dict(alt) for alt in suggestions[1:3]]
     }
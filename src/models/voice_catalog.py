@@ -0,0 +1,178 @@
+"""
+Voice catalog for Talk-To-Anyone application.
+
+VOICE_OPTIONS is the source list of Gemini TTS voices. VOICE_CATALOG is built
+from it once at import and holds immutable voice records with precomputed
+indexes by gender, style and personality trait, so voice pickers and
+suggestions never rebuild filtered dicts on a rerun.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+VOICE_OPTIONS = {
+    # Female voices
+    "Zephyr": {"gender": "female", "style": "Bright", "personality": "cheerful, optimistic"},
+    "Kore": {"gender": "female", "style": "Firm", "personality": "strong, commanding"},
+    "Leda": {"gender": "female", "style": "Youthful", "personality": "young, vibrant"},
+    "Aoede": {"gender": "female", "style": "Breezy", "personality": "light, carefree"},
+    "Callirrhoe": {"gender": "female", "style": "Easy-going", "personality": "relaxed, natural"},
+    "Autonoe": {"gender": "female", "style": "Bright", "personality": "lively, spirited"},
+    "Umbriel": {"gender": "female", "style": "Easy-going", "personality": "relaxed, versatile"},
+    "Algieba": {"gender": "female", "style": "Smooth", "personality": "elegant, refined"},
+    "Despina": {"gender": "female", "style": "Smooth", "personality": "graceful, polished"},
+    "Erinome": {"gender": "female", "style": "Clear", "personality": "articulate, precise"},
+    "Laomedeia": {"gender": "female", "style": "Upbeat", "personality": "enthusiastic, positive"},
+    "Schedar": {"gender": "female", "style": "Even", "personality": "balanced, steady"},
+    "Pulcherrima": {"gender": "female", "style": "Forward", "personality": "confident, assertive"},
+    "Achird": {"gender": "female", "style": "Friendly", "personality": "warm, approachable"},
+    "Vindemiatrix": {"gender": "female", "style": "Gentle", "personality": "soft, nurturing"},
+    "Sadachbia": {"gender": "female", "style": "Lively", "personality": "energetic, spirited"},
+    "Sulafat": {"gender": "female", "style": "Warm", "personality": "caring, compassionate"},
+    "Achernar": {"gender": "female", "style": "Soft", "personality": "gentle, calm"},
+    
+    # Male voices
+    "Puck": {"gender": "male", "style": "Upbeat", "personality": "energetic, youthful"},
+    "Charon": {"gender": "male", "style": "Informative", "personality": "knowledgeable, authoritative"},
+    "Fenrir": {"gender": "male", "style": "Excitable", "personality": "enthusiastic, dynamic"},
+    "Orus": {"gender": "male", "style": "Firm", "personality": "strong, decisive"},
+    "Enceladus": {"gender": "male", "style": "Breathy", "personality": "mysterious, soft-spoken"},
+    "Iapetus": {"gender": "male", "style": "Clear", "personality": "articulate, professional"},
+    "Algenib": {"gender": "male", "style": "Gravelly", "personality": "rough, experienced"},
+    "Rasalgethi": {"gender": "male", "style": "Informative", "personality": "scholarly, wise"},
+    "Alnilam": {"gender": "male", "style": "Firm", "personality": "confident, solid"},
+    "Gacrux": {"gender": "male", "style": "Mature", "personality": "wise, experienced"},
+    "Zubenelgenubi": {"gender": "male", "style": "Casual", "personality": "relaxed, friendly"},
+    "Sadaltager": {"gender": "male", "style": "Knowledgeable", "personality": "intelligent, scholarly"}
+}
+
+
+VoiceRecord = namedtuple("VoiceRecord", ["name", "gender", "style", "personality", "traits"])
+
+
+class VoiceCatalog:
+    """
+    Immutable, indexed view over the available TTS voices.
+    """
+
+    def __init__(self, voice_options):
+        records = []
+        for name, info in voice_options.items():
+            personality_traits = [trait.strip().lower() for trait in info["personality"].split(",")]
+            traits = frozenset(personality_traits + [info["style"].lower()])
+            records.append(VoiceRecord(name, info["gender"], info["style"], info["personality"], traits))
+        self.records = tuple(records)
+        self._by_name = MappingProxyType({record.name: record for record in records})
+        self._order = {record.name: i for i, record in enumerate(records)}
+
+        self.by_gender = self._build_index(lambda record: [record.gender])
+        self.by_style = self._build_index(lambda record: [record.style.lower()])
+        self.by_trait = self._build_index(lambda record: record.traits)
+
+        self._options = dict(voice_options)
+        self._query_cache = {}
+        self._view_cache = {}
+
+    def _build_index(self, keys_for):
+        index = {}
+        for record in self.records:
+            for key in keys_for(record):
+                index.setdefault(key, []).append(record.name)
+        return MappingProxyType({key: frozenset(names) for key, names in index.items()})
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __contains__(self, name):
+        return name in self._by_name
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def traits(self):
+        """frozenset: Every style and personality trait word in the catalog."""
+        return frozenset(self.by_trait)
+
+    def names(self, gender=None, style=None, trait=None):
+        """
+        Find voices matching all of the given attributes.
+        
+        Args:
+            gender (str): Optional 'male' or 'female'
+            style (str): Optional style, e.g. 'Firm' (case-insensitive)
+            trait (str): Optional personality trait, e.g. 'wise' (case-insensitive)
+            
+        Returns:
+            tuple: Matching voice names in catalog order
+        """
+        key = (gender, style and style.lower(), trait and trait.lower())
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        matching = None
+        for index, value in ((self.by_gender, key[0]), (self.by_style, key[1]), (self.by_trait, key[2])):
+            if value is None:
+                continue
+            names = index.get(value, frozenset())
+            matching = names if matching is None else matching & names
+
+        if matching is None:
+            result = tuple(record.name for record in self.records)
+        else:
+            result = tuple(sorted(matching, key=self._order.__getitem__))
+        self._query_cache[key] = result
+        return result
+
+    def query(self, gender=None, style=None, trait=None):
+        """
+        Find voice records matching all of the given attributes.
+        
+        Returns:
+            tuple: Matching VoiceRecord objects in catalog order
+        """
+        return tuple(self._by_name[name] for name in self.names(gender, style, trait))
+
+    def options_view(self, gender=None, style=None, trait=None):
+        """
+        Get a cached, read-only VOICE_OPTIONS-style mapping for a query.
+        
+        Returns:
+            Mapping: voice name -> {'gender', 'style', 'personality'}
+        """
+        key = (gender, style and style.lower(), trait and trait.lower())
+        view = self._view_cache.get(key)
+        if view is None:
+            view = MappingProxyType({name: self._options[name] for name in self.names(gender, style, trait)})
+            self._view_cache[key] = view
+        return view
+
+    def rank_by_traits(self, traits, gender=None, limit=3, exclude=()):
+        """
+        Rank voices by how many of a persona's traits they share.
+        
+        Args:
+            traits (iterable): Trait words describing the persona
+            gender (str): Optional gender filter
+            limit (int): Maximum number of voices returned
+            exclude (iterable): Voice names to leave out
+            
+        Returns:
+            list: (VoiceRecord, shared_traits) tuples, best match first; voices
+                  sharing no traits are omitted
+        """
+        wanted = frozenset(trait.lower() for trait in traits)
+        candidates = self.names(gender=gender)
+        excluded = set(exclude)
+        scored = []
+        for name in candidates:
+            if name in excluded:
+                continue
+            shared = self._by_name[name].traits & wanted
+            if shared:
+                scored.append((-len(shared), self._order[name], name, shared))
+        scored.sort()
+        return [(self._by_name[name], shared) for _, _, name, shared in scored[:limit]]
+
+
+VOICE_CATALOG = VoiceCatalog(VOICE_OPTIONS)
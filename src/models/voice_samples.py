@@ -0,0 +1,187 @@
+"""
+Voice preview sample bank for Talk-To-Anyone application.
+
+The default preview sentence is rendered ahead of time for every voice and
+language and kept on disk as compressed PCM, so "Play Preview" is served
+without an API call. Custom preview text falls through to live synthesis and
+is kept in the TTS cache.
+"""
+import os
+import zlib
+import threading
+from pathlib import Path
+from functools import lru_cache
+
+from .voice import (
+    VOICE_OPTIONS, SUPPORTED_LANGUAGES, AudioBuffer, synthesize_speech_pcm
+)
+from .audio_processing import postprocess_pcm_chunks
+from ..api.scheduler import Priority
+
+DEFAULT_PREVIEW_TEXT = "Hello! This is how I sound."
+DEFAULT_LANGUAGE = "English (US)"
+DEFAULT_SAMPLE_DIR = Path(__file__).resolve().parents[2] / ".cache" / "voice_samples"
+
+_bank_write_lock = threading.Lock()
+
+
+def get_sample_bank_dir():
+    """
+    Get the voice sample bank directory.
+
+    Returns:
+        Path: VOICE_SAMPLE_DIR from the environment, or .cache/voice_samples in the project root
+    """
+    return Path(os.getenv("VOICE_SAMPLE_DIR") or DEFAULT_SAMPLE_DIR)
+
+
+def language_hint_for(language_name):
+    """
+    Get the TTS language hint for a language setting.
+
+    Args:
+        language_name (str): A key of SUPPORTED_LANGUAGES
+
+    Returns:
+        str: The hint, empty for the default language
+    """
+    return "" if language_name == DEFAULT_LANGUAGE else language_name
+
+
+def _sample_path(voice_name, language_name, bank_dir=None):
+    base_dir = Path(bank_dir) if bank_dir else get_sample_bank_dir()
+    return base_dir / SUPPORTED_LANGUAGES[language_name] / f"{voice_name}.pcm.z"
+
+
+def store_voice_sample(voice_name, language_name, samples, bank_dir=None):
+    """
+    Store a rendered preview in the bank as zlib-compressed PCM.
+
+    Args:
+        voice_name (str): Voice of the sample
+        language_name (str): Language of the sample
+        samples: Post-processed int16 samples (bytes-like)
+        bank_dir (str or Path): Optional bank directory
+    """
+    path = _sample_path(voice_name, language_name, bank_dir)
+    compressed = zlib.compress(memoryview(samples).cast("B"), 9)
+    with _bank_write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+
+
+@lru_cache(maxsize=64)
+def _load_voice_sample(path, mtime_ns):
+    # mtime_ns is part of the cache key so a re-rendered sample is reloaded
+    try:
+        with open(path, "rb") as f:
+            return AudioBuffer.from_pcm(zlib.decompress(f.read()))
+    except (OSError, zlib.error):
+        return None
+
+
+def get_voice_sample(voice_name, language_name=DEFAULT_LANGUAGE, bank_dir=None):
+    """
+    Get the pre-rendered default preview for a voice.
+
+    Args:
+        voice_name (str): Voice to preview
+        language_name (str): A key of SUPPORTED_LANGUAGES
+        bank_dir (str or Path): Optional bank directory
+
+    Returns:
+        AudioBuffer: The preview audio, or None if it is not in the bank
+    """
+    if voice_name not in VOICE_OPTIONS or language_name not in SUPPORTED_LANGUAGES:
+        return None
+    path = _sample_path(voice_name, language_name, bank_dir)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    return _load_voice_sample(path, mtime_ns)
+
+
+def render_voice_sample(client, voice_name, language_name, text=DEFAULT_PREVIEW_TEXT):
+    """
+    Synthesize and post-process one preview.
+
+    Args:
+        client: The Gemini API client
+        voice_name (str): Voice to preview
+        language_name (str): A key of SUPPORTED_LANGUAGES
+        text (str): Preview text
+
+    Returns:
+        numpy.ndarray: int16 samples, or None if the model returned no audio
+
+    Raises:
+        Exception: Any error raised by the Gemini API
+    """
+    pcm_data = synthesize_speech_pcm(
+        client, text, voice_name, language_hint=language_hint_for(language_name), priority=Priority.PREVIEW
+    )
+    if not pcm_data:
+        return None
+    return postprocess_pcm_chunks([pcm_data])[0]
+
+
+def get_voice_preview(client, voice_name, text=DEFAULT_PREVIEW_TEXT, language_name=DEFAULT_LANGUAGE):
+    """
+    Get preview audio, from the sample bank or the TTS cache where possible.
+
+    The default sentence is served from the bank (and added to it on a miss);
+    custom text is synthesized live once and then served from the TTS cache.
+
+    Args:
+        client: The Gemini API client (only used on a miss)
+        voice_name (str): Voice to preview
+        text (str): Preview text
+        language_name (str): A key of SUPPORTED_LANGUAGES
+
+    Returns:
+        AudioBuffer: The preview audio, or None if it could not be produced
+
+    Raises:
+        Exception: Any error raised by the Gemini API on a miss
+    """
+    text = text.strip()
+    if text == DEFAULT_PREVIEW_TEXT:
+        sample = get_voice_sample(voice_name, language_name)
+        if sample is not None:
+            return sample
+        samples = render_voice_sample(client, voice_name, language_name)
+        if samples is None:
+            return None
+        store_voice_sample(voice_name, language_name, samples)
+        return AudioBuffer.from_pcm(samples)
+
+    pcm_data = synthesize_speech_pcm(
+        client, text, voice_name, language_hint=language_hint_for(language_name),
+        priority=Priority.PREVIEW, cache=True
+    )
+    if not pcm_data:
+        return None
+    return AudioBuffer.from_pcm(postprocess_pcm_chunks([pcm_data]))
+
+
+def missing_voice_samples(languages=None, bank_dir=None):
+    """
+    List the (voice, language) pairs that are not in the bank yet.
+
+    Args:
+        languages (list): Language names to check, defaults to all supported languages
+        bank_dir (str or Path): Optional bank directory
+
+    Returns:
+        list: (voice_name, language_name) tuples
+    """
+    return [
+        (voice_name, language_name)
+        for language_name in (languages or SUPPORTED_LANGUAGES)
+        for voice_name in VOICE_OPTIONS
+        if not _sample_path(voice_name, language_name, bank_dir).exists()
+    ]
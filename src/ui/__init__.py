@@ -4,4 +4,5 @@ UI package for Talk-To-Anyone application.
 from .common import render_chat_messages, render_source_popover
 from .single_persona import render_persona_setup, handle_chat_interaction
 from .persona_room import render_persona_room_setup, handle_persona_room_interaction
+from .batch_interview import render_batch_interview, stop_batch_interview, build_interview_document
 from .voice_settings import render_voice_settings, render_persona_voice_config, create_audio_player
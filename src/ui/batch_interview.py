@@ -0,0 +1,301 @@
+"""
+Batch interview for Single Persona Chat in Talk-To-Anyone application.
+
+A list of questions is put to the persona all at once. Each question is
+answered on its own fork of the persona's chat, so answers do not see each
+other and the conversation's history does not grow; a few questions run at
+a time on a pool shared by all sessions, below live chat in the API scheduler. The answers, their sources
+and optional voice clips are exported as one Q&A sheet.
+"""
+import re
+import html
+import time
+import base64
+import streamlit as st
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from ..api.scheduler import Priority, current_session_key, run_in_session
+from ..models import (
+    fork_chat_session,
+    send_chat_message,
+    extract_sources_from_response,
+    synthesize_speech_audio
+)
+from ..utils import get_persona_chat
+from .common import rerun_fragment
+from .voice_settings import create_audio_player
+
+MAX_BATCH_QUESTIONS = 100
+DEFAULT_BATCH_CONCURRENCY = 4
+MAX_BATCH_CONCURRENCY = 8
+# Seconds between progress updates while questions are answered
+PROGRESS_INTERVAL = 1.0
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+_batch_executor = ThreadPoolExecutor(max_workers=MAX_BATCH_CONCURRENCY, thread_name_prefix="batch-interview")
+
+
+def parse_questions(text):
+    """
+    Split pasted text into questions, one per line.
+
+    List markers are stripped and repeated questions are only asked once.
+
+    Args:
+        text (str): Questions, one per line
+
+    Returns:
+        list: The questions in order, at most MAX_BATCH_QUESTIONS
+    """
+    questions = []
+    for line in text.splitlines():
+        question = " ".join(_LIST_MARKER.sub("", line).split())
+        if question and question not in questions:
+            questions.append(question)
+    return questions[:MAX_BATCH_QUESTIONS]
+
+
+def _answer_question(client, fork, question, voice):
+    """
+    Answer one question on its fork; runs in a worker thread and never touches Streamlit state.
+
+    Returns:
+        dict: answer, sources, audio_data and error (None on success)
+    """
+    result = {"answer": None, "sources": [], "audio_data": None, "error": None}
+    try:
+        response = send_chat_message(fork, question, priority=Priority.PERSONA)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    text = getattr(response, "text", None) if response else None
+    if not text:
+        result["error"] = "No text in response."
+        return result
+    result["answer"] = text
+    result["sources"] = extract_sources_from_response(response)
+    if voice:
+        try:
+            result["audio_data"], _ = synthesize_speech_audio(client, text, *voice, priority=Priority.PERSONA)
+        except Exception:
+            # The written answer is still useful without its clip
+            result["audio_data"] = None
+    return result
+
+
+def _answer_next(queue, session_key, client, voice):
+    """
+    Answer the next queued question of a batch, then queue the one after it.
+
+    Each call is one lane of the batch; it gives its pool thread back between
+    questions, so batches of other sessions take turns on the shared pool.
+    """
+    while True:
+        try:
+            future, fork, question = queue.popleft()
+        except IndexError:
+            return
+        # Skips questions cancelled by stop_batch_interview
+        if future.set_running_or_notify_cancel():
+            break
+    try:
+        future.set_result(run_in_session(session_key, _answer_question, client, fork, question, voice))
+    except Exception as e:
+        future.set_exception(e)
+    if queue:
+        _batch_executor.submit(_answer_next, queue, session_key, client, voice)
+
+
+def start_batch_interview(client, questions, concurrency, voice_enabled):
+    """
+    Start answering questions in the background, each on a fork of the persona's chat.
+
+    Args:
+        client: The Gemini API client
+        questions (list): Output of parse_questions
+        concurrency (int): Number of questions answered at a time
+        voice_enabled (bool): Whether to voice each answer
+
+    Returns:
+        bool: True if the batch was started
+    """
+    persona = st.session_state.personas[0]
+    base_session = get_persona_chat(persona, client)
+    if base_session is None:
+        return False
+    forks = [fork_chat_session(base_session) for _ in questions]
+    if not all(forks):
+        return False
+    voice = (persona["voice"], persona["voice_style"]) if voice_enabled else None
+
+    futures = [Future() for _ in questions]
+    queue = deque(zip(futures, forks, questions))
+    session_key = current_session_key()
+    for _ in range(min(concurrency, len(questions))):
+        _batch_executor.submit(_answer_next, queue, session_key, client, voice)
+    st.session_state.batch_interview = {
+        "persona": persona["name"],
+        "questions": questions,
+        "futures": futures,
+        "results": None,
+        "started": time.monotonic(),
+        "seconds": None,
+    }
+    return True
+
+
+def stop_batch_interview():
+    """
+    Cancel the questions not yet started; answers already received are kept.
+    """
+    run = st.session_state.batch_interview
+    if run and run["futures"]:
+        for future in run["futures"]:
+            future.cancel()
+
+
+def _collect_results(run):
+    results = []
+    for question, future in zip(run["questions"], run["futures"]):
+        if future.cancelled():
+            result = {"answer": None, "sources": [], "audio_data": None, "error": "Cancelled."}
+        else:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"answer": None, "sources": [], "audio_data": None, "error": str(e)}
+        results.append(dict(result, question=question))
+    run["results"] = results
+    run["futures"] = None
+    run["seconds"] = time.monotonic() - run["started"]
+
+
+def build_interview_document(persona_name, results):
+    """
+    Build the Q&A sheet of a batch interview as one self-contained HTML document.
+
+    Voice clips are embedded, so the file can be shared on its own.
+
+    Args:
+        persona_name (str): The interviewed persona
+        results (list): Results with question, answer, sources, audio_data and error
+
+    Returns:
+        str: The HTML document
+    """
+    title = html.escape(f"Interview with {persona_name}")
+    parts = [
+        "<!DOCTYPE html>",
+        '<html><head><meta charset="utf-8">',
+        f"<title>{title}</title>",
+        "<style>body{font-family:sans-serif;max-width:50em;margin:2em auto;line-height:1.5}"
+        ".answer{white-space:pre-wrap}.error{color:#a00}</style>",
+        f"</head><body><h1>{title}</h1>",
+    ]
+    for number, result in enumerate(results, 1):
+        parts.append(f"<h2>{number}. {html.escape(result['question'])}</h2>")
+        if result["answer"] is None:
+            parts.append(f'<p class="error">Not answered: {html.escape(result["error"] or "")}</p>')
+            continue
+        parts.append(f'<p class="answer">{html.escape(result["answer"])}</p>')
+        if result["audio_data"]:
+            parts.append(create_audio_player(result["audio_data"]))
+        if result["sources"]:
+            links = "".join(
+                f'<li><a href="{html.escape(source["uri"], quote=True)}">'
+                f'{html.escape(source.get("title") or source["uri"])}</a></li>'
+                for source in result["sources"] if source.get("uri")
+            )
+            parts.append(f"<p>Sources:</p><ul>{links}</ul>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def _render_results(run):
+    results = run["results"]
+    answered = sum(result["answer"] is not None for result in results)
+    st.caption(f"{answered} of {len(results)} questions answered in {run['seconds']:.1f}s.")
+
+    if st.button("📦 Prepare Q&A Sheet", key="prepare_batch_export_btn", use_container_width=True):
+        document = build_interview_document(run["persona"], results)
+        b64_document = base64.b64encode(document.encode("utf-8")).decode()
+        filename = f"interview_{run['persona'].replace(' ', '_').lower()}.html"
+        download_link = f'<a href="data:text/html;base64,{b64_document}" download="{filename}" style="display:inline-block;padding:0.25em 0.5em;text-decoration:none;background-color:#4CAF50;color:white;border-radius:4px;cursor:pointer;text-align:center;width:100%;"> Download Q&A Sheet</a>'
+        st.markdown(download_link, unsafe_allow_html=True)
+
+    for number, result in enumerate(results, 1):
+        st.markdown(f"**{number}. {result['question']}**")
+        if result["answer"] is None:
+            st.error(f"Not answered: {result['error']}")
+            continue
+        st.markdown(result["answer"])
+        if result["audio_data"]:
+            st.markdown(create_audio_player(result["audio_data"]), unsafe_allow_html=True)
+        if result["sources"]:
+            st.caption(" · ".join(
+                f"[{source.get('title') or 'Source'}]({source['uri']})"
+                for source in result["sources"] if source.get("uri")
+            ))
+
+    if st.button("🗑️ Clear Results", key="clear_batch_results_btn", use_container_width=True):
+        st.session_state.batch_interview = None
+        rerun_fragment()
+
+
+def render_batch_interview(client):
+    """
+    Render the batch interview panel: questions and settings, progress, or results.
+
+    While questions are being answered the fragment reruns every
+    PROGRESS_INTERVAL seconds to update the progress bar.
+
+    Args:
+        client: The Gemini API client
+    """
+    run = st.session_state.batch_interview
+    with st.expander("📋 Batch Interview", expanded=run is not None):
+        if run is None:
+            questions_text = st.text_area(
+                f"Questions, one per line (up to {MAX_BATCH_QUESTIONS})",
+                key="batch_questions_input",
+                help="Each question is answered on its own copy of the conversation so far; the chat itself is not changed.",
+            )
+            concurrency = st.number_input(
+                "Questions answered at a time",
+                min_value=1,
+                max_value=MAX_BATCH_CONCURRENCY,
+                value=DEFAULT_BATCH_CONCURRENCY,
+                key="batch_concurrency_input",
+            )
+            voice_enabled = st.checkbox(
+                "Voice each answer", value=st.session_state.voice_enabled, key="batch_voice_checkbox"
+            )
+            questions = parse_questions(questions_text)
+            if st.button(
+                f"▶️ Ask {len(questions)} Questions" if questions else "▶️ Ask Questions",
+                disabled=not questions,
+                key="start_batch_interview_btn",
+                use_container_width=True,
+            ):
+                if start_batch_interview(client, questions, int(concurrency), voice_enabled):
+                    rerun_fragment()
+                st.error("Failed to start the batch interview.")
+            return
+
+        if run["futures"] is None:
+            _render_results(run)
+            return
+
+        done = sum(future.done() for future in run["futures"])
+        total = len(run["futures"])
+        st.progress(done / total, text=f"{done} of {total} questions answered")
+        if st.button("⏹️ Stop", key="stop_batch_interview_btn", use_container_width=True):
+            stop_batch_interview()
+        pending = [future for future in run["futures"] if not future.done()]
+        if pending:
+            wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+        else:
+            _collect_results(run)
+        rerun_fragment()
@@ -2,30 +2,105 @@
 Common UI components for Talk-To-Anyone application.
 """
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from .voice_settings import create_audio_player
+from ..utils import load_older_messages, TRANSCRIPT_WINDOW
+
+# How many more messages each "Show older messages" click loads
+TRANSCRIPT_WINDOW_STEP = TRANSCRIPT_WINDOW
+
+def rerun_fragment():
+    """
+    Rerun only the fragment being executed, or the whole app outside a fragment rerun.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+def collect_sources(sources):
+    """
+    Add a message's sources to the conversation's collected sources, skipping known URIs.
+    
+    Args:
+        sources (list): Sources from extract_sources_from_response
+    """
+    existing_uris = {s['uri'] for s in st.session_state.all_sources if 'uri' in s}
+    for src in sources:
+        if src.get('uri') and src['uri'] not in existing_uris:
+            st.session_state.all_sources.append(src)
+            existing_uris.add(src['uri'])
+
+
+def _render_sources(msg):
+    """
+    Build the sources markdown of a message.
+    """
+    if "sources" in msg and msg["sources"]:
+        return "\n".join(
+            f"- [{source.get('title', 'Source')}]({source.get('uri')})" for source in msg["sources"]
+        )
+    return ""
+
 
 def render_chat_messages():
     """
-    Render the chat messages from the session state.
+    Render the most recent chat messages from the session state.
+    
+    Only the last `transcript_window` messages are drawn; older ones are loaded
+    on demand, from the conversation store once they are not in the session.
+    The sources list of settled messages is built once and reused on later
+    reruns. Audio players are built as they are drawn, so the session never
+    holds a second, base64 copy of each clip; settled messages never auto-play.
     """
-    for msg in st.session_state.messages_display:
+    messages = st.session_state.messages_display
+    window = st.session_state.transcript_window
+    first_visible = max(0, len(messages) - window)
+    hidden = first_visible + st.session_state.stored_messages_before
+
+    if hidden:
+        if st.button(
+            f"⬆️ Show older messages ({hidden} hidden)",
+            key="show_older_messages_btn",
+            use_container_width=True,
+        ):
+            st.session_state.transcript_window += TRANSCRIPT_WINDOW_STEP
+            missing = st.session_state.transcript_window - len(messages)
+            if missing > 0:
+                load_older_messages(missing)
+            rerun_fragment()
+
+    rendered_cache = st.session_state.rendered_messages
+    visible_cache = {}
+    last_index = len(messages) - 1
+    for index in range(first_visible, len(messages)):
+        msg = messages[index]
+        settled = index < last_index
+        cached = rendered_cache.get(index)
+        if settled and cached and cached[0] is msg:
+            sources_md = cached[1]
+        else:
+            sources_md = _render_sources(msg)
+        if settled:
+            visible_cache[index] = (msg, sources_md)
+
         with st.chat_message(msg["role"]):
             st.markdown(msg["text"])
             
-            if "audio_data" in msg and msg["audio_data"]:
+            if msg.get("audio_data"):
                 audio_html = create_audio_player(
-                    msg["audio_data"], 
-                    auto_play=st.session_state.auto_play_voice
+                    msg["audio_data"],
+                    auto_play=st.session_state.auto_play_voice and not settled
                 )
                 st.markdown(audio_html, unsafe_allow_html=True)
             
-            if "sources" in msg and msg["sources"]:
+            if sources_md:
                 with st.expander("Sources for this message"): 
-                    for source in msg["sources"]:
-                        st.markdown(
-                            f"- [{source.get('title', 'Source')
-                                      }]({source.get('uri')})"
-                        )
+                    st.markdown(sources_md)
+
+    # Keep pre-rendered parts only for the visible window
+    st.session_state.rendered_messages = visible_cache
 
 
 def render_source_popover():
@@ -35,10 +110,11 @@ def render_source_popover():
     header_left, header_right = st.columns([0.85, 0.15])
     
     with header_left:
+        names = [persona["name"] for persona in st.session_state.personas]
         if st.session_state.chat_mode == "Single Persona Chat":
-            st.markdown(f"### Chatting with: {st.session_state.persona_1_name}")
+            st.markdown(f"### Chatting with: {names[0]}")
         else: 
-            st.markdown(f"### Persona Room: {st.session_state.persona_1_name} & {st.session_state.persona_2_name}")
+            st.markdown(f"### Persona Room: {', '.join(names[:-1])} & {names[-1]}")
 
     with header_right:
         with st.popover("📚 Sources", use_container_width=True):
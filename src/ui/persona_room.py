@@ -2,266 +2,396 @@
 Persona Room UI components for Talk-To-Anyone application.
 """
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from ..api.scheduler import current_session_key, run_in_session
 from ..models import (
-    generate_persona_description_from_name, 
-    initialize_chat_session, 
+    resolve_persona,
+    initialize_chat_session,
+    send_chat_message,
     extract_sources_from_response,
-    generate_single_voice_audio
+    generate_single_voice_audio,
+    synthesize_speech_audio,
+    render_room_podcast
 )
-from .voice_settings import render_persona_voice_config
+from .voice_settings import render_persona_voice_config, create_audio_player
+from .common import rerun_fragment, collect_sources
+from ..utils import (
+    start_conversation, persist_messages, get_persona_chat, get_user_memory, ensure_persona_count,
+    MAX_ROOM_SIZE
+)
+from .room_prefetch import (
+    maybe_start_prefetch, take_prefetched_reply, discard_prefetch, render_prefetch_controls
+)
+from .room_autorun import (
+    step_autorun, stop_autorun, render_autorun_controls, render_autorun_progress
+)
+
+# Persona setup and "everyone responds" rounds run one worker per persona
+_room_executor = ThreadPoolExecutor(max_workers=MAX_ROOM_SIZE, thread_name_prefix="persona-room")
+
+NO_TEXT_RESPONSE = "No text in response."
+ROOM_COLUMNS = 3
+
+
+def _persona_columns(count):
+    """Yield a column for each of count personas, ROOM_COLUMNS per row."""
+    for start in range(0, count, ROOM_COLUMNS):
+        yield from st.columns(min(ROOM_COLUMNS, count - start))
+
+
+def _resolve_all_personas(client, personas):
+    """
+    Resolve the description of every persona at once.
+
+    The setup takes as long as the slowest persona rather than the sum of all.
+
+    Args:
+        client: The Gemini API client
+        personas (list): Entries of st.session_state.personas
+    """
+    session_key = current_session_key()
+    futures = {
+        _room_executor.submit(run_in_session, session_key, resolve_persona, client, persona["name"]): persona
+        for persona in personas
+    }
+    for future in as_completed(futures):
+        persona = futures[future]
+        try:
+            description, pack_entry = future.result()
+        except Exception as e:
+            st.error(f"Error generating persona description for {persona['name']}: {e}")
+            continue
+        persona["description"] = description
+        persona["research"] = None
+        if pack_entry and pack_entry.get("voice"):
+            persona["voice"] = pack_entry["voice"]
+            persona["voice_style"] = pack_entry.get("voice_style", "")
+
 
 def render_persona_room_setup(client):
     """
-    Render the UI for setting up a persona room with two personas.
-    
+    Render the UI for setting up a persona room.
+
     Args:
         client: The Gemini API client
-        
+
     Returns:
         bool: True if chat should start, False otherwise
     """
     st.subheader("Define the Personas for the Room")
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("#### Persona 1")
-        p1_room_name_input = st.text_input(
-            "Name for Persona 1",
-            value=st.session_state.persona_1_name,
-            key="persona_1_room_name_text_input",
-        )
-        st.session_state.persona_1_name = p1_room_name_input
-    with col2:
-        st.markdown("#### Persona 2")
-        p2_room_name_input = st.text_input(
-            "Name for Persona 2",
-            value=st.session_state.persona_2_name,
-            key="persona_2_room_name_text_input",
-        )
-        st.session_state.persona_2_name = p2_room_name_input
+    st.session_state.room_size = st.number_input(
+        "Number of personas",
+        min_value=2,
+        max_value=MAX_ROOM_SIZE,
+        value=st.session_state.room_size,
+        key="room_size_input",
+    )
+    ensure_persona_count(st.session_state.room_size)
+    personas = st.session_state.personas
+
+    for index, (persona, col) in enumerate(zip(personas, _persona_columns(len(personas)))):
+        with col:
+            st.markdown(f"#### Persona {index + 1}")
+            persona["name"] = st.text_input(
+                f"Name for Persona {index + 1}",
+                value=persona["name"],
+                key=f"persona_{index + 1}_room_name_text_input",
+            )
 
+    names = [persona["name"] for persona in personas]
     if st.button(
-        "✨ Generate Both Personas",
-        disabled=not (
-            st.session_state.persona_1_name and st.session_state.persona_2_name
-        ),
+        "✨ Generate All Personas",
+        disabled=not all(names),
         key="generate_room_personas_btn",
     ):
-        if st.session_state.persona_1_name:
-            with st.spinner(
-                f"Generating persona description for {
-                    st.session_state.persona_1_name
-                }..."
-            ):
-                st.session_state.persona_1_description = (
-                    generate_persona_description_from_name(
-                        client, st.session_state.persona_1_name
-                    )
-                )
-        if st.session_state.persona_2_name:
-            with st.spinner(
-                f"Generating persona description for {
-                    st.session_state.persona_2_name
-                }..."
-            ):
-                st.session_state.persona_2_description = (
-                    generate_persona_description_from_name(
-                        client, st.session_state.persona_2_name
-                    )
-                )
+        if len(set(names)) < len(names):
+            st.error("Every persona in the room needs a different name.")
+        else:
+            with st.spinner(f"Generating persona descriptions for {', '.join(names)}..."):
+                _resolve_all_personas(client, personas)
 
-    if (
-        st.session_state.persona_1_description
-        and st.session_state.persona_2_description
-    ):
+    if all(persona["description"] for persona in personas):
         if st.session_state.developer_mode:
-            st.subheader("Generated Persona 1 Description:")
-            st.markdown(st.session_state.persona_1_description)
-            st.subheader("Generated Persona 2 Description:")
-            st.markdown(st.session_state.persona_2_description)
-
-        # Voice configuration for both personas
-        col1, col2 = st.columns(2)
-        with col1:
-            render_persona_voice_config(1, st.session_state.persona_1_name, st.session_state.persona_1_description)
-        with col2:
-            render_persona_voice_config(2, st.session_state.persona_2_name, st.session_state.persona_2_description)
+            for index, persona in enumerate(personas):
+                st.subheader(f"Generated Persona {index + 1} Description:")
+                st.markdown(persona["description"])
+
+        # Voice configuration for every persona
+        for index, (persona, col) in enumerate(zip(personas, _persona_columns(len(personas)))):
+            with col:
+                render_persona_voice_config(index, persona["name"], persona["description"])
 
         if st.button(
-            f"👍 Yes, let {st.session_state.persona_1_name} and {
-                st.session_state.persona_2_name
-            } talk!",
+            f"👍 Yes, let {', '.join(names[:-1])} and {names[-1]} talk!",
             key="confirm_room_personas_btn",
         ):
-            st.session_state.persona_1_session = initialize_chat_session(
-                client, st.session_state.persona_1_description
-            )
-            st.session_state.persona_2_session = initialize_chat_session(
-                client, st.session_state.persona_2_description
-            )
+            for persona in personas:
+                persona["session"] = initialize_chat_session(
+                    client, persona["description"], memory=get_user_memory(persona)
+                )
 
-            if (
-                st.session_state.persona_1_session
-                and st.session_state.persona_2_session
-            ):
+            if all(persona["session"] for persona in personas):
                 st.session_state.start_chat = True
                 st.session_state.messages_display = []
                 st.session_state.all_sources = []
+                start_conversation()
                 return True
             else:
                 st.error(
-                    "Failed to initialize chat sessions for one or both personas."
+                    "Failed to initialize chat sessions for one or more personas."
                 )
-    
+
     return False
 
 
+def handle_persona_response(client, persona_index, prompt_text):
+    """
+    Let one persona respond to the last message of the room.
+
+    Args:
+        client: The Gemini API client
+        persona_index (int): Position of the persona in st.session_state.personas
+        prompt_text (str): The last message, which the persona responds to
+    """
+    persona = st.session_state.personas[persona_index]
+    persona_name = persona["name"]
+    with st.spinner(f"{persona_name} is thinking..."):
+        try:
+            # The persona's own chat history is maintained by its session object.
+            audio_data = None
+            prefetched = take_prefetched_reply(persona_index, prompt_text)
+            if prefetched:
+                response, audio_data = prefetched
+            else:
+                response = send_chat_message(persona["session"], prompt_text)
+            model_text = NO_TEXT_RESPONSE
+            sources = []
+            if response:
+                model_text = getattr(response, "text", NO_TEXT_RESPONSE)
+                sources = extract_sources_from_response(response)
+            collect_sources(sources)
+
+            if (
+                st.session_state.voice_enabled
+                and audio_data is None
+                and model_text != NO_TEXT_RESPONSE
+            ):
+                with st.spinner("Generating voice..."):
+                    audio_data = generate_single_voice_audio(
+                        client,
+                        model_text,
+                        persona["voice"],
+                        persona["voice_style"]
+                    )
+
+            if model_text != NO_TEXT_RESPONSE:
+                message = {
+                    "role": persona_name,
+                    "text": model_text,
+                    "sources": sources,
+                    "audio_data": audio_data
+                }
+                st.session_state.messages_display.append(message)
+                st.session_state.last_actor = persona_name
+                st.session_state.last_message_text = model_text
+                persist_messages(message)
+            else:
+                st.warning(f"{persona_name} did not provide a text response.")
+        except Exception as e:
+            st.error(f"Error from {persona_name}: {e}")
+        st.session_state.action_buttons_visible = True
+        rerun_fragment()
+
+
+def _fan_out_reply(client, chat_session, prompt_text, voice):
+    response = send_chat_message(chat_session, prompt_text)
+    text = getattr(response, "text", None) if response else None
+    audio_data = None
+    if voice and text:
+        try:
+            audio_data, _ = synthesize_speech_audio(client, text, *voice)
+        except Exception:
+            # A reply without audio is still worth showing
+            audio_data = None
+    return response, audio_data
+
+
+def handle_everyone_responds(client, persona_indices, prompt_text):
+    """
+    Send the last message to several personas at once and show each reply as soon as it is ready.
+
+    A round takes as long as the slowest persona. Afterwards the next speaker
+    responds to the whole round.
+
+    Args:
+        client: The Gemini API client
+        persona_indices (list): Positions of the responding personas in st.session_state.personas
+        prompt_text (str): The last message, which every persona responds to
+    """
+    discard_prefetch()
+    personas = st.session_state.personas
+    session_key = current_session_key()
+    futures = {}
+    for index in persona_indices:
+        persona = personas[index]
+        voice = (persona["voice"], persona["voice_style"]) if st.session_state.voice_enabled else None
+        future = _room_executor.submit(
+            run_in_session, session_key, _fan_out_reply, client, persona["session"], prompt_text, voice
+        )
+        futures[future] = persona
+
+    round_replies = []
+    with st.spinner(f"{len(futures)} personas are thinking..."):
+        for future in as_completed(futures):
+            persona_name = futures[future]["name"]
+            try:
+                response, audio_data = future.result()
+            except Exception as e:
+                st.error(f"Error from {persona_name}: {e}")
+                continue
+            model_text = getattr(response, "text", None) if response else None
+            if not model_text:
+                st.warning(f"{persona_name} did not provide a text response.")
+                continue
+            sources = extract_sources_from_response(response)
+            collect_sources(sources)
+            message = {
+                "role": persona_name,
+                "text": model_text,
+                "sources": sources,
+                "audio_data": audio_data
+            }
+            with st.chat_message(persona_name):
+                st.markdown(model_text)
+            round_replies.append(message)
+            st.session_state.messages_display.append(message)
+            st.session_state.last_actor = persona_name
+            st.session_state.last_message_text = (
+                model_text if len(round_replies) == 1
+                else "\n\n".join(f"{msg['role']}: {msg['text']}" for msg in round_replies)
+            )
+            persist_messages(message)
+
+    st.session_state.action_buttons_visible = True
+    rerun_fragment()
+
+
 def handle_persona_room_interaction(client):
     """
-    Handle the interaction for the persona room with two personas.
-    
+    Handle the interaction for the persona room.
+
     Args:
         client: The Gemini API client
     """
+    personas = st.session_state.personas
     if (
-        st.session_state.persona_1_session
-        and st.session_state.persona_2_session
-        and st.session_state.persona_1_name
-        and st.session_state.persona_2_name
+        len(personas) >= 2
+        and all(persona["name"] for persona in personas)
+        and all(get_persona_chat(persona, client) for persona in personas)
     ):
         user_prompt = st.chat_input(
             "Your message for the room...", key="room_chat_input"
         )
 
         if user_prompt:
-            st.session_state.messages_display.append(
-                {"role": "User", "text": user_prompt, "sources": []}
-            )
+            user_message = {"role": "User", "text": user_prompt, "sources": []}
+            st.session_state.messages_display.append(user_message)
             st.session_state.last_actor = "User"
             st.session_state.last_message_text = user_prompt
             st.session_state.action_buttons_visible = True
-            st.rerun()
+            persist_messages(user_message)
+            stop_autorun()
+            discard_prefetch()
+            rerun_fragment()
 
-        if (
+        if st.session_state.room_autorun:
+            render_autorun_progress()
+            step_autorun(client)
+        elif (
             st.session_state.action_buttons_visible
             and st.session_state.last_message_text
         ):
             st.markdown("---")
             st.write("Choose who speaks next:")
-            cols = st.columns(2)
-
-            def handle_persona_response(
-                persona_session, persona_name, responding_to_actor_name, prompt_text, persona_num
-            ):
-                with st.spinner(f"{persona_name} is thinking..."):
-                    try:
-                        # The prompt_text is the last message uttered, which the persona will respond to.
-                        # The persona's own chat history is maintained by its session object.
-                        response = persona_session.send_message(prompt_text)
-                        model_text = "No text in response."
-                        sources = []
-                        if response:
-                            model_text = getattr(
-                                response, "text", "No text in response."
-                            )
-                            sources = extract_sources_from_response(response)
-
-                        existing_uris = {s['uri'] for s in st.session_state.all_sources if 'uri' in s}
-                        for src in sources:
-                            if src.get('uri') and src['uri'] not in existing_uris:
-                                st.session_state.all_sources.append(src)
-                                existing_uris.add(src['uri'])
-
-                        audio_data = None
-                        if st.session_state.voice_enabled and model_text != "No text in response.":
-                            with st.spinner("Generating voice..."):
-                                voice_name = getattr(st.session_state, f"persona_{persona_num}_voice", "Zephyr")
-                                voice_style = getattr(st.session_state, f"persona_{persona_num}_voice_style", "")
-                                audio_data = generate_single_voice_audio(
-                                    client,
-                                    model_text,
-                                    voice_name,
-                                    voice_style
-                                )
-
-                        if model_text != "No text in response.":
-                            st.session_state.messages_display.append(
-                                {
-                                    "role": persona_name,
-                                    "text": model_text,
-                                    "sources": sources,
-                                    "audio_data": audio_data
-                                }
-                            )
-                            st.session_state.last_actor = persona_name
-                            st.session_state.last_message_text = model_text
-                        else:
-                            st.warning(
-                                f"{persona_name} did not provide a text response."
-                            )
-                    except Exception as e:
-                        st.error(f"Error from {persona_name}: {e}")
-                    st.session_state.action_buttons_visible = True
-                    st.rerun()
-                    
-            with cols[0]:
-                p1_name = st.session_state.persona_1_name
-                p2_name = st.session_state.persona_2_name
-                if st.session_state.last_actor == "User":
-                    if st.button(
-                        f"Let {p1_name} respond to User",
-                        key="p1_responds_user_btn",
-                        use_container_width=True,
-                    ):
-                        handle_persona_response(
-                            st.session_state.persona_1_session,
-                            p1_name,
-                            "User",
-                            st.session_state.last_message_text,
-                            1
-                        )
-                elif st.session_state.last_actor == p2_name:
+            last_actor = st.session_state.last_actor
+            prompt_text = st.session_state.last_message_text
+            responders = [
+                index for index, persona in enumerate(personas) if persona["name"] != last_actor
+            ]
+            cols = list(_persona_columns(len(responders)))
+            for index, col in zip(responders, cols):
+                with col:
                     if st.button(
-                        f"Let {p1_name} respond to {p2_name}",
-                        key="p1_responds_p2_btn",
+                        f"Let {personas[index]['name']} respond to {last_actor}",
+                        key=f"p{index + 1}_responds_btn",
                         use_container_width=True,
                     ):
-                        handle_persona_response(
-                            st.session_state.persona_1_session,
-                            p1_name,
-                            p2_name,
-                            st.session_state.last_message_text,
-                            1
-                        )
-
-            with cols[1]:
-                if st.session_state.last_actor == "User":
-                    if st.button(
-                        f"Let {p2_name} respond to User",
-                        key="p2_responds_user_btn",
-                        use_container_width=True,
-                    ):
-                        handle_persona_response(
-                            st.session_state.persona_2_session,
-                            p2_name,
-                            "User",
-                            st.session_state.last_message_text,
-                            2
-                        )
-                elif st.session_state.last_actor == p1_name:
-                    if st.button(
-                        f"Let {p2_name} respond to {p1_name}",
-                        key="p2_responds_p1_btn",
-                        use_container_width=True,
-                    ):
-                        handle_persona_response(
-                            st.session_state.persona_2_session,
-                            p2_name,
-                            p1_name,
-                            st.session_state.last_message_text,
-                            2
-                        )
+                        handle_persona_response(client, index, prompt_text)
+
+            if len(responders) > 1 and st.button(
+                f"🗣️ Everyone responds to {last_actor}",
+                key="everyone_responds_btn",
+                use_container_width=True,
+            ):
+                handle_everyone_responds(client, responders, prompt_text)
+
+            maybe_start_prefetch(client)
+
+        if not st.session_state.room_autorun:
+            render_autorun_controls(client)
+        render_prefetch_controls()
+        render_room_podcast_controls(client)
     else:
         st.warning(
             "Chat sessions or persona names are missing for Persona Room.")
-        st.session_state.start_chat = False 
+        st.session_state.start_chat = False
         st.rerun()
+
+
+def render_room_podcast_controls(client):
+    """
+    Render the controls for voicing a span of room turns as one podcast recording.
+
+    Args:
+        client: The Gemini API client
+    """
+    personas = st.session_state.personas
+    names = {persona["name"] for persona in personas}
+    persona_turns = [
+        msg for msg in st.session_state.messages_display
+        if msg["role"] in names
+    ]
+    if not persona_turns:
+        return
+
+    with st.expander("🎙️ Podcast Render", expanded=False):
+        turn_count = len(persona_turns)
+        span = turn_count
+        if turn_count > 1:
+            span = st.slider(
+                "Persona turns to include (most recent):",
+                min_value=1,
+                max_value=turn_count,
+                value=turn_count,
+                key="room_podcast_span",
+            )
+
+        if st.button("Render Podcast", key="room_podcast_btn", use_container_width=True):
+            with st.spinner("Rendering podcast..."):
+                st.session_state.room_podcast_audio = render_room_podcast(
+                    client,
+                    persona_turns[-span:],
+                    [(persona["name"], persona["voice"], persona["voice_style"]) for persona in personas],
+                )
+
+        if st.session_state.room_podcast_audio:
+            st.markdown(
+                create_audio_player(st.session_state.room_podcast_audio), unsafe_allow_html=True
+            )
+            st.download_button(
+                "Download Podcast",
+                data=bytes(st.session_state.room_podcast_audio),
+                file_name="persona_room_podcast.wav",
+                mime="audio/wav",
+                key="room_podcast_download_btn",
+            )
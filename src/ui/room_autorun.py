@@ -0,0 +1,196 @@
+"""
+Auto-converse mode for the Persona Room of Talk-To-Anyone application.
+
+The personas take turns on their own for a set number of turns, or until a
+reply contains the stop phrase. Each fragment run shows one turn, so turns
+appear as they complete and the Stop button takes effect between turns.
+
+Turns are pipelined: as soon as turn k's text arrives, turn k+1 is requested
+in the background while turn k is voiced (and, with auto-play, while it
+plays). A turn is generated on a fork of its persona's chat, which becomes
+the persona's session only once the turn is shown, so stopping never leaves
+an unseen turn in any history.
+"""
+import time
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+
+from ..api.scheduler import Priority, current_session_key, run_in_session
+from ..models import (
+    fork_chat_session,
+    send_chat_message,
+    extract_sources_from_response,
+    generate_single_voice_audio
+)
+from ..utils import persist_messages
+from .common import rerun_fragment, collect_sources
+from .room_prefetch import predict_next_speaker, discard_prefetch
+
+DEFAULT_AUTORUN_TURNS = 6
+MAX_AUTORUN_TURNS = 50
+
+_autorun_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="room-autorun")
+
+
+def _start_turn(persona_index, prompt_text):
+    """
+    Request a persona's reply in the background, on a fork of its chat.
+
+    Returns:
+        dict: persona_index, fork and future of the reply, or None if the fork could not be created
+    """
+    persona = st.session_state.personas[persona_index]
+    fork = fork_chat_session(persona["session"])
+    if fork is None:
+        return None
+    return {
+        "persona_index": persona_index,
+        "fork": fork,
+        "future": _autorun_executor.submit(
+            run_in_session, current_session_key(), send_chat_message, fork, prompt_text, Priority.LIVE_CHAT
+        ),
+    }
+
+
+def start_autorun(client, turns, stop_phrase=""):
+    """
+    Start auto-converse from the last room message.
+
+    Args:
+        client: The Gemini API client
+        turns (int): Maximum number of persona turns
+        stop_phrase (str): Optional phrase that ends the run when a reply contains it
+    """
+    discard_prefetch()
+    pending = _start_turn(predict_next_speaker(), st.session_state.last_message_text)
+    if pending is None:
+        st.error("Failed to start the conversation.")
+        return
+    st.session_state.room_autorun = {
+        "turns": turns,
+        "done": 0,
+        "stop_phrase": stop_phrase.strip().lower(),
+        "pending": pending,
+        "playing_until": 0.0,
+    }
+
+
+def stop_autorun():
+    """
+    Stop auto-converse, dropping the turn in progress.
+    """
+    run = st.session_state.room_autorun
+    if run is None:
+        return
+    st.session_state.room_autorun = None
+    if run["pending"]:
+        # A reply already being generated is discarded with its fork
+        run["pending"]["future"].cancel()
+
+
+def step_autorun(client):
+    """
+    Show the next auto-converse turn, starting the one after it first.
+
+    Blocks until the turn is ready (and, with auto-play, until the previous
+    turn has finished playing), then reruns the fragment.
+
+    Args:
+        client: The Gemini API client
+    """
+    run = st.session_state.room_autorun
+    pending = run["pending"]
+    personas = st.session_state.personas
+    persona = personas[pending["persona_index"]]
+    persona_name = persona["name"]
+
+    with st.spinner(f"{persona_name} is speaking (turn {run['done'] + 1} of {run['turns']})..."):
+        try:
+            response = pending["future"].result()
+        except Exception as e:
+            st.session_state.room_autorun = None
+            st.error(f"Error from {persona_name}: {e}")
+            return
+        model_text = getattr(response, "text", None) if response else None
+        if not model_text:
+            st.session_state.room_autorun = None
+            st.warning(f"{persona_name} did not provide a text response.")
+            return
+
+        run["done"] += 1
+        finished = (
+            run["done"] >= run["turns"]
+            or (run["stop_phrase"] and run["stop_phrase"] in model_text.lower())
+        )
+        # Generate the next turn while this one is voiced and played
+        run["pending"] = None if finished else _start_turn(
+            (pending["persona_index"] + 1) % len(personas), model_text
+        )
+
+        audio_data = None
+        if st.session_state.voice_enabled:
+            audio_data = generate_single_voice_audio(
+                client, model_text, persona["voice"], persona["voice_style"]
+            )
+        if st.session_state.auto_play_voice:
+            time.sleep(max(0.0, run["playing_until"] - time.monotonic()))
+            run["playing_until"] = time.monotonic() + (audio_data.duration_seconds if audio_data else 0.0)
+
+    sources = extract_sources_from_response(response)
+    collect_sources(sources)
+    persona["session"] = pending["fork"]
+    message = {
+        "role": persona_name,
+        "text": model_text,
+        "sources": sources,
+        "audio_data": audio_data
+    }
+    st.session_state.messages_display.append(message)
+    st.session_state.last_actor = persona_name
+    st.session_state.last_message_text = model_text
+    st.session_state.action_buttons_visible = True
+    if finished or run["pending"] is None:
+        st.session_state.room_autorun = None
+    persist_messages(message)
+    rerun_fragment()
+
+
+def render_autorun_controls(client):
+    """
+    Render the auto-converse settings and start button.
+
+    Args:
+        client: The Gemini API client
+    """
+    with st.expander("🔁 Auto-Converse", expanded=False):
+        turns = st.number_input(
+            "Persona turns",
+            min_value=1,
+            max_value=MAX_AUTORUN_TURNS,
+            value=DEFAULT_AUTORUN_TURNS,
+            key="room_autorun_turns_input",
+        )
+        stop_phrase = st.text_input(
+            "Stop early when a reply contains (optional)",
+            key="room_autorun_stop_phrase_input",
+        )
+        if st.button(
+            "▶️ Let them talk",
+            disabled=not st.session_state.last_message_text,
+            key="room_autorun_start_btn",
+            use_container_width=True,
+        ):
+            start_autorun(client, int(turns), stop_phrase)
+            rerun_fragment()
+
+
+def render_autorun_progress():
+    """
+    Render the progress of a running auto-converse and its Stop button.
+    """
+    run = st.session_state.room_autorun
+    st.markdown("---")
+    st.caption(f"Auto-converse: {run['done']} of {run['turns']} turns")
+    if st.button("⏹️ Stop", key="room_autorun_stop_btn", use_container_width=True):
+        stop_autorun()
+        rerun_fragment()
@@ -0,0 +1,168 @@
+"""
+Speculative reply prefetch for the Persona Room of Talk-To-Anyone application.
+
+While the user reads the latest room message, the persona most likely to
+speak next starts answering it on a forked copy of its chat history (and,
+with voice enabled, the reply is voiced too). If the user then lets that
+persona respond, the fork becomes the persona's session and the reply is
+shown at once; any other choice discards the fork, so the real history never
+contains a turn that was not shown. Discarded prefetches count against a
+per-conversation budget, after which prefetching stops.
+"""
+import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
+
+from ..api.scheduler import Priority, current_session_key, run_in_session
+from ..models import (
+    fork_chat_session,
+    send_chat_message,
+    synthesize_speech_audio
+)
+
+_prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="room-prefetch")
+
+
+def predict_next_speaker():
+    """
+    Guess which persona will be asked to speak next.
+
+    Personas usually take turns, so it is the one, other than the last
+    speaker, who has waited longest since speaking (or has not spoken yet).
+
+    Returns:
+        int: Position of the persona in st.session_state.personas
+    """
+    personas = st.session_state.personas
+    candidates = {
+        persona["name"]: index for index, persona in enumerate(personas)
+        if persona["name"] != st.session_state.last_actor
+    }
+    spoken = []
+    for msg in reversed(st.session_state.messages_display):
+        if msg["role"] in candidates and msg["role"] not in spoken:
+            spoken.append(msg["role"])
+            if len(spoken) == len(candidates):
+                break
+    for name, index in candidates.items():
+        if name not in spoken:
+            return index
+    return candidates[spoken[-1]]
+
+
+def _speculate(client, fork, prompt_text, voice):
+    response = send_chat_message(fork, prompt_text, priority=Priority.PERSONA)
+    audio_data = None
+    text = getattr(response, "text", None) if response else None
+    if voice and text:
+        try:
+            # Below the live turn's voice, like the speculative reply itself
+            audio_data, _ = synthesize_speech_audio(client, text, *voice, priority=Priority.PERSONA)
+        except Exception:
+            # The live path voices the reply again if this fails
+            audio_data = None
+    return response, audio_data
+
+
+def discard_prefetch():
+    """
+    Drop the pending prefetch, charging it to the budget if it was not used.
+    """
+    prefetch = st.session_state.room_prefetch
+    if prefetch is None:
+        return
+    st.session_state.room_prefetch = None
+    if not prefetch["future"].cancel():
+        # Already sent upstream, so it cost a call
+        st.session_state.room_prefetch_wasted += 1
+
+
+def maybe_start_prefetch(client):
+    """
+    Start prefetching the likely next reply for the current room state, if
+    speculative mode is on, the budget allows it and it is not running yet.
+
+    Args:
+        client: The Gemini API client
+    """
+    if not st.session_state.room_speculative or not st.session_state.last_message_text:
+        return
+    persona_index = predict_next_speaker()
+    prompt_text = st.session_state.last_message_text
+    prefetch = st.session_state.room_prefetch
+    if prefetch and prefetch["persona_index"] == persona_index and prefetch["prompt"] == prompt_text:
+        return
+    discard_prefetch()
+    if st.session_state.room_prefetch_wasted >= st.session_state.room_prefetch_budget:
+        return
+
+    persona = st.session_state.personas[persona_index]
+    if persona["session"] is None:
+        return
+    fork = fork_chat_session(persona["session"])
+    if fork is None:
+        return
+    voice = None
+    if st.session_state.voice_enabled:
+        voice = (persona["voice"], persona["voice_style"])
+    st.session_state.room_prefetch = {
+        "persona_index": persona_index,
+        "prompt": prompt_text,
+        "fork": fork,
+        "future": _prefetch_executor.submit(
+            run_in_session, current_session_key(), _speculate, client, fork, prompt_text, voice
+        ),
+    }
+
+
+def take_prefetched_reply(persona_index, prompt_text):
+    """
+    Commit the prefetched reply if it was made for this persona and prompt.
+
+    The persona's chat session is replaced by the fork that produced the reply.
+    Any other pending prefetch is discarded.
+
+    Args:
+        persona_index (int): Position of the persona that was asked to respond
+        prompt_text (str): Message it responds to
+
+    Returns:
+        tuple: (response, audio_data), or None if the reply must be requested live
+    """
+    prefetch = st.session_state.room_prefetch
+    if prefetch is None:
+        return None
+    if prefetch["persona_index"] != persona_index or prefetch["prompt"] != prompt_text:
+        discard_prefetch()
+        return None
+
+    st.session_state.room_prefetch = None
+    try:
+        response, audio_data = prefetch["future"].result()
+    except Exception:
+        st.session_state.room_prefetch_wasted += 1
+        return None
+    st.session_state.personas[persona_index]["session"] = prefetch["fork"]
+    return response, audio_data
+
+
+def render_prefetch_controls():
+    """
+    Render the speculative mode toggle and its budget.
+    """
+    with st.expander("⚡ Speculative Replies", expanded=False):
+        st.session_state.room_speculative = st.toggle(
+            "Prepare the next reply while I read",
+            value=st.session_state.room_speculative,
+            key="room_speculative_toggle",
+            help="Starts the likely next speaker's reply in advance. Unused replies still cost an API call.",
+        )
+        st.session_state.room_prefetch_budget = st.number_input(
+            "Unused replies allowed per conversation",
+            min_value=0,
+            max_value=100,
+            value=st.session_state.room_prefetch_budget,
+            key="room_prefetch_budget_input",
+        )
+        st.caption(
+            f"Unused so far: {st.session_state.room_prefetch_wasted} / {st.session_state.room_prefetch_budget}"
+        )
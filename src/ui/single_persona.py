@@ -3,12 +3,18 @@ Single Persona Chat UI components for Talk-To-Anyone application.
 """
 import streamlit as st
 from ..models import (
-    generate_persona_description_from_name, 
+    resolve_persona_description, 
     initialize_chat_session, 
+    send_chat_message,
     extract_sources_from_response,
     generate_single_voice_audio
 )
 from .voice_settings import render_persona_voice_config, create_audio_player
+from .common import rerun_fragment, collect_sources
+from .batch_interview import render_batch_interview
+from ..utils import (
+    start_conversation, persist_messages, get_persona_chat, get_user_memory, ensure_persona_count
+)
 
 def render_persona_setup(client):
     """
@@ -20,45 +26,53 @@ def render_persona_setup(client):
     Returns:
         bool: True if chat should start, False otherwise
     """
+    ensure_persona_count(1)
+    persona = st.session_state.personas[0]
     st.subheader("Who do you want to talk to?")
     p1_name_input = st.text_input(
         "E.g., Albert Einstein, a futuristic AI assistant, a pirate captain",
-        value=st.session_state.persona_1_name,
+        value=persona["name"],
         key="persona_1_name_text_input",
     )
-    st.session_state.persona_1_name = p1_name_input
+    persona["name"] = p1_name_input
 
     if st.button(
         "✨ Generate Persona",
-        disabled=not st.session_state.persona_1_name,
+        disabled=not persona["name"],
         key="generate_single_persona_btn",
     ):
         with st.spinner(
-            f"Generating persona description for {st.session_state.persona_1_name}..."
+            f"Generating persona description for {persona['name']}..."
         ):
-            st.session_state.persona_1_description = generate_persona_description_from_name(
-                client, st.session_state.persona_1_name
+            description, pack_entry = resolve_persona_description(
+                client, persona["name"]
             )
+            persona["description"] = description
+            persona["research"] = None
+            if pack_entry and pack_entry.get("voice"):
+                persona["voice"] = pack_entry["voice"]
+                persona["voice_style"] = pack_entry.get("voice_style", "")
 
-    if st.session_state.persona_1_description:
+    if persona["description"]:
         if st.session_state.developer_mode:
             st.subheader("Generated Persona Description (System Prompt):")
-            st.markdown(st.session_state.persona_1_description)
+            st.markdown(persona["description"])
 
         # Voice configuration
-        render_persona_voice_config(1, st.session_state.persona_1_name, st.session_state.persona_1_description)
+        render_persona_voice_config(0, persona["name"], persona["description"])
 
         if st.button(
-            f"👍 Yes, I want to talk to {st.session_state.persona_1_name}!",
+            f"👍 Yes, I want to talk to {persona['name']}!",
             key="confirm_single_persona_btn",
         ):
-            st.session_state.persona_1_session = initialize_chat_session(
-                client, st.session_state.persona_1_description
+            persona["session"] = initialize_chat_session(
+                client, persona["description"], memory=get_user_memory(persona)
             )
-            if st.session_state.persona_1_session:
+            if persona["session"]:
                 st.session_state.start_chat = True
                 st.session_state.messages_display = []
                 st.session_state.all_sources = []
+                start_conversation()
                 return True
             else:
                 st.error("Failed to initialize chat session for persona.")
@@ -73,22 +87,22 @@ def handle_chat_interaction(client):
     Args:
         client: The Gemini API client
     """
-    if st.session_state.persona_1_session and st.session_state.persona_1_name:
+    persona = st.session_state.personas[0]
+    if persona["name"] and get_persona_chat(persona, client):
         user_prompt = st.chat_input(
-            f"Talk to {st.session_state.persona_1_name}...", key="single_chat_input"
+            f"Talk to {persona['name']}...", key="single_chat_input"
         )
 
         if user_prompt:
-            st.session_state.messages_display.append(
-                {"role": "User", "text": user_prompt, "sources": []}
-            )
+            user_message = {"role": "User", "text": user_prompt, "sources": []}
+            st.session_state.messages_display.append(user_message)
             with st.chat_message("User"):
                 st.markdown(user_prompt)
 
-            with st.spinner(f"{st.session_state.persona_1_name} is thinking..."):
+            with st.spinner(f"{persona['name']} is thinking..."):
                 try:
-                    response = st.session_state.persona_1_session.send_message(
-                        user_prompt
+                    response = send_chat_message(
+                        persona["session"], user_prompt
                     )
                     if response is None:
                         st.error("Received no response from Gemini.")
@@ -98,7 +112,7 @@ def handle_chat_interaction(client):
                             == "User"
                         ):
                             st.session_state.messages_display.pop()
-                        st.rerun()
+                        rerun_fragment()
                     else:
                         model_response_text = (
                             response.text
@@ -107,12 +121,7 @@ def handle_chat_interaction(client):
                             else "No text in response."
                         )
                         sources = extract_sources_from_response(response)
-                        
-                        existing_uris = {s['uri'] for s in st.session_state.all_sources if 'uri' in s}
-                        for src in sources:
-                            if src.get('uri') and src['uri'] not in existing_uris:
-                                st.session_state.all_sources.append(src)
-                                existing_uris.add(src['uri'])
+                        collect_sources(sources)
                         
                         # Generate voice audio if enabled
                         audio_data = None
@@ -121,18 +130,19 @@ def handle_chat_interaction(client):
                                 audio_data = generate_single_voice_audio(
                                     client,
                                     model_response_text,
-                                    st.session_state.persona_1_voice,
-                                    st.session_state.persona_1_voice_style
+                                    persona["voice"],
+                                    persona["voice_style"]
                                 )
                                 
                         message = {
-                            "role": st.session_state.persona_1_name,
+                            "role": persona["name"],
                             "text": model_response_text,
                             "sources": sources,
                             "audio_data": audio_data
                         }
                         st.session_state.messages_display.append(message)
-                        st.rerun()
+                        persist_messages(user_message, message)
+                        rerun_fragment()
                 except Exception as e:
                     st.error(f"Error getting response from Gemini: {e}")
                     if (
@@ -140,6 +150,8 @@ def handle_chat_interaction(client):
                         and st.session_state.messages_display[-1]["role"] == "User"
                     ):
                         st.session_state.messages_display.pop()
+
+        render_batch_interview(client)
     else:
         st.warning(
             "Chat session or persona name is missing for Single Persona Chat."
@@ -4,20 +4,35 @@ Voice settings UI components for Talk-To-Anyone application.
 import streamlit as st
 import base64
 from ..models.voice import (
-    VOICE_OPTIONS, SUPPORTED_LANGUAGES, get_voices_by_gender,
-    generate_single_voice_audio, get_voice_style_suggestions
+    VOICE_CATALOG, SUPPORTED_LANGUAGES,
+    get_voice_style_suggestions, detect_persona_gender
 )
+from ..models.voice_samples import DEFAULT_PREVIEW_TEXT, get_voice_preview
 
-def render_voice_settings():
+LANGUAGE_NAMES = tuple(SUPPORTED_LANGUAGES)
+PERSONA_LANGUAGE_OPTIONS = ("Auto (Global Setting)",) + LANGUAGE_NAMES
+
+@st.fragment
+def render_voice_settings(client):
     """
-    Render voice settings in the sidebar.
+    Render voice settings panel; call it inside `with st.sidebar:`.
+    
+    The panel is a fragment, so previews and filters rerun only the panel.
+    Toggling voice on or off reruns the whole app because the persona setup
+    screens depend on it.
+    
+    Args:
+        client: The Gemini API client, used when a preview is not in the sample bank
     """
-    with st.sidebar.expander("🎵 Voice Settings", expanded=False):
-        st.session_state.voice_enabled = st.toggle(
+    with st.expander("🎵 Voice Settings", expanded=False):
+        voice_enabled = st.toggle(
             "Enable Voice Personas", 
             value=st.session_state.voice_enabled,
             help="Generate audio for persona responses using TTS"
         )
+        if voice_enabled != st.session_state.voice_enabled:
+            st.session_state.voice_enabled = voice_enabled
+            st.rerun()
         
         if st.session_state.voice_enabled:
             st.session_state.auto_play_voice = st.toggle(
@@ -32,8 +47,8 @@ def render_voice_settings():
                 
             st.session_state.preferred_language = st.selectbox(
                 "Preferred Language:",
-                options=list(SUPPORTED_LANGUAGES.keys()),
-                index=list(SUPPORTED_LANGUAGES.keys()).index(st.session_state.preferred_language) 
+                options=LANGUAGE_NAMES,
+                index=LANGUAGE_NAMES.index(st.session_state.preferred_language) 
                       if st.session_state.preferred_language in SUPPORTED_LANGUAGES else 0,
                 help="Language for voice generation (auto-detected if not specified)"
             )
@@ -47,59 +62,58 @@ def render_voice_settings():
             )
             
             filter_map = {"All": None, "Male": "male", "Female": "female", "Neutral": "neutral"}
-            filtered_voices = get_voices_by_gender(filter_map[gender_filter])
             
             preview_voice = st.selectbox(
                 "Test a voice:",
-                options=list(filtered_voices.keys()),
-                format_func=lambda x: f"{x} ({filtered_voices[x]['style']}) - {filtered_voices[x]['gender'].title()}",
+                options=VOICE_CATALOG.names(gender=filter_map[gender_filter]),
+                format_func=lambda x: f"{x} ({VOICE_CATALOG[x].style}) - {VOICE_CATALOG[x].gender.title()}",
                 key="voice_preview_select"
             )
             
             preview_text = st.text_input(
                 "Preview text:",
-                value="Hello! This is how I sound.",
+                value=DEFAULT_PREVIEW_TEXT,
                 key="voice_preview_text"
             )
             
-            if st.button("🔊 Play Preview", key="voice_preview_btn"):
+            if st.button("🔊 Play Preview", key="voice_preview_btn") and preview_voice:
                 with st.spinner("Generating voice preview..."):
-                    from ..api import initialize_api
-                    client, _ = initialize_api()
-                    if client:
-                        language_hint = st.session_state.preferred_language if st.session_state.preferred_language != "English (US)" else ""
-                        audio_data = generate_single_voice_audio(
-                            client, preview_text, preview_voice, language_hint=language_hint
+                    try:
+                        audio_data = get_voice_preview(
+                            client, preview_voice, preview_text, st.session_state.preferred_language
                         )
-                        if audio_data:
-                            audio_b64 = base64.b64encode(audio_data).decode()
-                            st.audio(f"data:audio/wav;base64,{audio_b64}")
+                    except Exception as e:
+                        st.error(f"Error generating voice audio: {e}")
+                        audio_data = None
+                    if audio_data:
+                        audio_b64 = base64.b64encode(audio_data).decode("ascii")
+                        st.audio(f"data:audio/wav;base64,{audio_b64}")
 
-def render_persona_voice_config(persona_num, persona_name, persona_description):
+def render_persona_voice_config(persona_index, persona_name, persona_description):
     """
     Render voice configuration for a specific persona with enhanced suggestions.
     
     Args:
-        persona_num (int): Persona number (1 or 2)
+        persona_index (int): Position of the persona in st.session_state.personas
         persona_name (str): Name of the persona
         persona_description (str): Description of the persona
     """
     if not st.session_state.voice_enabled:
         return
     
-    voice_key = f"persona_{persona_num}_voice"
-    style_key = f"persona_{persona_num}_voice_style"
+    persona = st.session_state.personas[persona_index]
+    persona_num = persona_index + 1
     
     st.markdown(f"**🎵 Voice for {persona_name}:**")
     
     # Auto-suggest voice based on description
     if persona_description and st.button(f"🎯 Smart Voice Suggestion for {persona_name}", key=f"suggest_voice_{persona_num}"):
         suggestion = get_voice_style_suggestions(persona_description)
-        st.session_state[voice_key] = suggestion["voice"]
-        st.session_state[style_key] = suggestion["style"]
+        persona["voice"] = suggestion["voice"]
+        persona["voice_style"] = suggestion["style"]
         
         # Show detailed suggestion info
-        st.success(f"✨ **Suggested:** {suggestion['voice']} ({VOICE_OPTIONS[suggestion['voice']]['style']})")
+        st.success(f"✨ **Suggested:** {suggestion['voice']} ({VOICE_CATALOG[suggestion['voice']].style})")
         st.info(f"**Reason:** {suggestion['reason']} (Detected: {suggestion['gender']})")
         
         # Show alternatives
@@ -107,14 +121,13 @@ def render_persona_voice_config(persona_num, persona_name, persona_description):
             with st.expander("🔄 Alternative Suggestions"):
                 for i, alt in enumerate(suggestion['alternatives']):
                     if st.button(f"{alt['voice']} - {alt['reason']}", key=f"alt_voice_{persona_num}_{i}"):
-                        st.session_state[voice_key] = alt["voice"]
-                        st.session_state[style_key] = alt["style"]
+                        persona["voice"] = alt["voice"]
+                        persona["voice_style"] = alt["style"]
                         st.rerun()
     
     # Gender-based voice filtering
     detected_gender = "neutral"
     if persona_description:
-        from ..models.voice import detect_persona_gender
         detected_gender = detect_persona_gender(persona_description)
     
     gender_filter = st.selectbox(
@@ -125,30 +138,31 @@ def render_persona_voice_config(persona_num, persona_name, persona_description):
         help=f"Auto-detected: {detected_gender.title()}"
     )
     
-    # Get filtered voices
+    # Get filtered voices (a neutral persona can use any voice)
     if gender_filter == "Auto-detect":
-        available_voices = get_voices_by_gender(detected_gender)
+        voice_gender = None if detected_gender == "neutral" else detected_gender
     elif gender_filter == "All":
-        available_voices = VOICE_OPTIONS
+        voice_gender = None
     else:
-        available_voices = get_voices_by_gender(gender_filter.lower())
+        voice_gender = gender_filter.lower()
+    available_voices = VOICE_CATALOG.names(gender=voice_gender)
     
     # Voice selection
-    current_voice = getattr(st.session_state, voice_key, "Zephyr")
+    current_voice = persona["voice"]
     if current_voice not in available_voices:
-        current_voice = list(available_voices.keys())[0] if available_voices else "Zephyr"
+        current_voice = available_voices[0] if available_voices else "Zephyr"
         
     selected_voice = st.selectbox(
         f"Voice for {persona_name}:",
-        options=list(available_voices.keys()),
-        index=list(available_voices.keys()).index(current_voice) if current_voice in available_voices else 0,
-        format_func=lambda x: f"{x} ({available_voices[x]['style']}) - {available_voices[x]['personality']}",
+        options=available_voices,
+        index=available_voices.index(current_voice) if current_voice in available_voices else 0,
+        format_func=lambda x: f"{x} ({VOICE_CATALOG[x].style}) - {VOICE_CATALOG[x].personality}",
         key=f"voice_select_{persona_num}"
     )
-    setattr(st.session_state, voice_key, selected_voice)
+    persona["voice"] = selected_voice
     
     # Style prompt
-    current_style = getattr(st.session_state, style_key, "")
+    current_style = persona["voice_style"]
     style_prompt = st.text_area(
         f"Speaking style for {persona_name}:",
         value=current_style,
@@ -156,28 +170,23 @@ def render_persona_voice_config(persona_num, persona_name, persona_description):
         key=f"style_input_{persona_num}",
         height=80
     )
-    setattr(st.session_state, style_key, style_prompt)
-    
-    persona_lang_key = f"persona_{persona_num}_language"
-    if persona_lang_key not in st.session_state:
-        st.session_state[persona_lang_key] = "Auto (Global Setting)"
+    persona["voice_style"] = style_prompt
     
-    language_options = ["Auto (Global Setting)"] + list(SUPPORTED_LANGUAGES.keys())
     selected_language = st.selectbox(
         f"Language override for {persona_name}:",
-        options=language_options,
-        index=language_options.index(getattr(st.session_state, persona_lang_key, "Auto (Global Setting)")),
+        options=PERSONA_LANGUAGE_OPTIONS,
+        index=PERSONA_LANGUAGE_OPTIONS.index(persona["language"]),
         key=f"language_select_{persona_num}",
         help="Override global language setting for this persona"
     )
-    setattr(st.session_state, persona_lang_key, selected_language)
+    persona["language"] = selected_language
 
 def create_audio_player(audio_data, auto_play=False):
     """
     Create an audio player for the generated speech.
     
     Args:
-        audio_data (bytes): Wave file data
+        audio_data (bytes): Wave file data (bytes or AudioBuffer)
         auto_play (bool): Whether to auto-play the audio
         
     Returns:
@@ -186,7 +195,8 @@ def create_audio_player(audio_data, auto_play=False):
     if not audio_data:
         return ""
     
-    audio_b64 = base64.b64encode(audio_data).decode()
+    # b64encode reads bytes-like buffers directly, so no intermediate bytes copy is made
+    audio_b64 = base64.b64encode(audio_data).decode("ascii")
     autoplay_attr = "autoplay" if auto_play else ""
     
     return f"""
@@ -1,4 +1,16 @@
 """
 Utilities package for Talk-To-Anyone application.
 """
-from .session import initialize_session_state, reset_chat_state, export_chat_state, import_chat_state
+from .session import (
+    initialize_session_state, reset_chat_state, export_chat_state, import_chat_state,
+    start_conversation, persist_messages, load_older_messages, resume_conversation, delete_conversation,
+    get_persona_chat, save_session_snapshot, restore_conversation_from_query_params,
+    new_persona_state, ensure_persona_count, get_user_memory, set_memory_enabled, remember_conversation,
+    MAX_ROOM_SIZE, TRANSCRIPT_WINDOW
+)
+from .conversation_store import (
+    ConversationStore, get_conversation_store, build_search_query, SEARCH_PAGE_SIZE
+)
+from .session_store import SessionStore, SQLiteSessionStore, FileSessionStore, get_session_store
+from .memory_store import MemoryStore, PersonaMemory, get_memory_store
+from .identity import get_owner_key, get_signed_in_account
@@ -0,0 +1,448 @@
+"""
+Persistent conversation store for Talk-To-Anyone application.
+
+Conversations are kept in a local SQLite database in WAL mode, so a browser
+refresh or server restart no longer loses the chat. Messages are written one
+turn at a time as they complete and read back in pages, so a session only
+holds the part of the transcript it is showing. Audio is stored in its own
+table and only read together with the page that shows it.
+
+Message text, speaker, persona names and source titles are also kept in an
+FTS5 index that is updated in the same transaction as each turn, so saved
+conversations can be searched without opening them.
+
+Every conversation belongs to an owner (see utils.identity) and can only be
+listed or opened by that owner.
+"""
+import os
+import re
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[2] / ".cache" / "conversations.db"
+MESSAGE_PAGE_SIZE = 30
+SEARCH_PAGE_SIZE = 10
+# Bumped when a migration has to run on an existing database
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    owner TEXT,
+    chat_mode TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    voice_enabled INTEGER NOT NULL DEFAULT 0,
+    auto_play_voice INTEGER NOT NULL DEFAULT 1,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations (updated_at DESC);
+
+CREATE TABLE IF NOT EXISTS personas (
+    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    voice TEXT,
+    voice_style TEXT,
+    PRIMARY KEY (conversation_id, slot)
+);
+
+CREATE TABLE IF NOT EXISTS audio_blobs (
+    id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL,
+    audio_id INTEGER REFERENCES audio_blobs (id),
+    created_at REAL NOT NULL,
+    UNIQUE (conversation_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS sources (
+    message_id INTEGER NOT NULL REFERENCES messages (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    uri TEXT NOT NULL,
+    title TEXT,
+    PRIMARY KEY (message_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_sources_uri ON sources (uri);
+
+-- rowid is messages.id; "personas" holds the conversation title (persona names)
+CREATE VIRTUAL TABLE IF NOT EXISTS message_search USING fts5 (
+    text, speaker, personas, sources,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+# Speaker and persona name hits rank above body text, source titles below it
+_SEARCH_RANK = "bm25(1.0, 2.0, 2.0, 0.5)"
+
+
+def get_conversation_db_path():
+    """
+    Get the conversation database path.
+
+    Returns:
+        Path: CONVERSATION_DB_PATH from the environment, or .cache/conversations.db in the project root
+    """
+    return Path(os.getenv("CONVERSATION_DB_PATH") or DEFAULT_DB_PATH)
+
+
+class ConversationStore:
+    """
+    SQLite-backed store of conversations, personas, messages, sources and audio.
+
+    One connection is shared by all Streamlit sessions of the process; writes
+    are serialized through a lock and each turn is committed on its own.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._conn.commit()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Index messages stored before the search index existed
+            self._conn.execute(
+                "INSERT INTO message_search (message_search, rank) VALUES ('rank', ?)", (_SEARCH_RANK,)
+            )
+            self._conn.execute(
+                "INSERT INTO message_search (rowid, text, speaker, personas, sources) "
+                "SELECT m.id, m.text, m.role, c.title, "
+                "COALESCE((SELECT group_concat(s.title, ' ') FROM sources s WHERE s.message_id = m.id), '') "
+                "FROM messages m JOIN conversations c ON c.id = m.conversation_id "
+                "WHERE m.id NOT IN (SELECT rowid FROM message_search)"
+            )
+        if version < 2:
+            # Conversations stored before owners existed stay without one, so nobody can open them
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(conversations)")}
+            if "owner" not in columns:
+                self._conn.execute("ALTER TABLE conversations ADD COLUMN owner TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_conversations_owner ON conversations (owner, updated_at DESC)"
+        )
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def create_conversation(self, owner, chat_mode, personas, voice_enabled=False, auto_play_voice=True):
+        """
+        Create a new conversation.
+
+        Args:
+            owner (str): Owner key of the visitor, see get_owner_key
+            chat_mode (str): "Single Persona Chat" or "Persona Room"
+            personas (list): Persona dicts with name, description, voice and voice_style, in slot order
+            voice_enabled (bool): Voice setting at creation
+            auto_play_voice (bool): Auto-play setting at creation
+
+        Returns:
+            str: The conversation ID
+        """
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        title = " & ".join(p["name"] for p in personas if p.get("name"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO conversations "
+                "(id, owner, chat_mode, title, voice_enabled, auto_play_voice, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (conversation_id, owner, chat_mode, title, int(voice_enabled), int(auto_play_voice), now, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO personas (conversation_id, slot, name, description, voice, voice_style) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (conversation_id, slot, p.get("name", ""), p.get("description"),
+                     p.get("voice"), p.get("voice_style"))
+                    for slot, p in enumerate(personas, start=1)
+                ],
+            )
+        return conversation_id
+
+    def append_messages(self, conversation_id, messages):
+        """
+        Append completed messages to a conversation in one transaction.
+
+        Args:
+            conversation_id (str): The conversation
+            messages (list): Message dicts with role, text and optional sources and audio_data
+
+        Returns:
+            int: Number of messages in the conversation afterwards
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE conversation_id = ?",
+                (conversation_id,),
+            ).fetchone()
+            seq = row[0]
+            title = self._conn.execute(
+                "SELECT title FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()[0]
+            for msg in messages:
+                audio_id = None
+                if msg.get("audio_data"):
+                    audio_id = self._conn.execute(
+                        "INSERT INTO audio_blobs (data) VALUES (?)", (bytes(msg["audio_data"]),)
+                    ).lastrowid
+                message_id = self._conn.execute(
+                    "INSERT INTO messages (conversation_id, seq, role, text, audio_id, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (conversation_id, seq, msg["role"], msg["text"], audio_id, now),
+                ).lastrowid
+                sources = [src for src in msg.get("sources") or [] if src.get("uri")]
+                self._conn.executemany(
+                    "INSERT INTO sources (message_id, position, uri, title) VALUES (?, ?, ?, ?)",
+                    [
+                        (message_id, position, src["uri"], src.get("title"))
+                        for position, src in enumerate(sources)
+                    ],
+                )
+                self._conn.execute(
+                    "INSERT INTO message_search (rowid, text, speaker, personas, sources) VALUES (?, ?, ?, ?, ?)",
+                    (message_id, msg["text"], msg["role"], title,
+                     " ".join(src.get("title") or "" for src in sources)),
+                )
+                seq += 1
+            self._conn.execute(
+                "UPDATE conversations SET updated_at = ? WHERE id = ?", (now, conversation_id)
+            )
+        return seq
+
+    def get_conversation(self, conversation_id, owner):
+        """
+        Get a conversation's settings and personas.
+
+        Args:
+            conversation_id (str): The conversation
+            owner (str): Owner key of the visitor asking for it
+
+        Returns:
+            dict: Conversation fields plus "personas" (slot -> persona dict) and
+                "message_count", or None if the ID is unknown or belongs to someone else
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM conversations WHERE id = ? AND owner = ?", (conversation_id, owner)
+            ).fetchone()
+            if row is None:
+                return None
+            personas = self._conn.execute(
+                "SELECT slot, name, description, voice, voice_style FROM personas "
+                "WHERE conversation_id = ? ORDER BY slot",
+                (conversation_id,),
+            ).fetchall()
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()[0]
+        conversation = dict(row)
+        conversation["voice_enabled"] = bool(conversation["voice_enabled"])
+        conversation["auto_play_voice"] = bool(conversation["auto_play_voice"])
+        conversation["personas"] = {
+            p["slot"]: {key: p[key] for key in ("name", "description", "voice", "voice_style")}
+            for p in personas
+        }
+        conversation["message_count"] = count
+        return conversation
+
+    def load_messages(self, conversation_id, before_seq=None, limit=MESSAGE_PAGE_SIZE):
+        """
+        Load a page of messages, the newest ones first when before_seq is None.
+
+        Args:
+            conversation_id (str): The conversation
+            before_seq (int): Only load messages before this position
+            limit (int): Page size, or None for every remaining message
+
+        Returns:
+            list: Message dicts in conversation order
+        """
+        query = (
+            "SELECT m.id, m.role, m.text, a.data AS audio_data FROM messages m "
+            "LEFT JOIN audio_blobs a ON a.id = m.audio_id "
+            "WHERE m.conversation_id = ? AND m.seq < ? ORDER BY m.seq DESC"
+        )
+        params = [conversation_id, before_seq if before_seq is not None else 2 ** 62]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            sources = {}
+            if rows:
+                placeholders = ",".join("?" * len(rows))
+                for src in self._conn.execute(
+                    f"SELECT message_id, uri, title FROM sources WHERE message_id IN ({placeholders}) "
+                    "ORDER BY message_id, position",
+                    [r["id"] for r in rows],
+                ):
+                    sources.setdefault(src["message_id"], []).append(
+                        {"uri": src["uri"], "title": src["title"] or "Source"}
+                    )
+        return [
+            {
+                "role": r["role"],
+                "text": r["text"],
+                "sources": sources.get(r["id"], []),
+                "audio_data": r["audio_data"],
+            }
+            for r in reversed(rows)
+        ]
+
+    def load_sources(self, conversation_id):
+        """
+        Get the distinct sources cited anywhere in a conversation.
+
+        Args:
+            conversation_id (str): The conversation
+
+        Returns:
+            list: Source dicts with uri and title, in order of first citation
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.uri, s.title FROM sources s JOIN messages m ON m.id = s.message_id "
+                "WHERE m.conversation_id = ? ORDER BY m.seq, s.position",
+                (conversation_id,),
+            ).fetchall()
+        seen = {}
+        for row in rows:
+            seen.setdefault(row["uri"], {"uri": row["uri"], "title": row["title"] or "Source"})
+        return list(seen.values())
+
+    def list_conversations(self, owner, limit=20):
+        """
+        List an owner's most recently updated conversations.
+
+        Args:
+            owner (str): Owner key of the visitor
+            limit (int): Maximum number of conversations
+
+        Returns:
+            list: Dicts with id, title, chat_mode and updated_at
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, title, chat_mode, updated_at FROM conversations "
+                "WHERE owner = ? ORDER BY updated_at DESC LIMIT ?",
+                (owner, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search_messages(self, query, owner, limit=SEARCH_PAGE_SIZE, offset=0):
+        """
+        Search the messages of an owner's conversations, best matches first.
+
+        Args:
+            query (str): Free text; every word must match, the last one as a prefix
+            owner (str): Owner key of the visitor
+            limit (int): Page size
+            offset (int): Number of results to skip
+
+        Returns:
+            list: Dicts with conversation_id, title, chat_mode, seq, role and a
+                snippet of the message text with matches in bold
+        """
+        match = build_search_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT m.conversation_id, c.title, c.chat_mode, m.seq, m.role, "
+                "snippet(message_search, 0, '**', '**', '…', 16) AS snippet "
+                "FROM message_search JOIN messages m ON m.id = message_search.rowid "
+                "JOIN conversations c ON c.id = m.conversation_id "
+                "WHERE message_search MATCH ? AND c.owner = ? ORDER BY rank LIMIT ? OFFSET ?",
+                (match, owner, limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_conversation(self, conversation_id, owner):
+        """
+        Delete a conversation with its personas, messages, sources and audio.
+
+        Args:
+            conversation_id (str): The conversation
+            owner (str): Owner key of the visitor deleting it
+
+        Returns:
+            bool: True if it was deleted, False if the ID is unknown or belongs to someone else
+        """
+        with self._lock, self._conn:
+            if self._conn.execute(
+                "SELECT 1 FROM conversations WHERE id = ? AND owner = ?", (conversation_id, owner)
+            ).fetchone() is None:
+                return False
+            audio_ids = [
+                (row[0],) for row in self._conn.execute(
+                    "SELECT audio_id FROM messages WHERE conversation_id = ? AND audio_id IS NOT NULL",
+                    (conversation_id,),
+                )
+            ]
+            self._conn.execute(
+                "DELETE FROM message_search WHERE rowid IN (SELECT id FROM messages WHERE conversation_id = ?)",
+                (conversation_id,),
+            )
+            self._conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
+            self._conn.executemany("DELETE FROM audio_blobs WHERE id = ?", audio_ids)
+        return True
+
+
+def build_search_query(text):
+    """
+    Turn free text into an FTS5 query that cannot fail to parse.
+
+    Args:
+        text (str): Text typed by the user
+
+    Returns:
+        str: The MATCH expression, empty if the text has no searchable words
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_conversation_store(path=None):
+    """
+    Get the process-wide store for a database path, opening it on first use.
+
+    Args:
+        path (str or Path): Optional database path, defaults to get_conversation_db_path()
+
+    Returns:
+        ConversationStore: The store
+    """
+    path = Path(path) if path else get_conversation_db_path()
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ConversationStore(path)
+        return store
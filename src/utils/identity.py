@@ -0,0 +1,130 @@
+"""
+Visitor identity for Talk-To-Anyone application.
+
+Saved conversations and long-term memories belong to an owner. A visitor
+signed in through Streamlit authentication (st.login) is identified by their
+account. Anyone else gets a random owner token issued by the server and
+signed with OWNER_TOKEN_SECRET; it is carried in the page URL, so a refresh
+or another app worker keeps it, and the link is the key to that visitor's
+data. A token the server did not sign is ignored and replaced, so an owner
+cannot be chosen by typing a name.
+
+Without OWNER_TOKEN_SECRET a random secret is kept in .cache/owner_secret,
+which only workers on the same host share.
+"""
+import os
+import hmac
+import hashlib
+import secrets
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+OWNER_QUERY_PARAM = "owner"
+DEFAULT_SECRET_PATH = Path(__file__).resolve().parents[2] / ".cache" / "owner_secret"
+
+_secret = None
+_secret_lock = threading.Lock()
+
+
+def _get_secret():
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            configured = os.getenv("OWNER_TOKEN_SECRET")
+            if configured:
+                _secret = configured.encode("utf-8")
+            else:
+                _secret = _load_or_create_secret(DEFAULT_SECRET_PATH)
+        return _secret
+
+
+def _load_or_create_secret(path):
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    secret = secrets.token_bytes(32)
+    try:
+        # O_EXCL: if another worker created it first, use theirs
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return path.read_bytes()
+    with os.fdopen(fd, "wb") as f:
+        f.write(secret)
+    return secret
+
+
+def _sign(nonce):
+    return hmac.new(_get_secret(), nonce.encode("utf-8"), hashlib.sha256).hexdigest()[:32]
+
+
+def issue_owner_token():
+    """
+    Issue a new signed owner token.
+
+    Returns:
+        str: "<nonce>.<signature>"
+    """
+    nonce = secrets.token_urlsafe(18)
+    return f"{nonce}.{_sign(nonce)}"
+
+
+def verify_owner_token(token):
+    """
+    Check that an owner token was issued by this server.
+
+    Args:
+        token (str): Token from the page URL
+
+    Returns:
+        bool: True if the signature matches
+    """
+    nonce, _, signature = (token or "").partition(".")
+    return bool(nonce and signature) and hmac.compare_digest(_sign(nonce), signature)
+
+
+def get_signed_in_account():
+    """
+    Get the account of a visitor signed in through Streamlit authentication.
+
+    Returns:
+        str: The account's email (or subject), or None if nobody is signed in
+    """
+    try:
+        if not st.user.get("is_logged_in"):
+            return None
+        return st.user.get("email") or st.user.get("sub")
+    except Exception:
+        # Authentication is not configured
+        return None
+
+
+def init_owner():
+    """
+    Set up the visitor's owner token and keep it in the page URL.
+
+    Signed-in visitors are identified by their account and get no token in the URL.
+    """
+    if "owner_token" not in st.session_state:
+        token = st.query_params.get(OWNER_QUERY_PARAM)
+        st.session_state.owner_token = token if verify_owner_token(token) else issue_owner_token()
+    if get_signed_in_account():
+        return
+    if st.query_params.get(OWNER_QUERY_PARAM) != st.session_state.owner_token:
+        st.query_params[OWNER_QUERY_PARAM] = st.session_state.owner_token
+
+
+def get_owner_key():
+    """
+    Get the key that the visitor's conversations and memories are stored under.
+
+    Returns:
+        str: Hex digest of the signed-in account or the owner token; the
+            token itself is never stored
+    """
+    account = get_signed_in_account()
+    owner = f"account:{account}" if account else f"token:{st.session_state.owner_token}"
+    return hashlib.sha256(owner.encode("utf-8")).hexdigest()
@@ -0,0 +1,215 @@
+"""
+Long-term memory store for Talk-To-Anyone application.
+
+When a conversation ends, short facts about the user are extracted from it
+(see models.memory) and kept per owner and persona in a local SQLite
+database; the owner is the visitor's identity from utils.identity, so
+nobody can read another visitor's memories by typing their name. A later
+chat between the same visitor and persona gets the memories
+relevant to each message, ranked in-process with BM25 and cut to a fixed
+token budget, in that turn's system instruction; the chat history itself
+starts empty.
+"""
+import os
+import time
+import sqlite3
+import threading
+from pathlib import Path
+
+from ..models.research_index import BM25Index
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parents[2] / ".cache" / "memories.db"
+DEFAULT_TOKEN_BUDGET = 200
+# Memories considered per owner and persona, newest first
+MAX_MEMORIES = 200
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    persona_key TEXT NOT NULL,
+    conversation_id TEXT,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (owner, persona_key, text)
+);
+CREATE INDEX IF NOT EXISTS idx_memories_owner ON memories (owner, persona_key, created_at DESC);
+"""
+
+
+def get_memory_db_path():
+    """
+    Get the memory database path.
+
+    Returns:
+        Path: MEMORY_DB_PATH from the environment, or .cache/memories.db in the project root
+    """
+    return Path(os.getenv("MEMORY_DB_PATH") or DEFAULT_DB_PATH)
+
+
+def estimate_tokens(text):
+    """Rough token count of text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class MemoryStore:
+    """
+    SQLite-backed store of memories, one row per fact about an owner.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _migrate(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Memories stored before owners existed are keyed on typed, unauthenticated user IDs
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(memories)")}
+            if "user_id" in columns:
+                self._conn.execute("DROP TABLE memories")
+
+    def replace_conversation_memories(self, owner, persona_key, conversation_id, memories):
+        """
+        Store the memories extracted from a conversation, replacing earlier ones from it.
+
+        A resumed conversation is extracted again when it ends, so its
+        previous memories are dropped first. Memories already known from
+        other conversations are not duplicated.
+
+        Args:
+            owner (str): The owner, see utils.identity.get_owner_key
+            persona_key (str): The persona, see normalize_persona_name
+            conversation_id (str): The conversation the memories come from
+            memories (list): Short facts about the user
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM memories WHERE owner = ? AND persona_key = ? AND conversation_id = ?",
+                (owner, persona_key, conversation_id),
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO memories (owner, persona_key, conversation_id, text, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(owner, persona_key, conversation_id, text, now) for text in memories],
+            )
+
+    def list_memories(self, owner, persona_key, limit=MAX_MEMORIES):
+        """
+        Get the newest memories of an owner about a persona.
+
+        Args:
+            owner (str): The owner, see utils.identity.get_owner_key
+            persona_key (str): The persona
+            limit (int): Maximum number of memories
+
+        Returns:
+            list: Memory texts, newest first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text FROM memories WHERE owner = ? AND persona_key = ? "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (owner, persona_key, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count_memories(self, owner):
+        """
+        Count the memories kept about an owner.
+
+        Args:
+            owner (str): The owner, see utils.identity.get_owner_key
+
+        Returns:
+            int: Number of memories over all personas
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM memories WHERE owner = ?", (owner,)
+            ).fetchone()[0]
+
+    def delete_memories(self, owner):
+        """
+        Forget everything about an owner.
+
+        Args:
+            owner (str): The owner, see utils.identity.get_owner_key
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM memories WHERE owner = ?", (owner,))
+
+
+class PersonaMemory:
+    """
+    What one persona remembers about one owner, recalled per chat turn.
+
+    Safe to use from worker threads; it never touches Streamlit state.
+    """
+
+    def __init__(self, store, owner, persona_key, token_budget=None):
+        self.store = store
+        self.owner = owner
+        self.persona_key = persona_key
+        self.token_budget = token_budget or int(os.getenv("MEMORY_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+
+    def recall(self, message):
+        """
+        Pick the memories for a turn within the token budget.
+
+        Memories relevant to the message come first, then the newest ones
+        fill what is left of the budget.
+
+        Args:
+            message (str): The message sent to the persona
+
+        Returns:
+            str: The memories block for the system instruction, or None if there are none
+        """
+        memories = self.store.list_memories(self.owner, self.persona_key)
+        if not memories:
+            return None
+        relevant = [index for index, _ in BM25Index(memories).search(message, len(memories))]
+        ranked = relevant + [index for index in range(len(memories)) if index not in set(relevant)]
+        chosen = []
+        used = 0
+        for index in ranked:
+            cost = estimate_tokens(memories[index])
+            if used + cost <= self.token_budget:
+                chosen.append(memories[index])
+                used += cost
+        if not chosen:
+            return None
+        lines = "\n".join(f"- {memory}" for memory in chosen)
+        return f"WHAT YOU REMEMBER ABOUT THIS USER FROM EARLIER CONVERSATIONS:\n{lines}"
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(path=None):
+    """
+    Get the process-wide memory store for a database path, opening it on first use.
+
+    Args:
+        path (str or Path): Optional database path, defaults to get_memory_db_path()
+
+    Returns:
+        MemoryStore: The store
+    """
+    path = Path(path) if path else get_memory_db_path()
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = MemoryStore(path)
+        return store
@@ -3,12 +3,73 @@ Session state utilities for Talk-To-Anyone application.
 """
 import streamlit as st
 import time
+import uuid
 import base64
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from .conversation_store import get_conversation_store
+from .session_store import get_session_store
+from .memory_store import PersonaMemory, get_memory_store
+from .identity import init_owner, get_owner_key
+
+# Query parameter that carries the conversation ID, so any worker can pick the chat up
+CONVERSATION_QUERY_PARAM = "conversation"
+# Query parameter that keeps long-term memory switched on across visits
+MEMORY_QUERY_PARAM = "memory"
+
+# Number of messages drawn before older ones have to be loaded on demand
+TRANSCRIPT_WINDOW = 30
+# Speculative room replies that may go unused per conversation
+DEFAULT_PREFETCH_BUDGET = 5
+# Persona Room size limits
+DEFAULT_ROOM_SIZE = 2
+MAX_ROOM_SIZE = 6
+# Default voice per persona position, so room members do not all sound alike
+DEFAULT_PERSONA_VOICES = ("Zephyr", "Puck", "Kore", "Charon", "Aoede", "Fenrir")
+
+_memory_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory-extract")
+
+def new_persona_state(index):
+    """
+    Create the state of an empty persona.
+    
+    Args:
+        index (int): Position of the persona in st.session_state.personas
+        
+    Returns:
+        dict: name, description, session (SDK chat, not serializable), history
+            (serialized model history, the source of truth for the session),
+            research (passages saved with the conversation, None to use the
+            persona's stored research), voice, voice_style and language
+    """
+    return {
+        "name": "",
+        "description": None,
+        "session": None,
+        "history": [],
+        "research": None,
+        "voice": DEFAULT_PERSONA_VOICES[index % len(DEFAULT_PERSONA_VOICES)],
+        "voice_style": "",
+        "language": "Auto (Global Setting)",
+    }
+
+def ensure_persona_count(count):
+    """
+    Grow or shrink st.session_state.personas to exactly count personas.
+    
+    Args:
+        count (int): Number of personas
+    """
+    personas = st.session_state.personas
+    del personas[count:]
+    personas.extend(new_persona_state(index) for index in range(len(personas), count))
 
 def initialize_session_state():
     """
     Initialize all the necessary session state variables.
     """
+    init_owner()
+
     # Main states
     if "start_chat" not in st.session_state:
         st.session_state.start_chat = False
@@ -20,6 +81,16 @@ def initialize_session_state():
         st.session_state.chat_mode = "Single Persona Chat"
     if "all_sources" not in st.session_state:
         st.session_state.all_sources = []
+    if "transcript_window" not in st.session_state:
+        st.session_state.transcript_window = TRANSCRIPT_WINDOW
+    if "rendered_messages" not in st.session_state:  # index -> (message, sources_md)
+        st.session_state.rendered_messages = {}
+    if "conversation_id" not in st.session_state:  # ID in the conversation store, None if not stored
+        st.session_state.conversation_id = None
+    if "stored_messages_before" not in st.session_state:  # Stored messages older than messages_display
+        st.session_state.stored_messages_before = 0
+    if "memory_enabled" not in st.session_state:  # Personas remember the visitor, see utils.memory_store
+        st.session_state.memory_enabled = st.query_params.get(MEMORY_QUERY_PARAM) == "on"
 
     # Voice settings
     if "voice_enabled" not in st.session_state:
@@ -27,58 +98,81 @@ def initialize_session_state():
     if "auto_play_voice" not in st.session_state:
         st.session_state.auto_play_voice = True
 
-    # Persona 1
-    if "persona_1_name" not in st.session_state:
-        st.session_state.persona_1_name = ""
-    if "persona_1_description" not in st.session_state:
-        st.session_state.persona_1_description = None
-    if "persona_1_session" not in st.session_state:
-        st.session_state.persona_1_session = None
-    if "persona_1_voice" not in st.session_state:
-        st.session_state.persona_1_voice = "Zephyr"
-    if "persona_1_voice_style" not in st.session_state:
-        st.session_state.persona_1_voice_style = ""
-
-    # Persona 2 (for Persona Room)
-    if "persona_2_name" not in st.session_state:
-        st.session_state.persona_2_name = ""
-    if "persona_2_description" not in st.session_state:
-        st.session_state.persona_2_description = None
-    if "persona_2_session" not in st.session_state:
-        st.session_state.persona_2_session = None
-    if "persona_2_voice" not in st.session_state:
-        st.session_state.persona_2_voice = "Puck"
-    if "persona_2_voice_style" not in st.session_state:
-        st.session_state.persona_2_voice_style = ""
+    # Personas: one for Single Persona Chat, room_size for Persona Room
+    if "personas" not in st.session_state:
+        st.session_state.personas = [new_persona_state(0)]
+    if "room_size" not in st.session_state:
+        st.session_state.room_size = DEFAULT_ROOM_SIZE
 
     # Room relevant states 
     if "action_buttons_visible" not in st.session_state:
         st.session_state.action_buttons_visible = False
-    if "last_actor" not in st.session_state:  # "User", persona_1_name, persona_2_name
+    if "last_actor" not in st.session_state:  # "User" or a persona name
         st.session_state.last_actor = None
     if "last_message_text" not in st.session_state:  # Text of the last message for context
         st.session_state.last_message_text = None
+    if "room_podcast_audio" not in st.session_state:
+        st.session_state.room_podcast_audio = None
+    if "room_speculative" not in st.session_state:
+        st.session_state.room_speculative = False
+    if "room_prefetch_budget" not in st.session_state:
+        st.session_state.room_prefetch_budget = DEFAULT_PREFETCH_BUDGET
+    if "room_prefetch" not in st.session_state:  # Pending speculative reply, see ui.room_prefetch
+        st.session_state.room_prefetch = None
+    if "room_prefetch_wasted" not in st.session_state:
+        st.session_state.room_prefetch_wasted = 0
+    if "room_autorun" not in st.session_state:  # Running auto-converse, see ui.room_autorun
+        st.session_state.room_autorun = None
+
+    # Batch interview of the single persona, see ui.batch_interview
+    if "batch_interview" not in st.session_state:
+        st.session_state.batch_interview = None
+
+def _stop_background_work():
+    """
+    Stop auto-converse, the room prefetch and the batch interview, and clear their state.
+    
+    Their pending turns run on forks of the conversation being left, so
+    they must never land in the next one.
+    """
+    from ..ui.room_autorun import stop_autorun
+    from ..ui.room_prefetch import discard_prefetch
+    from ..ui.batch_interview import stop_batch_interview
+    
+    stop_autorun()
+    discard_prefetch()
+    stop_batch_interview()
+    st.session_state.room_prefetch_wasted = 0
+    st.session_state.batch_interview = None
+    st.session_state.room_podcast_audio = None
 
 def reset_chat_state():
     """
     Reset the chat state variables when starting a new chat.
     """
+    _stop_background_work()
     st.session_state.start_chat = False
     st.session_state.messages_display = []
-    st.session_state.persona_1_name = ""
-    st.session_state.persona_1_description = None
-    st.session_state.persona_1_session = None
-    st.session_state.persona_1_voice = "Zephyr"
-    st.session_state.persona_1_voice_style = ""
-    st.session_state.persona_2_name = ""
-    st.session_state.persona_2_description = None
-    st.session_state.persona_2_session = None
-    st.session_state.persona_2_voice = "Puck"
-    st.session_state.persona_2_voice_style = ""
+    st.session_state.transcript_window = TRANSCRIPT_WINDOW
+    st.session_state.rendered_messages = {}
+    st.session_state.conversation_id = None
+    st.session_state.stored_messages_before = 0
+    st.session_state.personas = [new_persona_state(0)]
     st.session_state.action_buttons_visible = False
     st.session_state.last_actor = None
     st.session_state.last_message_text = None
     st.session_state.all_sources = []
+    st.query_params.pop(CONVERSATION_QUERY_PARAM, None)
+
+def _all_messages():
+    messages = st.session_state.messages_display
+    if st.session_state.conversation_id and st.session_state.stored_messages_before:
+        # Older messages are only in the store
+        older = get_conversation_store().load_messages(
+            st.session_state.conversation_id, st.session_state.stored_messages_before, limit=None
+        )
+        messages = older + messages
+    return messages
 
 def export_chat_state():
     """
@@ -89,12 +183,12 @@ def export_chat_state():
     """
     # Convert messages with audio data to JSON-serializable format
     serializable_messages = []
-    for msg in st.session_state.messages_display:
+    for msg in _all_messages():
         serializable_msg = msg.copy()
         
         # Convert audio data to base64 string if present
         if "audio_data" in serializable_msg and serializable_msg["audio_data"]:
-            if isinstance(serializable_msg["audio_data"], bytes):
+            if isinstance(serializable_msg["audio_data"], (bytes, bytearray)):
                 serializable_msg["audio_data"] = base64.b64encode(serializable_msg["audio_data"]).decode('utf-8')
         
         serializable_messages.append(serializable_msg)
@@ -111,28 +205,19 @@ def export_chat_state():
         "persona_data": {}
     }
     
-    # Add persona 1 data
-    chat_data["persona_data"]["persona_1"] = {
-        "name": st.session_state.persona_1_name,
-        "description": st.session_state.persona_1_description,
-        "voice": st.session_state.persona_1_voice,
-        "voice_style": st.session_state.persona_1_voice_style
-    }
-    
-    # person2 iff in Persona Room
-    if st.session_state.chat_mode == "Persona Room":
-        chat_data["persona_data"]["persona_2"] = {
-            "name": st.session_state.persona_2_name,
-            "description": st.session_state.persona_2_description,
-            "voice": st.session_state.persona_2_voice,
-            "voice_style": st.session_state.persona_2_voice_style
-        }
+    for index, persona in enumerate(st.session_state.personas):
+        chat_data["persona_data"][f"persona_{index + 1}"] = dict(
+            _persona_config(persona), history=_current_history(persona), research=_research_passages(persona)
+        )
     
     return chat_data
 
 def import_chat_state(chat_data, client):
     """
-    Import a saved chat state and initialize necessary chat sessions.
+    Import a saved chat state.
+    
+    Chat sessions are rebuilt from the exported history on first use. The
+    imported chat is added to the conversation store as a new conversation.
     
     Args:
         chat_data (dict): The saved chat data to import
@@ -141,8 +226,27 @@ def import_chat_state(chat_data, client):
     Returns:
         bool: True if import was successful, False otherwise
     """
-    from ..models import initialize_chat_session
+    if not _restore_chat_state(chat_data, client):
+        return False
+    if start_conversation():
+        persist_messages(*st.session_state.messages_display)
+    return True
+
+def _restore_chat_state(chat_data, client):
+    """
+    Load chat data into the session state.
+    
+    The SDK chat sessions are not created here; get_persona_chat rebuilds them
+    from the restored history when they are first needed.
     
+    Args:
+        chat_data (dict): Chat data in the export format
+        client: The Gemini API client
+        
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    _stop_background_work()
     try:
         # what was the chat mode
         st.session_state.chat_mode = chat_data.get("chat_mode", "Single Persona Chat")
@@ -165,6 +269,10 @@ def import_chat_state(chat_data, client):
         
         # setup msg, sources
         st.session_state.messages_display = imported_messages
+        st.session_state.transcript_window = TRANSCRIPT_WINDOW
+        st.session_state.rendered_messages = {}
+        st.session_state.conversation_id = None
+        st.session_state.stored_messages_before = 0
         st.session_state.all_sources = chat_data.get("sources", [])
         
         # voice settings
@@ -174,37 +282,37 @@ def import_chat_state(chat_data, client):
         
         persona_data = chat_data.get("persona_data", {})
         
-        # Persona 1
-        persona_1 = persona_data.get("persona_1", {})
-        st.session_state.persona_1_name = persona_1.get("name", "")
-        st.session_state.persona_1_description = persona_1.get("description", None)
-        st.session_state.persona_1_voice = persona_1.get("voice", "Zephyr")
-        st.session_state.persona_1_voice_style = persona_1.get("voice_style", "")
-        
-        # now init the person 1 and 2 iff in Persona Room
-        if st.session_state.persona_1_description:
-            st.session_state.persona_1_session = initialize_chat_session(
-                client, st.session_state.persona_1_description
+        # Personas are stored as persona_1, persona_2, ... in room order
+        persona_keys = sorted(
+            (key for key in persona_data if key.startswith("persona_") and key[8:].isdigit()),
+            key=lambda key: int(key[8:])
+        )
+        if st.session_state.chat_mode != "Persona Room":
+            persona_keys = persona_keys[:1]
+        st.session_state.personas = []
+        for index, key in enumerate(persona_keys or ["persona_1"]):
+            saved = persona_data.get(key) or {}
+            persona = new_persona_state(index)
+            persona.update(
+                name=saved.get("name", ""),
+                description=saved.get("description", None),
+                voice=saved.get("voice") or persona["voice"],
+                voice_style=saved.get("voice_style", ""),
+                history=saved.get("history") or [],
+                # Kept with this conversation only; the research store is shared by every visitor
+                research=[passage for passage in saved.get("research") or [] if isinstance(passage, str)] or None,
             )
-            if not st.session_state.persona_1_session:
-                return False
-        
+            st.session_state.personas.append(persona)
         if st.session_state.chat_mode == "Persona Room":
-            persona_2 = persona_data.get("persona_2", {})
-            st.session_state.persona_2_name = persona_2.get("name", "")
-            st.session_state.persona_2_description = persona_2.get("description", None)
-            st.session_state.persona_2_voice = persona_2.get("voice", "Puck")
-            st.session_state.persona_2_voice_style = persona_2.get("voice_style", "")
-            
-            if st.session_state.persona_2_description:
-                st.session_state.persona_2_session = initialize_chat_session(
-                    client, st.session_state.persona_2_description
-                )
-                if not st.session_state.persona_2_session:
-                    return False
+            st.session_state.room_size = len(st.session_state.personas)
         
         if st.session_state.chat_mode == "Persona Room":
-            if st.session_state.messages_display:
+            room_state = chat_data.get("room_state")
+            if room_state:
+                st.session_state.last_actor = room_state.get("last_actor")
+                st.session_state.last_message_text = room_state.get("last_message_text")
+                st.session_state.action_buttons_visible = room_state.get("action_buttons_visible", False)
+            elif st.session_state.messages_display:
                 last_msg = st.session_state.messages_display[-1]
                 st.session_state.last_actor = last_msg["role"]
                 st.session_state.last_message_text = last_msg["text"]
@@ -221,3 +329,302 @@ def import_chat_state(chat_data, client):
     except Exception as e:
         st.error(f"Error importing chat: {e}")
         return False
+
+def _research_passages(persona):
+    from ..models.research_index import get_research_passages
+    
+    if persona["research"] is not None:
+        return persona["research"]
+    return get_research_passages(persona["description"]) if persona["description"] else []
+
+def _persona_config(persona):
+    return {key: persona[key] for key in ("name", "description", "voice", "voice_style")}
+
+def _current_history(persona):
+    from ..models import serialize_chat_history
+    
+    if persona["session"] is None:
+        return persona["history"]
+    return serialize_chat_history(persona["session"])
+
+def get_persona_chat(persona, client):
+    """
+    Get the SDK chat session of a persona, rebuilding it from its history if needed.
+    
+    Sessions are not shared between app workers, so a conversation picked up
+    by another worker (or restored after a restart) starts without one.
+    
+    Args:
+        persona (dict): An entry of st.session_state.personas
+        client: The Gemini API client
+        
+    Returns:
+        object: The chat session, or None if the persona is not set up or it could not be created
+    """
+    from ..models import initialize_chat_session
+    
+    if persona["session"] is None and persona["description"]:
+        persona["session"] = initialize_chat_session(
+            client, persona["description"], persona["history"], memory=get_user_memory(persona),
+            research=persona["research"],
+        )
+    return persona["session"]
+
+def get_user_memory(persona):
+    """
+    Get what a persona remembers about the current user.
+    
+    Args:
+        persona (dict): An entry of st.session_state.personas
+        
+    Returns:
+        PersonaMemory: The persona's memory of the user, or None if memory is off
+    """
+    from ..models import normalize_persona_name
+    
+    if not st.session_state.memory_enabled or not persona["name"]:
+        return None
+    return PersonaMemory(get_memory_store(), get_owner_key(), normalize_persona_name(persona["name"]))
+
+def set_memory_enabled(enabled):
+    """
+    Switch long-term memory on or off, and keep the choice in the page URL.
+    
+    Memories belong to the visitor's owner identity (see utils.identity),
+    never to a name they type.
+    
+    Args:
+        enabled (bool): Whether personas should remember the visitor
+    """
+    st.session_state.memory_enabled = enabled
+    if enabled:
+        st.query_params[MEMORY_QUERY_PARAM] = "on"
+    else:
+        st.query_params.pop(MEMORY_QUERY_PARAM, None)
+
+def _extract_and_store(client, owner, conversation_id, personas, messages):
+    from ..models import extract_memories, format_memory_transcript
+    
+    transcript = format_memory_transcript(messages)
+    store = get_memory_store()
+    for name, persona_key in personas:
+        try:
+            memories = extract_memories(client, name, transcript)
+        except Exception:
+            # Memory is a nice-to-have; a failed extraction must not surface anywhere
+            continue
+        try:
+            store.replace_conversation_memories(owner, persona_key, conversation_id, memories)
+        except sqlite3.Error:
+            return
+
+def remember_conversation(client):
+    """
+    Extract what each persona should remember about the user from the
+    current conversation, in the background.
+    
+    Call before the conversation is left; nothing happens while memory is
+    off or without anything said by the user.
+    
+    Args:
+        client: The Gemini API client
+    """
+    from ..api.scheduler import current_session_key, run_in_session
+    from ..models import normalize_persona_name
+    
+    if not st.session_state.memory_enabled or not st.session_state.start_chat:
+        return
+    messages = _all_messages()
+    if not any(msg["role"] == "User" for msg in messages):
+        return
+    personas = [
+        (persona["name"], normalize_persona_name(persona["name"]))
+        for persona in st.session_state.personas if persona["name"]
+    ]
+    _memory_executor.submit(
+        run_in_session, current_session_key(), _extract_and_store,
+        client, get_owner_key(), st.session_state.conversation_id or uuid.uuid4().hex, personas, list(messages)
+    )
+
+def save_session_snapshot():
+    """
+    Write the current conversation's persona config, model history and room
+    state to the shared session store.
+    """
+    conversation_id = st.session_state.conversation_id
+    if not conversation_id:
+        return
+    for persona in st.session_state.personas:
+        persona["history"] = _current_history(persona)
+    snapshot = {
+        "chat_mode": st.session_state.chat_mode,
+        "persona_data": {
+            f"persona_{index + 1}": dict(
+                _persona_config(persona), history=persona["history"], research=_research_passages(persona)
+            )
+            for index, persona in enumerate(st.session_state.personas)
+        },
+        "room_state": {
+            "last_actor": st.session_state.last_actor,
+            "last_message_text": st.session_state.last_message_text,
+            "action_buttons_visible": st.session_state.action_buttons_visible,
+        },
+        "voice_settings": {
+            "voice_enabled": st.session_state.voice_enabled,
+            "auto_play_voice": st.session_state.auto_play_voice,
+        },
+    }
+    try:
+        get_session_store().save(conversation_id, snapshot)
+    except (sqlite3.Error, OSError) as e:
+        st.warning(f"Could not save the session: {e}")
+
+def start_conversation():
+    """
+    Create a conversation in the store for the chat that is starting.
+    
+    Returns:
+        bool: True if the conversation is stored, False if the store is unavailable
+    """
+    try:
+        st.session_state.conversation_id = get_conversation_store().create_conversation(
+            get_owner_key(),
+            st.session_state.chat_mode,
+            [_persona_config(persona) for persona in st.session_state.personas],
+            st.session_state.voice_enabled,
+            st.session_state.auto_play_voice,
+        )
+        st.session_state.stored_messages_before = 0
+        st.query_params[CONVERSATION_QUERY_PARAM] = st.session_state.conversation_id
+        save_session_snapshot()
+        return True
+    except (sqlite3.Error, OSError) as e:
+        st.session_state.conversation_id = None
+        st.warning(f"Conversation will not be saved: {e}")
+        return False
+
+def persist_messages(*messages):
+    """
+    Write completed messages of the current conversation to the store and
+    checkpoint the session state that goes with them.
+    
+    Args:
+        *messages: Message dicts, in conversation order
+    """
+    if not st.session_state.conversation_id or not messages:
+        return
+    try:
+        get_conversation_store().append_messages(st.session_state.conversation_id, messages)
+    except sqlite3.Error as e:
+        st.warning(f"Could not save the latest messages: {e}")
+    save_session_snapshot()
+
+def load_older_messages(count):
+    """
+    Prepend up to count older messages of the current conversation from the store.
+    
+    Args:
+        count (int): Number of messages to load
+        
+    Returns:
+        int: Number of messages loaded
+    """
+    before = st.session_state.stored_messages_before
+    if not st.session_state.conversation_id or not before:
+        return 0
+    older = get_conversation_store().load_messages(st.session_state.conversation_id, before, count)
+    st.session_state.messages_display = older + st.session_state.messages_display
+    st.session_state.stored_messages_before = before - len(older)
+    # Cached render parts are keyed by position, which just shifted
+    st.session_state.rendered_messages = {}
+    return len(older)
+
+def resume_conversation(conversation_id, client, seq=None):
+    """
+    Resume a stored conversation, loading only its most recent messages.
+    
+    Args:
+        conversation_id (str): ID of the conversation in the store
+        client: The Gemini API client
+        seq (int): Optional position of a message that must be shown, e.g. a search hit
+        
+    Returns:
+        bool: True if the conversation was resumed, False otherwise
+    """
+    store = get_conversation_store()
+    conversation = store.get_conversation(conversation_id, get_owner_key())
+    if conversation is None:
+        st.error(f"No saved conversation with ID {conversation_id}.")
+        return False
+    
+    # Model history and room state come from the shared session store
+    snapshot = get_session_store().load(conversation_id) or {}
+    persona_data = {
+        f"persona_{slot}": persona for slot, persona in conversation["personas"].items()
+    }
+    for key, persona in snapshot.get("persona_data", {}).items():
+        if key in persona_data:
+            persona_data[key] = dict(
+                persona_data[key], history=persona.get("history") or [], research=persona.get("research") or []
+            )
+    
+    chat_data = {
+        "chat_mode": conversation["chat_mode"],
+        "messages": store.load_messages(conversation_id, limit=TRANSCRIPT_WINDOW),
+        "sources": store.load_sources(conversation_id),
+        "voice_settings": {
+            "voice_enabled": conversation["voice_enabled"],
+            "auto_play_voice": conversation["auto_play_voice"],
+        },
+        "persona_data": persona_data,
+        "room_state": snapshot.get("room_state"),
+    }
+    if not _restore_chat_state(chat_data, client):
+        return False
+    st.session_state.conversation_id = conversation_id
+    st.query_params[CONVERSATION_QUERY_PARAM] = conversation_id
+    st.session_state.stored_messages_before = conversation["message_count"] - len(chat_data["messages"])
+    if seq is not None and seq < st.session_state.stored_messages_before:
+        load_older_messages(st.session_state.stored_messages_before - seq)
+        st.session_state.transcript_window = len(st.session_state.messages_display)
+    return True
+
+def delete_conversation(conversation_id):
+    """
+    Delete one of the visitor's stored conversations and its session snapshot.
+    
+    The chat is left if it is the one being deleted.
+    
+    Args:
+        conversation_id (str): ID of the conversation in the store
+        
+    Returns:
+        bool: True if it was deleted, False if the visitor has no such conversation
+    """
+    if not get_conversation_store().delete_conversation(conversation_id, get_owner_key()):
+        return False
+    get_session_store().delete(conversation_id)
+    if st.session_state.conversation_id == conversation_id:
+        reset_chat_state()
+    return True
+
+def restore_conversation_from_query_params(client):
+    """
+    Resume the conversation named in the page URL if this session is not showing it.
+    
+    Covers a browser refresh, a server restart and a request landing on a
+    different app worker.
+    
+    Args:
+        client: The Gemini API client
+        
+    Returns:
+        bool: True if a conversation was restored
+    """
+    conversation_id = st.query_params.get(CONVERSATION_QUERY_PARAM)
+    if not conversation_id or conversation_id == st.session_state.conversation_id:
+        return False
+    if resume_conversation(conversation_id, client):
+        return True
+    st.query_params.pop(CONVERSATION_QUERY_PARAM, None)
+    return False
@@ -0,0 +1,162 @@
+"""
+Shared session store for Talk-To-Anyone application.
+
+The state needed to continue a conversation (chat mode, persona config,
+each persona's serialized model history and the room turn state) is kept
+outside the Streamlit process, keyed by conversation ID. Any app worker can
+pick a conversation up from there and rebuild the SDK chat objects on first
+use, so sessions do not have to stick to the worker that started them.
+
+Backends are chosen with SESSION_STORE_BACKEND:
+    sqlite  - a SQLite database, shared by every worker on the host (default)
+    file    - one JSON file per conversation, for tests and simple setups
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parents[2] / ".cache"
+
+
+class SessionStore(ABC):
+    """
+    Interface of a session snapshot backend.
+
+    Snapshots are JSON-serializable dicts; a backend only stores and returns them.
+    """
+
+    @abstractmethod
+    def load(self, conversation_id):
+        """
+        Load the snapshot of a conversation.
+
+        Args:
+            conversation_id (str): The conversation
+
+        Returns:
+            dict: The snapshot, or None if there is none
+        """
+
+    @abstractmethod
+    def save(self, conversation_id, snapshot):
+        """
+        Save the snapshot of a conversation, replacing any previous one.
+
+        Args:
+            conversation_id (str): The conversation
+            snapshot (dict): JSON-serializable session state
+        """
+
+    @abstractmethod
+    def delete(self, conversation_id):
+        """
+        Delete the snapshot of a conversation, if there is one.
+
+        Args:
+            conversation_id (str): The conversation
+        """
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session snapshots in a SQLite table, safe to share between processes (WAL mode).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_snapshots ("
+            "conversation_id TEXT PRIMARY KEY, snapshot TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def load(self, conversation_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot FROM session_snapshots WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, conversation_id, snapshot):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO session_snapshots (conversation_id, snapshot, updated_at) "
+                "VALUES (?, ?, ?)",
+                (conversation_id, json.dumps(snapshot), time.time()),
+            )
+
+    def delete(self, conversation_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM session_snapshots WHERE conversation_id = ?", (conversation_id,)
+            )
+
+
+class FileSessionStore(SessionStore):
+    """
+    Session snapshots as JSON files in a directory, replaced atomically.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def _path(self, conversation_id):
+        # IDs come from query parameters, so never let them leave the directory
+        return self.directory / f"{Path(conversation_id).name}.json"
+
+    def load(self, conversation_id):
+        try:
+            with open(self._path(conversation_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, conversation_id, snapshot):
+        path = self._path(conversation_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    def delete(self, conversation_id):
+        try:
+            os.remove(self._path(conversation_id))
+        except OSError:
+            pass
+
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """
+    Get the process-wide session store configured by the environment.
+
+    SESSION_STORE_BACKEND selects "sqlite" (default) or "file"; SESSION_STORE_PATH
+    overrides the database file or directory.
+
+    Returns:
+        SessionStore: The store
+    """
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            backend = os.getenv("SESSION_STORE_BACKEND", "sqlite").lower()
+            path = os.getenv("SESSION_STORE_PATH")
+            if backend == "file":
+                _session_store = FileSessionStore(path or DEFAULT_STORE_DIR / "sessions")
+            elif backend == "sqlite":
+                _session_store = SQLiteSessionStore(path or DEFAULT_STORE_DIR / "sessions.db")
+            else:
+                raise ValueError(f"Unknown SESSION_STORE_BACKEND: {backend}")
+        return _session_store